@@ -0,0 +1,105 @@
+"""
+Bounded process pool for CPU-heavy analytics jobs.
+
+Correlation math (matrix products, scipy statistics) holds the GIL, so running
+it in the request threadpool slows every other request down while it runs.
+Jobs submitted through `run_analytics` execute in worker processes instead;
+they receive plain NumPy arrays (never ORM objects or sessions) and return
+plain results, so pickling them between processes is cheap.
+
+The pool is bounded: at most ANALYTICS_WORKERS jobs run and ANALYTICS_QUEUE_DEPTH
+more wait. When the pool is disabled (ANALYTICS_WORKERS=0), full or broken, the
+job runs inline in the calling thread, exactly as it did before the pool existed.
+A job that takes longer than ANALYTICS_TIMEOUT_SECONDS fails the request with 504.
+"""
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+import logging
+import multiprocessing
+import os
+import threading
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for analytics jobs (0 runs every job inline)
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", "2"))
+# Jobs allowed to wait for a free worker before new ones run inline
+ANALYTICS_QUEUE_DEPTH = int(os.getenv("ANALYTICS_QUEUE_DEPTH", "8"))
+# How long a request waits for its job before giving up
+ANALYTICS_TIMEOUT_SECONDS = float(os.getenv("ANALYTICS_TIMEOUT_SECONDS", "30"))
+
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_slots = threading.BoundedSemaphore(max(ANALYTICS_WORKERS + ANALYTICS_QUEUE_DEPTH, 1))
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Start the pool on first use, so importing the app never spawns processes."""
+    global _pool
+    if ANALYTICS_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # Spawn rather than fork: the server process runs threads and holds
+            # database connections that must not be copied into the workers
+            _pool = ProcessPoolExecutor(
+                max_workers=ANALYTICS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next job starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_analytics_pool() -> None:
+    """Stop the worker processes (on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_analytics(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run `func(*args)` in the analytics pool and wait for its result.
+
+    `func` must be a module-level function and `args` should be NumPy arrays
+    or other small picklable values. Call this from sync endpoints only: it
+    blocks the calling thread (without holding the GIL) until the job is done.
+
+    Raises:
+        HTTPException: 504 if the job does not finish within ANALYTICS_TIMEOUT_SECONDS
+    """
+    pool = _get_pool()
+    if pool is None or not _slots.acquire(blocking=False):
+        return func(*args)
+
+    try:
+        future = pool.submit(func, *args)
+    except (BrokenProcessPool, RuntimeError):
+        _slots.release()
+        logger.warning("Analytics pool unavailable, running %s inline", func.__name__)
+        _discard_pool(pool)
+        return func(*args)
+    # The slot is held until the job actually finishes, even if the request times out
+    future.add_done_callback(lambda _: _slots.release())
+
+    try:
+        return future.result(timeout=ANALYTICS_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        future.cancel()
+        raise HTTPException(status_code=504, detail="Analytics computation timed out")
+    except BrokenProcessPool:
+        logger.warning("Analytics worker died, running %s inline", func.__name__)
+        _discard_pool(pool)
+        return func(*args)
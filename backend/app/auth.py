@@ -3,11 +3,15 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.cache import LRUCache
+from app.database import SessionLocal
 from app.models import User
 import os
+import time
 
 # Security configuration
 # Use environment variable or default (change the default in production!)
@@ -19,9 +23,29 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 43200  # 30 days for convenience on Pi
 # WARNING: Never set this to true in production!
 DISABLE_AUTH = os.getenv("DISABLE_AUTH", "false").lower() in ("true", "1", "yes")
 
+# Verified principals are cached per token so authenticated requests don't
+# need a database session. A user change committed by this process clears the
+# cache; changes made elsewhere (e.g. by a script) apply within the TTL.
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "64"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# token -> (detached User, monotonic expiry time)
+principal_cache = LRUCache(AUTH_CACHE_SIZE)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_users_changed(mapper, connection, target):
+    object_session(target).info["users_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals(session):
+    # Cleared after the commit so a concurrent request cannot re-cache the old state
+    if session.info.pop("users_changed", False):
+        principal_cache.clear()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     # Bcrypt has a 72 byte limit, truncate if necessary
@@ -59,52 +83,75 @@ def decode_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+def _credentials_exception(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _load_principal(token: str) -> User:
+    """Verify a token against the database and cache the resulting user."""
+    payload = decode_token(token)
+    username: str = payload.get("sub")
+    if username is None:
+        raise _credentials_exception()
+    
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise _credentials_exception("User not found")
+        
+        if not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Inactive user"
+            )
+        
+        # Keep the loaded attributes usable after the session is closed
+        db.expunge(user)
+    
+    # Never cache past the token's own expiry
+    expires_at = time.monotonic() + AUTH_CACHE_TTL_SECONDS
+    if payload.get("exp") is not None:
+        expires_at = min(expires_at, time.monotonic() + payload["exp"] - time.time())
+    principal_cache.set(token, (user, expires_at))
+    return user
+
+def _development_user() -> User:
+    """The user requests run as when authentication is disabled."""
+    # Try to get the first active user, or create a mock one
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.is_active == True).first()
+        if user:
+            db.expunge(user)
+            return user
+    # If no users exist, return a mock user (won't be saved to DB)
+    from app.models import User as UserModel
+    mock_user = UserModel()
+    mock_user.id = 1
+    mock_user.username = "dev_user"
+    mock_user.is_active = True
+    return mock_user
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
     """Get the current authenticated user from the JWT token."""
     # Development mode: skip authentication
     if DISABLE_AUTH:
-        # Return a mock user for development
-        # Try to get the first active user, or create a mock one
-        user = db.query(User).filter(User.is_active == True).first()
-        if user:
-            return user
-        # If no users exist, return a mock user (won't be saved to DB)
-        from app.models import User as UserModel
-        mock_user = UserModel()
-        mock_user.id = 1
-        mock_user.username = "dev_user"
-        mock_user.is_active = True
-        return mock_user
+        return await run_in_threadpool(_development_user)
     
-    # Production mode: full authentication
+    # Production mode: full authentication, skipped for recently verified tokens
     token = credentials.credentials
-    payload = decode_token(token)
-    username: str = payload.get("sub")
-    if username is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Inactive user"
-        )
+    cached = principal_cache.get(token)
+    if cached is not None:
+        user, expires_at = cached
+        if time.monotonic() < expires_at:
+            return user
     
-    return user
+    # The lookup uses the sync engine, so keep it off the event loop
+    return await run_in_threadpool(_load_principal, token)
 
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """Authenticate a user by username and password."""
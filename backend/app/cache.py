@@ -0,0 +1,208 @@
+"""
+Result cache for analytics endpoints with write-driven invalidation.
+
+Analytics results only change when the user logs, edits or deletes data, so
+each computed response is cached under its endpoint, query parameters and the
+current *data version* of every table it reads. Every write calls
+`bump_data_version()` before committing, so the counters in the data_versions
+table change in the same transaction as the data: writes made by the CLI
+scripts or by another worker invalidate the cache as well. A key built from
+an old version becomes unreachable and its entry simply ages out of the LRU.
+Looking up a cached result costs one small query for the current versions.
+
+Responses carry an ETag derived from the same key, so clients (the PWA) can
+revalidate with If-None-Match and get a 304 without any recomputation.
+
+The cached results live in process memory, so each worker computes and keeps
+its own copy. Writes made without bump_data_version() (editing the database
+by hand) are only picked up after a restart.
+"""
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+import functools
+import hashlib
+import inspect
+import os
+import threading
+import uuid
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import DataVersion
+from app.serialization import dumps
+
+# Maximum number of cached responses (least recently used are evicted first)
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "256"))
+# Cached dashboard snapshots (one per day viewed, so a small cache is plenty)
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "32"))
+
+# Changes on every restart, so ETags handed out by a previous process (for
+# example before the database file was restored from a backup, which may
+# reset its versions) are never mistaken for current ones
+_BOOT_ID = uuid.uuid4().hex
+
+
+def bump_data_version(db: Session, *table_names: str) -> None:
+    """
+    Mark tables as changed. Call in the transaction writing to them, before committing.
+
+    Works with async sessions through run_sync.
+    """
+    if not table_names:
+        return
+    # One upsert, so concurrent first writes to a table cannot both insert its row
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(DataVersion).values(
+        [{"table_name": table_name, "version": 1} for table_name in sorted(set(table_names))]
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[DataVersion.table_name],
+        set_={"version": DataVersion.version + 1}
+    ))
+
+
+def data_versions(db: Session, table_names: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+    """Get the current (table, version) pairs for the given tables."""
+    table_names = sorted(table_names)
+    versions = dict(db.execute(
+        select(DataVersion.table_name, DataVersion.version).where(DataVersion.table_name.in_(table_names))
+    ).all())
+    return tuple((name, versions.get(name, 0)) for name in table_names)
+
+
+class LRUCache:
+    """A small thread-safe LRU mapping."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+analytics_cache = LRUCache(ANALYTICS_CACHE_SIZE)
+dashboard_cache = LRUCache(DASHBOARD_CACHE_SIZE)
+
+
+def _normalize(value: Any) -> Hashable:
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def make_etag(key: Hashable) -> str:
+    digest = hashlib.sha1(f"{_BOOT_ID}:{key!r}".encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+
+def cached_json_response(
+    request: Request,
+    db: Session,
+    endpoint: str,
+    params: Dict[str, Any],
+    tables: Iterable[str],
+    compute: Callable[[], Any],
+    cache: LRUCache = analytics_cache,
+) -> Response:
+    """
+    Serve a JSON result from the cache, computing and storing it on a miss.
+
+    Args:
+        request: The incoming request (used for If-None-Match)
+        db: Session to read the data versions with
+        endpoint: Name of the endpoint, part of the cache key
+        params: Query parameters that affect the result
+        tables: Tables the result is computed from
+        compute: Produces the (jsonable) result on a cache miss
+    """
+    key = (
+        endpoint,
+        tuple(sorted((name, _normalize(value)) for name, value in params.items())),
+        data_versions(db, tables),
+        # Results such as the default heatmap year depend on the current day
+        date.today().isoformat(),
+    )
+    etag = make_etag(key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    body = cache.get(key)
+    if body is None:
+        body = dumps(compute())
+        cache.set(key, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_analytics(endpoint: str, tables: Iterable[str], cache: LRUCache = analytics_cache):
+    """
+    Decorator caching a sync FastAPI endpoint through `cached_json_response`.
+
+    Every keyword argument except `db`, the endpoint's session, is part of the
+    cache key. Place it below the `@router.get(...)` decorator:
+
+        @router.get("/trends/wellbeing")
+        @cached_analytics("trends/wellbeing", tables=WELLBEING_TABLES)
+        def get_wellbeing_trends(start_date: date = None, db: Session = Depends(get_db)):
+            ...
+    """
+    tables = tuple(tables)
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Response]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, request: Request, **kwargs) -> Response:
+            bound = signature.bind(*args, **kwargs)
+            params = {name: value for name, value in bound.arguments.items() if name != "db"}
+            return cached_json_response(
+                request, bound.arguments["db"], endpoint, params, tables, lambda: func(*args, **kwargs), cache
+            )
+
+        # Expose the original parameters plus the Request to FastAPI
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        ])
+        return wrapper
+
+    return decorator
@@ -0,0 +1,87 @@
+"""
+Columnar loader for analytics data.
+
+Analytics only ever needs a few columns per row, so instead of loading ORM
+objects, converting each one to a dict and building a DataFrame from those,
+the loaders here select just the needed columns with Core and read the result
+once into typed NumPy arrays:
+
+    days       int64 day ordinals (date.toordinal())
+    metrics    float64, NaN where a metric was not recorded
+    completed  bool
+
+The arrays are small and picklable, so they can go straight to the analytics
+process pool, and integer days make lag shifts and date alignment plain
+arithmetic.
+"""
+from datetime import date
+from typing import NamedTuple, Optional, Sequence
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models import LifestyleFactorEntry
+from app.wellbeing_rollup import daily_means_select
+
+# date(1970, 1, 1).toordinal(), to convert day ordinals to datetime64[D]
+_EPOCH_ORDINAL = 719163
+
+
+class DailyMetrics(NamedTuple):
+    """Daily mean of each metric, one row per day with at least one entry, ordered by day."""
+    days: np.ndarray        # (days,) int64 ordinals
+    values: np.ndarray      # (days, metrics) float64, NaN when not recorded
+    metric_names: Sequence[str]
+
+
+class FactorEntries(NamedTuple):
+    """Lifestyle factor entries as parallel columns."""
+    factor_ids: np.ndarray  # int64
+    days: np.ndarray        # int64 ordinals
+    completed: np.ndarray   # bool
+
+
+def load_daily_metrics(
+    db: Session,
+    metric_names: Sequence[str],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> DailyMetrics:
+    """Load the daily means of the given metrics from the wellbeing rollup."""
+    rows = db.execute(daily_means_select(metric_names, start_date, end_date)).all()
+    # None (metric not recorded that day) becomes NaN
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(metric_names))
+    days = np.fromiter((row[0].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+    return DailyMetrics(days, values, list(metric_names))
+
+
+def load_factor_entries(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    lifestyle_factor_id: Optional[int] = None,
+) -> FactorEntries:
+    """Load (lifestyle_factor_id, day, completed) columns of the entries in a date range."""
+    query = select(
+        LifestyleFactorEntry.lifestyle_factor_id,
+        LifestyleFactorEntry.date,
+        LifestyleFactorEntry.completed,
+    )
+    if lifestyle_factor_id is not None:
+        query = query.where(LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor_id)
+    if start_date:
+        query = query.where(LifestyleFactorEntry.date >= start_date)
+    if end_date:
+        query = query.where(LifestyleFactorEntry.date <= end_date)
+
+    rows = db.execute(query.order_by(LifestyleFactorEntry.date)).all()
+    count = len(rows)
+    return FactorEntries(
+        np.fromiter((row[0] for row in rows), dtype=np.int64, count=count),
+        np.fromiter((row[1].toordinal() for row in rows), dtype=np.int64, count=count),
+        np.fromiter((bool(row[2]) for row in rows), dtype=bool, count=count),
+    )
+
+
+def day_strings(days: np.ndarray) -> np.ndarray:
+    """Format day ordinals as ISO dates ("2024-01-31") in one vectorized step."""
+    return (days - _EPOCH_ORDINAL).astype("datetime64[D]").astype(str)
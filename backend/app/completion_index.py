@@ -0,0 +1,191 @@
+"""
+Compact completion index: one bitset per lifestyle factor and year.
+
+Completion is one bit per factor per day, yet the heatmap and calendar views
+used to receive one JSON object (or a full entry row) per entry. The index
+stores each factor's year as two 366-bit bitsets in
+LifestyleFactorCompletionBitmap:
+
+    recorded   the day has an entry
+    completed  the day has a completed entry
+
+Bit i, most significant bit of each byte first, stands for January 1st + i
+days (numpy.packbits order), so a whole year is 46 bytes per bitset and the
+calendar of every factor for a year is a single indexed lookup.
+
+The entry write handlers set the bits of the days they write in the same
+transaction; imports and databases created before the index rebuild it.
+Responses carry the bitsets as base64 or as run lengths.
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+import base64
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from app.models import LifestyleFactor, LifestyleFactorCompletionBitmap, LifestyleFactorEntry
+
+# Bytes of a bitset holding every day of a (leap) year
+BITMAP_BYTES = 46
+
+ENCODINGS = ("base64", "rle")
+
+
+def days_in_year(year: int) -> int:
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def _set_bit(bitmap: bytearray, day_index: int, value: bool) -> None:
+    mask = 0x80 >> (day_index % 8)
+    if value:
+        bitmap[day_index // 8] |= mask
+    else:
+        bitmap[day_index // 8] &= ~mask
+
+
+def _bits(bitmap: bytes, count: int) -> List[int]:
+    return [(bitmap[i // 8] >> (7 - i % 8)) & 1 for i in range(count)]
+
+
+def set_entries(db: Session, entries: Iterable[Tuple[int, date, bool]]) -> None:
+    """
+    Set the bits of (lifestyle_factor_id, date, completed) entries that were created or changed.
+
+    Call before committing, so the index and the entries are written together.
+    """
+    by_key: Dict[Tuple[int, int], List[Tuple[date, bool]]] = defaultdict(list)
+    for lifestyle_factor_id, entry_date, completed in entries:
+        by_key[(lifestyle_factor_id, entry_date.year)].append((entry_date, bool(completed)))
+    if not by_key:
+        return
+
+    existing = {
+        (bitmap.lifestyle_factor_id, bitmap.year): bitmap
+        for bitmap in db.scalars(select(LifestyleFactorCompletionBitmap).where(
+            LifestyleFactorCompletionBitmap.lifestyle_factor_id.in_({key[0] for key in by_key}),
+            LifestyleFactorCompletionBitmap.year.in_({key[1] for key in by_key}),
+        ))
+    }
+
+    for (lifestyle_factor_id, year), changes in by_key.items():
+        bitmap = existing.get((lifestyle_factor_id, year))
+        if bitmap is None:
+            bitmap = LifestyleFactorCompletionBitmap(
+                lifestyle_factor_id=lifestyle_factor_id,
+                year=year,
+                recorded=bytes(BITMAP_BYTES),
+                completed=bytes(BITMAP_BYTES),
+            )
+            db.add(bitmap)
+        recorded = bytearray(bitmap.recorded)
+        completed = bytearray(bitmap.completed)
+        for entry_date, entry_completed in changes:
+            day_index = entry_date.timetuple().tm_yday - 1
+            _set_bit(recorded, day_index, True)
+            _set_bit(completed, day_index, entry_completed)
+        # Assign new bytes objects so the change is detected
+        bitmap.recorded = bytes(recorded)
+        bitmap.completed = bytes(completed)
+
+    db.flush()
+
+
+def rebuild_completion_index(db: Session, lifestyle_factor_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the bitsets of the given lifestyle factors (all when None) from their entries.
+
+    Returns the number of bitmaps written. The caller commits.
+    """
+    entries_query = select(
+        LifestyleFactorEntry.lifestyle_factor_id, LifestyleFactorEntry.date, LifestyleFactorEntry.completed
+    )
+    delete_query = delete(LifestyleFactorCompletionBitmap)
+    if lifestyle_factor_ids is not None:
+        lifestyle_factor_ids = list(lifestyle_factor_ids)
+        entries_query = entries_query.where(LifestyleFactorEntry.lifestyle_factor_id.in_(lifestyle_factor_ids))
+        delete_query = delete_query.where(LifestyleFactorCompletionBitmap.lifestyle_factor_id.in_(lifestyle_factor_ids))
+
+    bitmaps: Dict[Tuple[int, int], Tuple[bytearray, bytearray]] = {}
+    for lifestyle_factor_id, entry_date, completed in db.execute(entries_query):
+        key = (lifestyle_factor_id, entry_date.year)
+        if key not in bitmaps:
+            bitmaps[key] = (bytearray(BITMAP_BYTES), bytearray(BITMAP_BYTES))
+        recorded_bits, completed_bits = bitmaps[key]
+        day_index = entry_date.timetuple().tm_yday - 1
+        _set_bit(recorded_bits, day_index, True)
+        _set_bit(completed_bits, day_index, bool(completed))
+
+    # The ORM delete also removes bitmaps already loaded into the session
+    db.execute(delete_query)
+    if bitmaps:
+        db.execute(insert(LifestyleFactorCompletionBitmap), [
+            {
+                "lifestyle_factor_id": lifestyle_factor_id,
+                "year": year,
+                "recorded": bytes(recorded_bits),
+                "completed": bytes(completed_bits),
+            }
+            for (lifestyle_factor_id, year), (recorded_bits, completed_bits) in bitmaps.items()
+        ])
+    return len(bitmaps)
+
+
+def ensure_completion_index(db: Session) -> None:
+    """Build the index for databases created before it existed."""
+    if db.query(LifestyleFactorCompletionBitmap.id).first() is not None:
+        return
+    if db.query(LifestyleFactorEntry.id).first() is None:
+        return
+    rebuild_completion_index(db)
+    db.commit()
+
+
+def encode(bitmap: Optional[bytes], year: int, encoding: str):
+    """
+    Encode a bitset for a response.
+
+    base64: the packed bytes, truncated to the days of the year.
+    rle: run lengths of alternating 0 and 1 bits, starting with a (possibly
+    empty) run of 0 bits, e.g. [3, 2, 1] is 0 0 0 1 1 0.
+    """
+    count = days_in_year(year)
+    bitmap = bitmap or bytes(BITMAP_BYTES)
+    if encoding == "base64":
+        return base64.b64encode(bitmap[:(count + 7) // 8]).decode("ascii")
+
+    runs = []
+    current, length = 0, 0
+    for bit in _bits(bitmap, count):
+        if bit == current:
+            length += 1
+        else:
+            runs.append(length)
+            current, length = bit, 1
+    runs.append(length)
+    return runs
+
+
+def year_calendar(
+    bitmaps: Iterable[LifestyleFactorCompletionBitmap],
+    lifestyle_factors: Iterable[LifestyleFactor],
+    year: int,
+    encoding: str,
+) -> dict:
+    """Build the calendar response of a year from its bitmaps (factors without one are empty)."""
+    by_factor = {bitmap.lifestyle_factor_id: bitmap for bitmap in bitmaps}
+    factors = []
+    for lifestyle_factor in lifestyle_factors:
+        bitmap = by_factor.get(lifestyle_factor.id)
+        factors.append({
+            "lifestyle_factor_id": lifestyle_factor.id,
+            "lifestyle_factor_name": lifestyle_factor.name,
+            "recorded": encode(bitmap.recorded if bitmap else None, year, encoding),
+            "completed": encode(bitmap.completed if bitmap else None, year, encoding),
+        })
+    return {
+        "year": year,
+        "start_date": date(year, 1, 1).isoformat(),
+        "days": days_in_year(year),
+        "encoding": encoding,
+        "lifestyle_factors": factors,
+    }
@@ -0,0 +1,280 @@
+"""
+Vectorized Pearson correlation engine for lifestyle factors vs. wellbeing metrics.
+
+Instead of merging one DataFrame per factor/metric pair and calling
+scipy.stats.pearsonr in a loop, the data is pivoted once into two dense
+matrices sharing the same date axis (built from the columnar arrays of
+app.columnar):
+
+    completion  (days x factors)  1.0 completed, 0.0 not completed / no entry
+    metrics     (days x metrics)  daily mean value, NaN when not recorded
+
+and every coefficient and p-value is computed with a handful of matrix
+products. Missing metric values are handled with a mask so each metric only
+uses the days on which it was actually recorded, exactly like the previous
+per-pair left merge did.
+"""
+from typing import Sequence, Tuple
+import numpy as np
+from scipy import special
+
+
+def build_completion_matrix(
+    entry_factor_ids: np.ndarray,
+    entry_days: np.ndarray,
+    entry_completed: np.ndarray,
+    factor_ids: Sequence[int],
+    days: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scatter entry columns (factor id, day ordinal, completed) into a days x factors matrix.
+
+    Args:
+        days: sorted day ordinals of the matrix rows
+
+    Returns the completion matrix aligned with `days` and a boolean array
+    telling which factors have at least one entry (on any date, even one
+    without wellbeing data).
+    """
+    factor_ids = np.asarray(factor_ids, dtype=np.int64)
+    factor_order = np.argsort(factor_ids)
+    sorted_factor_ids = factor_ids[factor_order]
+
+    completion = np.zeros((len(days), len(factor_ids)), dtype=np.float64)
+    has_entries = np.zeros(len(factor_ids), dtype=bool)
+    if not len(factor_ids) or not len(entry_days):
+        return completion, has_entries
+
+    # Column of each entry, dropping entries of factors that were not asked for
+    col = np.minimum(np.searchsorted(sorted_factor_ids, entry_factor_ids), len(factor_ids) - 1)
+    known_factor = sorted_factor_ids[col] == entry_factor_ids
+    col = factor_order[col]
+    has_entries[col[known_factor]] = True
+
+    if len(days):
+        row = np.minimum(np.searchsorted(days, entry_days), len(days) - 1)
+        keep = known_factor & (days[row] == entry_days) & entry_completed
+        completion[row[keep], col[keep]] = 1.0
+
+    return completion, has_entries
+
+
+def pearson_matrix(
+    completion: np.ndarray,
+    metrics: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute Pearson r and two-sided p-values for every metric x factor pair.
+
+    Args:
+        completion: days x factors matrix without NaNs
+        metrics: days x metrics matrix, NaN where the metric is missing
+
+    Returns:
+        (r, p, n, valid) where r and p are metrics x factors matrices, n is the
+        number of samples per metric and valid marks pairs where both
+        variables vary (the correlation is defined).
+    """
+    mask = ~np.isnan(metrics)                      # days x metrics
+    mask_f = mask.astype(np.float64)
+    n = mask.sum(axis=0).astype(np.float64)        # metrics
+
+    y = np.where(mask, metrics, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        y_mean = y.sum(axis=0) / n
+    y_centered = np.where(mask, metrics - y_mean, 0.0)
+    syy = (y_centered ** 2).sum(axis=0)            # metrics
+
+    # Per-metric sums of the factor columns restricted to that metric's days
+    sx = mask_f.T @ completion                     # metrics x factors
+    sxx = mask_f.T @ (completion ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sxx_centered = sxx - sx ** 2 / n[:, None]
+    # y_centered sums to zero over the mask, so sum(x * y_c) == sum((x - x̄)(y - ȳ))
+    sxy = y_centered.T @ completion
+
+    # Guard against tiny negative variances from floating point cancellation
+    sxx_centered = np.maximum(sxx_centered, 0.0)
+    tolerance = 1e-12
+    valid = (
+        (n[:, None] >= 2)
+        & (sxx_centered > tolerance)
+        & (syy[:, None] > tolerance)
+    )
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = sxy / np.sqrt(sxx_centered * syy[:, None])
+    r = np.where(valid, np.clip(r, -1.0, 1.0), np.nan)
+
+    # Same distribution scipy.stats.pearsonr uses: t-test with n - 2 degrees of
+    # freedom, written through the regularized incomplete beta function.
+    df = np.broadcast_to((n - 2.0)[:, None], r.shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = special.betainc(df / 2.0, 0.5, np.clip(1.0 - r ** 2, 0.0, 1.0))
+    p = np.where(df > 0, p, 1.0)
+    p = np.where(valid, p, np.nan)
+
+    return r, p, n.astype(np.int64), valid
+
+
+def align_completion(
+    metric_days: np.ndarray,
+    entry_days: np.ndarray,
+    entry_completed: np.ndarray,
+    lag: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Look up each metric day's completion `lag` days earlier.
+
+    Args:
+        metric_days: day ordinals of the metric values
+        entry_days: day ordinals of the lifestyle factor entries (unique)
+        entry_completed: completion flag of each entry
+        lag: how many days before the metric day the entry was made
+
+    Returns:
+        (completed, found): completion as 1.0 / 0.0 for every metric day (0.0
+        when there is no entry) and a mask of the days that have an entry.
+    """
+    order = np.argsort(entry_days)
+    sorted_days = entry_days[order]
+    sorted_completed = entry_completed[order]
+
+    wanted = metric_days - lag
+    position = np.searchsorted(sorted_days, wanted)
+    position = np.minimum(position, max(len(sorted_days) - 1, 0))
+    if len(sorted_days):
+        found = sorted_days[position] == wanted
+        completed = np.where(found, sorted_completed[position], False)
+    else:
+        found = np.zeros(len(metric_days), dtype=bool)
+        completed = found
+    return completed.astype(np.float64), found
+
+
+def lag_spectrum(
+    metric_days: np.ndarray,
+    metric_values: np.ndarray,
+    entry_factor_ids: np.ndarray,
+    entry_days: np.ndarray,
+    entry_completed: np.ndarray,
+    factor_ids: Sequence[int],
+    lags: Sequence[int],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Correlate one metric with every lifestyle factor at each lag.
+
+    At lag L the metric on day t is paired with the factor's completion on
+    day t - L, so positive lags ask whether a factor affects the metric later
+    and negative lags serve as a control. Both series are laid out once on a
+    contiguous daily axis that covers every shift, and each lag is a slice of
+    that axis (a view, no copy or merge). Every metric day is a sample; days
+    without an entry count as not completed.
+
+    Takes plain arrays so it can run in the analytics process pool.
+
+    Returns:
+        (r, p, n, valid) where r, p and valid are lags x factors matrices and n
+        is the number of samples per lag. valid also requires the factor to
+        have at least one entry.
+    """
+    lags = list(lags)
+    factor_count = len(factor_ids)
+    if not len(metric_days) or not lags:
+        empty = np.full((len(lags), factor_count), np.nan)
+        return empty, empty.copy(), np.zeros(len(lags), dtype=np.int64), np.zeros(empty.shape, dtype=bool)
+
+    # Axis from the earliest shifted completion day to the latest one
+    before = max(max(lags), 0)
+    after = max(-min(lags), 0)
+    first_metric_day = int(metric_days.min())
+    span = int(metric_days.max()) - first_metric_day + 1
+    axis = daily_axis(first_metric_day - before, first_metric_day + span - 1 + after)
+
+    completion, has_entries = build_completion_matrix(
+        entry_factor_ids, entry_days, entry_completed, factor_ids, axis
+    )
+    metric = np.full(len(axis), np.nan)
+    metric[metric_days - axis[0]] = metric_values
+    metric_window = metric[before:before + span, None]
+
+    r = np.empty((len(lags), factor_count))
+    p = np.empty((len(lags), factor_count))
+    n = np.empty(len(lags), dtype=np.int64)
+    valid = np.empty((len(lags), factor_count), dtype=bool)
+    for k, lag in enumerate(lags):
+        start = before - lag
+        lag_r, lag_p, lag_n, lag_valid = pearson_matrix(completion[start:start + span], metric_window)
+        r[k], p[k], n[k], valid[k] = lag_r[0], lag_p[0], lag_n[0], lag_valid[0] & has_entries
+
+    return r, p, n, valid
+
+
+def daily_axis(first_day: int, last_day: int) -> np.ndarray:
+    """Every day ordinal from first_day to last_day inclusive."""
+    return np.arange(first_day, last_day + 1, dtype=np.int64)
+
+
+def rolling_pearson(
+    completion: np.ndarray,
+    metrics: np.ndarray,
+    window: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pearson r of every metric x factor pair over a window sliding one day at a time.
+
+    Running sums of x, y, x², y² and xy are taken once with cumulative sums,
+    so each window costs O(1) per pair (a difference of two prefix sums)
+    instead of a pearsonr call. The factor sums are computed one metric at a
+    time, so besides the result only days x factors arrays are held.
+
+    Args:
+        completion: days x factors matrix on a contiguous daily axis, no NaNs
+        metrics: days x metrics matrix on the same axis, NaN where not recorded
+        window: window length in days
+
+    Returns:
+        (r, n): r is a windows x metrics x factors array, NaN where the
+        correlation is undefined, and n is the windows x metrics sample count.
+        Window k covers days k .. k + window - 1 of the axis.
+    """
+    days = len(completion)
+    if days < window:
+        return (
+            np.empty((0, metrics.shape[1], completion.shape[1])),
+            np.empty((0, metrics.shape[1]), dtype=np.int64),
+        )
+
+    mask = ~np.isnan(metrics)                              # days x metrics
+    y = np.where(mask, metrics, 0.0)
+
+    def window_sums(values: np.ndarray) -> np.ndarray:
+        prefix = np.cumsum(values, axis=0)
+        sums = prefix[window - 1:].copy()
+        sums[1:] -= prefix[:-window]
+        return sums
+
+    n = window_sums(mask.astype(np.float64))               # windows x metrics
+    sy = window_sums(y)
+    syy = window_sums(y ** 2)
+    r = np.full((days - window + 1, metrics.shape[1], completion.shape[1]), np.nan)
+    tolerance = 1e-9
+
+    for i in range(metrics.shape[1]):
+        # Only days on which the metric was recorded count, so x is masked per metric
+        x = completion * mask[:, i, None]                  # days x factors
+        sx = window_sums(x)
+        sxx = window_sums(x ** 2)
+        sxy = window_sums(x * y[:, i, None])
+        del x
+
+        n_i = n[:, i, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var_x = sxx - sx ** 2 / n_i
+            var_y = syy[:, i, None] - sy[:, i, None] ** 2 / n_i
+            cov = sxy - sx * (sy[:, i, None] / n_i)
+            valid = (n_i >= 2) & (var_x > tolerance) & (var_y > tolerance)
+            r_i = cov / np.sqrt(np.maximum(var_x, 0.0) * np.maximum(var_y, 0.0))
+        r[:, i, :] = np.where(valid, np.clip(r_i, -1.0, 1.0), np.nan)
+
+    return r, np.rint(n).astype(np.int64)
@@ -1,18 +1,120 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # SQLite database
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./wellness_log.db")
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+# SQLite performance profile, applied to every new connection. WAL lets the
+# analytics reads run while a check-in is being written, and NORMAL
+# synchronous only syncs at checkpoints (safe with WAL; a power cut can at
+# worst lose the last commits, never corrupt the database).
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    # Negative values are KiB: 16 MiB of page cache per connection
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-16384")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+    # Wait for a concurrent writer instead of failing with "database is locked"
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+}
+
+# Sync endpoints run in uvicorn's threadpool (40 threads by default), so allow
+# as many connections as there are threads instead of queueing on the pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+
+# Async drivers used by the async engine for each database backend; other
+# backends need ASYNC_DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite"}
+
+
+def _async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(
+            f"No default async driver for {backend} databases: set ASYNC_DATABASE_URL to the "
+            f"database URL with an installed async driver (for example postgresql+asyncpg://...)"
+        )
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _is_memory_database(url: URL) -> bool:
+    """Whether `url` is an in-memory SQLite database, which SQLAlchemy serves from a single connection."""
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def _pool_options(url: str, queue_pool=None) -> dict:
+    """Pool arguments for an engine: a sized queue pool, except for in-memory SQLite."""
+    if _is_memory_database(make_url(url)):
+        return {}
+    options = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+    if queue_pool is not None:
+        options["poolclass"] = queue_pool
+    return options
+
 
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(SQLALCHEMY_DATABASE_URL)
+
+# The sync engine serves analytics, imports, startup and the CLI scripts; the
+# CRUD and export routers use the async engine so they never hold a thread.
+# An in-memory database isn't shared between the two engines.
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **_pool_options(SQLALCHEMY_DATABASE_URL),
+)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    # aiosqlite would default to opening a new connection per session
+    **_pool_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool),
 )
 
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not IS_SQLITE:
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def log_database_settings():
+    """Log the pool size and the SQLite settings actually in effect."""
+    logger.info("Database pool: size=%d, max_overflow=%d", DB_POOL_SIZE, DB_MAX_OVERFLOW)
+    if not IS_SQLITE:
+        return
+    with engine.connect() as connection:
+        effective = {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in SQLITE_PRAGMAS
+        }
+    # These two are reported as numbers
+    effective["synchronous"] = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}.get(effective["synchronous"])
+    effective["temp_store"] = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}.get(effective["temp_store"])
+    logger.info("SQLite settings: %s", ", ".join(f"{name}={value}" for name, value in effective.items()))
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay loaded after commit: an expired attribute can't lazy-load in async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency to get database session
@@ -23,3 +125,25 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get an async database session (for async def handlers)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class QueryCounter:
+    """Count the statements a session executes (for logging and benchmarks)."""
+    
+    def __init__(self, db: Session):
+        self.count = 0
+        # Async sessions run their statements through a wrapped sync session
+        self._db = db.sync_session if isinstance(db, AsyncSession) else db
+        event.listen(self._db, "do_orm_execute", self._on_execute)
+    
+    def _on_execute(self, orm_execute_state):
+        self.count += 1
+    
+    def stop(self) -> int:
+        """Stop counting and return the number of statements executed."""
+        event.remove(self._db, "do_orm_execute", self._on_execute)
+        return self.count
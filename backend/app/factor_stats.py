@@ -0,0 +1,251 @@
+"""
+Incrementally maintained completion statistics per lifestyle factor.
+
+The dashboard shows totals and streaks for every factor card. Instead of
+loading and walking all entries of a factor on every request, the totals,
+the current and longest streak and the last completed date are stored in
+LifestyleFactorStatsRecord and updated by the entry write handlers in the same
+transaction as the entries.
+
+Check-ins almost always add a new latest entry to a factor, which can be
+applied from the record alone. Anything else (an entry before the latest
+one, or a change to the latest entry, which may join or split runs) rebuilds
+that factor's record from its entries.
+
+The current streak depends on the day it is read: it counts completed
+entries back from today, skipping entries dated after today, and stops at the
+first uncompleted entry or at an entry older than the number of days the
+factor has been tracked. The record holds the run ending at the latest entry
+and the date it started, which gives the same count unless the factor has
+entries after today or the run reaches past that limit; only those factors
+read their recent entries (see current_streaks).
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from app import schemas
+from app.models import LifestyleFactor, LifestyleFactorEntry, LifestyleFactorStatsRecord
+
+
+def _summarize(entries: Sequence[Tuple[date, bool]]) -> dict:
+    """Compute the record values from (date, completed) pairs in date order."""
+    completed_days = 0
+    run = 0
+    run_start = None
+    longest = 0
+    last_completed_date = None
+    for entry_date, completed in entries:
+        if completed:
+            completed_days += 1
+            if not run:
+                run_start = entry_date
+            run += 1
+            longest = max(longest, run)
+            last_completed_date = entry_date
+        else:
+            run = 0
+            run_start = None
+    return {
+        "total_days": len(entries),
+        "completed_days": completed_days,
+        "current_streak": run,
+        "current_streak_start": run_start,
+        "longest_streak": longest,
+        "last_entry_date": entries[-1][0] if entries else None,
+        "last_completed_date": last_completed_date,
+    }
+
+
+def rebuild_factor_stats(db: Session, lifestyle_factor_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the records of the given lifestyle factors (all when None) from their entries.
+
+    Returns the number of records written. The caller commits.
+    """
+    factors_query = select(LifestyleFactor.id)
+    entries_query = select(
+        LifestyleFactorEntry.lifestyle_factor_id, LifestyleFactorEntry.date, LifestyleFactorEntry.completed
+    ).order_by(LifestyleFactorEntry.lifestyle_factor_id, LifestyleFactorEntry.date)
+    delete_query = delete(LifestyleFactorStatsRecord)
+    if lifestyle_factor_ids is not None:
+        lifestyle_factor_ids = list(lifestyle_factor_ids)
+        factors_query = factors_query.where(LifestyleFactor.id.in_(lifestyle_factor_ids))
+        entries_query = entries_query.where(LifestyleFactorEntry.lifestyle_factor_id.in_(lifestyle_factor_ids))
+        delete_query = delete_query.where(LifestyleFactorStatsRecord.lifestyle_factor_id.in_(lifestyle_factor_ids))
+
+    entries_by_factor: Dict[int, List[Tuple[date, bool]]] = defaultdict(list)
+    for factor_id, entry_date, completed in db.execute(entries_query):
+        entries_by_factor[factor_id].append((entry_date, bool(completed)))
+
+    records = [
+        {"lifestyle_factor_id": factor_id, **_summarize(entries_by_factor[factor_id])}
+        for factor_id in db.scalars(factors_query)
+    ]
+    # The ORM delete also removes records already loaded into the session
+    db.execute(delete_query)
+    if records:
+        db.execute(insert(LifestyleFactorStatsRecord), records)
+    return len(records)
+
+
+def _apply_latest(record: LifestyleFactorStatsRecord, entry_date: date, completed: bool) -> bool:
+    """
+    Apply a write at or after the factor's latest entry to its record.
+
+    Returns False when the record can't be updated incrementally.
+    """
+    if record.last_entry_date is None or entry_date > record.last_entry_date:
+        # A new latest entry
+        record.total_days += 1
+        record.last_entry_date = entry_date
+        if completed:
+            record.completed_days += 1
+            if not record.current_streak:
+                record.current_streak_start = entry_date
+            record.current_streak += 1
+            record.longest_streak = max(record.longest_streak, record.current_streak)
+            record.last_completed_date = entry_date
+        else:
+            record.current_streak = 0
+            record.current_streak_start = None
+        return True
+
+    if entry_date == record.last_entry_date:
+        # The latest entry is completed exactly when the current streak is running. Completing
+        # it joins the run of the entries before it, which the record doesn't know, so only an
+        # unchanged entry applies here.
+        return completed == (record.current_streak > 0)
+
+    return False
+
+
+def apply_entries(db: Session, entries: Iterable[Tuple[int, date, bool]]) -> None:
+    """
+    Update the records after (lifestyle_factor_id, date, completed) entries were created or changed.
+
+    Call after the entries are added to the session and before committing.
+    """
+    # Rebuilds read the entries back, so they must be in the database
+    db.flush()
+    by_factor: Dict[int, List[Tuple[date, bool]]] = defaultdict(list)
+    for lifestyle_factor_id, entry_date, completed in entries:
+        by_factor[lifestyle_factor_id].append((entry_date, bool(completed)))
+    if not by_factor:
+        return
+
+    records = {
+        record.lifestyle_factor_id: record
+        for record in db.scalars(select(LifestyleFactorStatsRecord).where(
+            LifestyleFactorStatsRecord.lifestyle_factor_id.in_(list(by_factor))
+        ))
+    }
+
+    rebuild = []
+    for lifestyle_factor_id, changes in by_factor.items():
+        record = records.get(lifestyle_factor_id)
+        if record is None or not all(_apply_latest(record, *change) for change in sorted(changes)):
+            rebuild.append(lifestyle_factor_id)
+
+    # Records touched before falling back to a rebuild are rewritten by it
+    db.flush()
+    if rebuild:
+        rebuild_factor_stats(db, rebuild)
+
+
+def ensure_factor_stats(db: Session) -> None:
+    """Build the records for databases created before they existed or before they stored the streak start."""
+    if db.query(LifestyleFactor.id).first() is None:
+        return
+    missing = db.query(LifestyleFactorStatsRecord.id).first() is None
+    outdated = db.query(LifestyleFactorStatsRecord.id).filter(
+        LifestyleFactorStatsRecord.current_streak > 0,
+        LifestyleFactorStatsRecord.current_streak_start.is_(None)
+    ).first() is not None
+    if not missing and not outdated:
+        return
+    rebuild_factor_stats(db)
+    db.commit()
+
+
+def current_streaks(
+    db: Session,
+    records: Iterable[Optional[LifestyleFactorStatsRecord]],
+    today: Optional[date] = None,
+) -> Dict[int, int]:
+    """
+    Compute the current streak of each record's lifestyle factor as of today.
+
+    Returns lifestyle_factor_id -> streak. Works with an async session through run_sync.
+    """
+    today = today or date.today()
+    streaks = {}
+    limits = {}
+    for record in records:
+        if record is None:
+            continue
+        if not record.total_days:
+            streaks[record.lifestyle_factor_id] = 0
+        elif record.last_entry_date <= today and (
+            not record.current_streak
+            or (record.current_streak_start is not None
+                and (today - record.current_streak_start).days <= record.total_days)
+        ):
+            streaks[record.lifestyle_factor_id] = record.current_streak
+        else:
+            limits[record.lifestyle_factor_id] = record.total_days
+    if not limits:
+        return streaks
+
+    # Walk back from today through the entries within each factor's limit
+    entries = db.execute(
+        select(LifestyleFactorEntry.lifestyle_factor_id, LifestyleFactorEntry.date, LifestyleFactorEntry.completed)
+        .where(
+            LifestyleFactorEntry.lifestyle_factor_id.in_(list(limits)),
+            LifestyleFactorEntry.date <= today,
+            LifestyleFactorEntry.date >= today - timedelta(days=max(limits.values()))
+        )
+        .order_by(LifestyleFactorEntry.lifestyle_factor_id, LifestyleFactorEntry.date.desc())
+    )
+    stopped = set()
+    streaks.update({lifestyle_factor_id: 0 for lifestyle_factor_id in limits})
+    for lifestyle_factor_id, entry_date, completed in entries:
+        if lifestyle_factor_id in stopped:
+            continue
+        if completed and (today - entry_date).days <= limits[lifestyle_factor_id]:
+            streaks[lifestyle_factor_id] += 1
+        else:
+            stopped.add(lifestyle_factor_id)
+    return streaks
+
+
+def to_schema(
+    lifestyle_factor: LifestyleFactor,
+    record: Optional[LifestyleFactorStatsRecord],
+    current_streak: int = 0,
+) -> schemas.LifestyleFactorStats:
+    """
+    Build the stats response of a lifestyle factor from its record and its current streak.
+    """
+    if record is None or not record.total_days:
+        return schemas.LifestyleFactorStats(
+            lifestyle_factor_id=lifestyle_factor.id,
+            lifestyle_factor_name=lifestyle_factor.name,
+            total_days=0,
+            completed_days=0,
+            completion_rate=0.0,
+            current_streak=0,
+            longest_streak=0
+        )
+
+    return schemas.LifestyleFactorStats(
+        lifestyle_factor_id=lifestyle_factor.id,
+        lifestyle_factor_name=lifestyle_factor.name,
+        total_days=record.total_days,
+        completed_days=record.completed_days,
+        completion_rate=round(record.completed_days / record.total_days * 100, 2),
+        current_streak=current_streak,
+        longest_streak=record.longest_streak,
+        last_completed_date=record.last_completed_date
+    )
@@ -0,0 +1,455 @@
+"""
+Bulk import of the CSV files produced by routers/export.py and of legacy
+Habits.csv / Checkmarks.csv exports.
+
+Rows are parsed from the file as a stream, validated with the same Pydantic
+schemas the API uses, and written in batched transactions: every batch looks
+up the rows it may collide with in one query, then issues one executemany
+INSERT and one executemany UPDATE before committing. Batches that change
+rows update the derived tables (lifestyle factor stats and completion index,
+wellbeing daily rollup) for those rows and bump the table's data version in
+the same transaction, so readers never see raw rows and derived data out of
+step, and cached analytics are invalidated even when the import runs from
+the CLI. Re-importing the same file is idempotent (unchanged rows are counted
+as skipped).
+
+Natural keys used to match existing rows:
+    lifestyle factors          name
+    lifestyle factor entries   (lifestyle factor, date)
+    wellbeing metric entries   (date, time)
+    CBT thoughts               (date, time)
+"""
+from datetime import date, datetime, time
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Set
+import csv
+import io
+import zipfile
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.cache import bump_data_version
+from app.wellbeing_rollup import rebuild_daily_aggregates
+from app.factor_stats import apply_entries
+from app.completion_index import set_entries
+
+# Rows written per transaction
+IMPORT_BATCH_SIZE = 500
+
+# Checkmarks.csv value counted as a completed habit (see docs/IMPORT_EXPORT.md)
+LEGACY_COMPLETED_VALUE = "YES_MANUAL"
+
+
+def read_csv(file: IO) -> Iterator[Dict[str, str]]:
+    """Stream rows of a CSV file (binary or text) as dicts keyed by header."""
+    if isinstance(file, io.TextIOBase):
+        text = file
+    else:
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(text):
+        yield {(key or "").strip(): (value or "").strip() for key, value in row.items()}
+
+
+def _batches(rows: Iterable, size: int = IMPORT_BATCH_SIZE) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _text(value: Optional[str]) -> Optional[str]:
+    return value if value else None
+
+
+def _parse_bool(value: Optional[str], default: bool = False) -> bool:
+    if not value:
+        return default
+    return value.strip().lower() in ("true", "1", "yes", "y")
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _result(table: str) -> schemas.ImportResult:
+    return schemas.ImportResult(table=table, inserted=0, updated=0, skipped=0)
+
+
+def _write_batch(
+    db: Session,
+    model,
+    inserts: List[dict],
+    updates: List[dict],
+    update_derived: Optional[Callable[[], None]] = None,
+) -> None:
+    """
+    Write one batch with an executemany INSERT and UPDATE, then commit.
+
+    When the batch changes rows, `update_derived` brings the tables derived
+    from them up to date and the data version is bumped before committing.
+    """
+    if inserts:
+        db.execute(insert(model), inserts)
+    if updates:
+        columns = [key for key in updates[0] if key != "_id"]
+        db.execute(
+            update(model.__table__)
+            .where(model.__table__.c.id == bindparam("_id"))
+            .values({column: bindparam(column) for column in columns}),
+            updates
+        )
+    if inserts or updates:
+        if update_derived:
+            update_derived()
+        bump_data_version(db, model.__tablename__)
+    db.commit()
+
+
+def import_lifestyle_factors(db: Session, rows: Iterable[Dict[str, str]]) -> schemas.ImportResult:
+    """Import lifestyle_factors.csv, matching existing factors by name."""
+    result = _result(models.LifestyleFactor.__tablename__)
+    fields = ["description", "color", "icon", "category", "is_active"]
+    existing = {
+        factor.name: factor
+        for factor in db.query(
+            models.LifestyleFactor.id, models.LifestyleFactor.name,
+            *[getattr(models.LifestyleFactor, field) for field in fields]
+        )
+    }
+
+    for batch in _batches(rows):
+        inserts, updates = [], []
+        inserted_names = set()
+        for row in batch:
+            try:
+                factor = schemas.LifestyleFactorCreate(
+                    name=row.get("name", ""),
+                    description=_text(row.get("description")),
+                    color=row.get("color") or "#3B82F6",
+                    icon=_text(row.get("icon")),
+                    category=row.get("category") or "General",
+                )
+                values = {**factor.model_dump(), "is_active": _parse_bool(row.get("is_active"), default=True)}
+                created_at = _parse_datetime(row.get("created_at"))
+            except (ValidationError, ValueError):
+                result.skipped += 1
+                continue
+            if not factor.name:
+                result.skipped += 1
+                continue
+            # Only overwrite the columns the file actually has
+            file_fields = [field for field in fields if field in row]
+
+            current = existing.get(factor.name)
+            if factor.name in inserted_names:
+                # Duplicate name within the batch: the first row wins
+                result.skipped += 1
+            elif current is None:
+                inserts.append({**values, "created_at": created_at or datetime.utcnow()})
+                inserted_names.add(factor.name)
+                result.inserted += 1
+            elif any(getattr(current, field) != values[field] for field in file_fields):
+                updates.append({"_id": current.id, **{field: values[field] for field in file_fields}})
+                result.updated += 1
+            else:
+                result.skipped += 1
+
+        _write_batch(db, models.LifestyleFactor, inserts, updates)
+        # Later batches match against the factors inserted by this one
+        if inserted_names:
+            for factor in db.query(
+                models.LifestyleFactor.id, models.LifestyleFactor.name,
+                *[getattr(models.LifestyleFactor, field) for field in fields]
+            ).filter(models.LifestyleFactor.name.in_(inserted_names)):
+                existing[factor.name] = factor
+
+    return result
+
+
+def _upsert_lifestyle_factor_entries(
+    db: Session,
+    entries: Iterable[dict],
+    result: schemas.ImportResult
+) -> schemas.ImportResult:
+    """Upsert validated {lifestyle_factor_id, date, completed, notes} dicts in batches."""
+    entry_model = models.LifestyleFactorEntry
+    for batch in _batches(entries):
+        # The last row for a (factor, date) wins, as with repeated API calls
+        by_key = {(entry["lifestyle_factor_id"], entry["date"]): entry for entry in batch}
+        result.skipped += len(batch) - len(by_key)
+
+        existing = {
+            (row.lifestyle_factor_id, row.date): row
+            for row in db.query(
+                entry_model.id, entry_model.lifestyle_factor_id, entry_model.date,
+                entry_model.completed, entry_model.notes
+            ).filter(entry_model.date.in_({key[1] for key in by_key}))
+        }
+
+        inserts, updates, changes = [], [], []
+        for key, entry in by_key.items():
+            current = existing.get(key)
+            if current is None:
+                inserts.append({**entry, "created_at": entry.get("created_at") or datetime.utcnow()})
+                result.inserted += 1
+            elif current.completed != entry["completed"] or current.notes != entry["notes"]:
+                updates.append({"_id": current.id, "completed": entry["completed"], "notes": entry["notes"]})
+                result.updated += 1
+            else:
+                result.skipped += 1
+                continue
+            changes.append((key[0], key[1], entry["completed"]))
+
+        def update_derived():
+            apply_entries(db, changes)
+            set_entries(db, changes)
+
+        _write_batch(db, entry_model, inserts, updates, update_derived)
+        # Drop the stats and bitmaps loaded for this batch
+        db.expunge_all()
+
+    return result
+
+
+def import_lifestyle_factor_entries(db: Session, rows: Iterable[Dict[str, str]]) -> schemas.ImportResult:
+    """
+    Import lifestyle_factor_entries.csv.
+
+    The factor is resolved by `lifestyle_factor_name` (so exports from another
+    database line up) and falls back to `lifestyle_factor_id`.
+    """
+    result = _result(models.LifestyleFactorEntry.__tablename__)
+    factors = db.query(models.LifestyleFactor.id, models.LifestyleFactor.name).all()
+    ids_by_name = {factor.name: factor.id for factor in factors}
+    known_ids = {factor.id for factor in factors}
+
+    def entries() -> Iterator[dict]:
+        for row in rows:
+            lifestyle_factor_id = ids_by_name.get(row.get("lifestyle_factor_name", ""))
+            if lifestyle_factor_id is None and row.get("lifestyle_factor_id", "").isdigit():
+                lifestyle_factor_id = int(row["lifestyle_factor_id"])
+                if lifestyle_factor_id not in known_ids:
+                    lifestyle_factor_id = None
+            if lifestyle_factor_id is None:
+                result.skipped += 1
+                continue
+            try:
+                entry = schemas.LifestyleFactorEntryCreate(
+                    lifestyle_factor_id=lifestyle_factor_id,
+                    date=row.get("date", ""),
+                    completed=_parse_bool(row.get("completed")),
+                    notes=_text(row.get("notes")),
+                )
+                created_at = _parse_datetime(row.get("created_at"))
+            except (ValidationError, ValueError):
+                result.skipped += 1
+                continue
+            yield {**entry.model_dump(), "created_at": created_at}
+
+    return _upsert_lifestyle_factor_entries(db, entries(), result)
+
+
+def _import_timestamped(
+    db: Session,
+    model,
+    rows: Iterable[Dict[str, str]],
+    parse,
+    result: schemas.ImportResult,
+    update_derived: Optional[Callable[[Set[date]], None]] = None,
+) -> schemas.ImportResult:
+    """
+    Upsert rows keyed by (date, time); `parse` turns a CSV row into column values.
+
+    `update_derived` is called with the dates of the changed rows of each batch, in its transaction.
+    """
+    for batch in _batches(rows):
+        by_key = {}
+        for row in batch:
+            try:
+                values = parse(row)
+            except (ValidationError, ValueError):
+                result.skipped += 1
+                continue
+            key = (values["date"], values["time"])
+            if key in by_key:
+                result.skipped += 1
+            by_key[key] = values
+
+        existing = {
+            (current.date, current.time): current
+            for current in db.query(model).filter(model.date.in_({key[0] for key in by_key}))
+        }
+
+        inserts, updates, changed_dates = [], [], set()
+        for key, values in by_key.items():
+            current = existing.get(key)
+            if current is None:
+                inserts.append(values)
+                changed_dates.add(key[0])
+                result.inserted += 1
+                continue
+            changed = {
+                column: value for column, value in values.items()
+                if column not in ("date", "time", "created_at", "updated_at") and getattr(current, column) != value
+            }
+            if changed:
+                # executemany needs the same columns in every row
+                updates.append({
+                    "_id": current.id,
+                    **{column: value for column, value in values.items() if column not in ("date", "time", "created_at")}
+                })
+                changed_dates.add(key[0])
+                result.updated += 1
+            else:
+                result.skipped += 1
+
+        _write_batch(
+            db, model, inserts, updates,
+            (lambda: update_derived(changed_dates)) if update_derived else None
+        )
+        # Drop the ORM objects loaded for this batch
+        db.expunge_all()
+
+    return result
+
+
+def import_wellbeing_metric_entries(db: Session, rows: Iterable[Dict[str, str]]) -> schemas.ImportResult:
+    """
+    Import wellbeing_metric_entries.csv.
+
+    Any metric column present in the file is imported; missing ones stay empty
+    on new entries and unchanged on existing ones.
+    Every batch rebuilds the daily rollup of the days it changed.
+    """
+    def parse(row: Dict[str, str]) -> dict:
+        entry = schemas.WellbeingMetricEntryCreate(
+            date=row.get("date", ""),
+            **{metric_name: row[metric_name] or None for metric_name in models.WELLBEING_METRIC_COLUMNS if metric_name in row},
+            notes=_text(row.get("notes")),
+            tags=_text(row.get("tags")),
+        )
+        # Metrics missing from the file are left untouched on existing entries
+        values = entry.model_dump(exclude_unset=True)
+        values["time"] = _parse_datetime(row.get("time")) or datetime.combine(entry.date, time())
+        values["created_at"] = _parse_datetime(row.get("created_at")) or datetime.utcnow()
+        return values
+
+    return _import_timestamped(
+        db, models.WellbeingMetricEntry, rows, parse, _result(models.WellbeingMetricEntry.__tablename__),
+        lambda dates: rebuild_daily_aggregates(db, dates)
+    )
+
+
+def import_cbt_thoughts(db: Session, rows: Iterable[Dict[str, str]]) -> schemas.ImportResult:
+    """Import cbt_thoughts.csv."""
+    def parse(row: Dict[str, str]) -> dict:
+        thought = schemas.CBTThoughtCreate(
+            date=row.get("date", ""),
+            negative_thought=row.get("negative_thought", ""),
+            distortions=_text(row.get("distortions")),
+            alternative_thought=_text(row.get("alternative_thought")),
+            notes=_text(row.get("notes")),
+            intensity=row.get("intensity") or None,
+        )
+        values = thought.model_dump()
+        values["time"] = _parse_datetime(row.get("time")) or datetime.combine(thought.date, time())
+        values["created_at"] = _parse_datetime(row.get("created_at")) or datetime.utcnow()
+        # updated_at is left to the database: it marks the import as a change for delta sync
+        return values
+
+    return _import_timestamped(
+        db, models.CBTThought, rows, parse, _result(models.CBTThought.__tablename__)
+    )
+
+
+def import_backup(db: Session, file: IO) -> List[schemas.ImportResult]:
+    """Import a ZIP backup produced by /export/export/all."""
+    importers = [
+        ("lifestyle_factors.csv", import_lifestyle_factors),
+        ("lifestyle_factor_entries.csv", import_lifestyle_factor_entries),
+        ("wellbeing_metric_entries.csv", import_wellbeing_metric_entries),
+        ("cbt_thoughts.csv", import_cbt_thoughts),
+    ]
+    results = []
+    with zipfile.ZipFile(file) as archive:
+        names = set(archive.namelist())
+        for filename, import_table in importers:
+            if filename not in names:
+                continue
+            with archive.open(filename) as member:
+                results.append(import_table(db, read_csv(member)))
+    return results
+
+
+def import_legacy(
+    db: Session,
+    habits_rows: Iterable[Dict[str, str]],
+    checkmarks_rows: Iterable[Dict[str, str]],
+    include_archived: bool = False
+) -> List[schemas.ImportResult]:
+    """
+    Import a legacy Habits.csv / Checkmarks.csv pair.
+
+    Habits that already exist (by name) are kept as they are. Only
+    YES_MANUAL checkmarks are imported, as completed entries; checkmarks of
+    archived habits are skipped unless include_archived is set.
+    """
+    factors_result = _result(models.LifestyleFactor.__tablename__)
+    entries_result = _result(models.LifestyleFactorEntry.__tablename__)
+
+    existing_names = {name for (name,) in db.query(models.LifestyleFactor.name)}
+    archived = set()
+    inserts = []
+    for row in habits_rows:
+        name = row.get("Name", "")
+        if not name:
+            factors_result.skipped += 1
+            continue
+        if _parse_bool(row.get("Archived?")):
+            archived.add(name)
+        if name in existing_names:
+            factors_result.skipped += 1
+            continue
+        color = row.get("Color", "")
+        inserts.append({
+            "name": name,
+            "description": _text(row.get("Question")) or _text(row.get("Description")),
+            "color": color if color.startswith("#") else "#3B82F6",
+            "icon": None,
+            "category": "General",
+            "is_active": name not in archived,
+            "created_at": datetime.utcnow(),
+        })
+        existing_names.add(name)
+        factors_result.inserted += 1
+    _write_batch(db, models.LifestyleFactor, inserts, [])
+
+    ids_by_name = {factor.name: factor.id for factor in db.query(models.LifestyleFactor.id, models.LifestyleFactor.name)}
+
+    def entries() -> Iterator[dict]:
+        for row in checkmarks_rows:
+            try:
+                entry_date = date.fromisoformat(row.get("Date", ""))
+            except ValueError:
+                continue
+            for name, value in row.items():
+                if name == "Date" or value != LEGACY_COMPLETED_VALUE:
+                    continue
+                lifestyle_factor_id = ids_by_name.get(name)
+                if lifestyle_factor_id is None or (name in archived and not include_archived):
+                    entries_result.skipped += 1
+                    continue
+                yield {
+                    "lifestyle_factor_id": lifestyle_factor_id,
+                    "date": entry_date,
+                    "completed": True,
+                    "notes": None,
+                    "created_at": None,
+                }
+
+    _upsert_lifestyle_factor_entries(db, entries(), entries_result)
+    return [factors_result, entries_result]
@@ -1,11 +1,32 @@
+import logging
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from app.database import engine, Base
-from app.routers import lifestyle_factors, wellbeing, analytics, export, auth, cbt
+from app.database import engine, SessionLocal, log_database_settings
+from app.routers import lifestyle_factors, wellbeing, analytics, export, imports, auth, cbt, dashboard, sync
+from app.migrations import prepare_database
+from app.analytics_pool import shutdown_analytics_pool
+from app.pagination import NEXT_CURSOR_HEADER
+from app.serialization import FastJSONResponse
+from app.sync import prune_deleted_records
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Log application messages (export statistics, startup settings) next to uvicorn's
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(levelname)s:     %(name)s - %(message)s"
+)
+
+# Create database tables, bring existing ones up to date and build the
+# wellbeing daily rollup, lifestyle factor stats and completion index for
+# databases created before they existed
+prepare_database(engine)
+log_database_settings()
+
+# Drop expired sync tombstones
+with SessionLocal() as db:
+    prune_deleted_records(db)
 
 app = FastAPI(
     title="Wellness Log API",
@@ -14,9 +35,16 @@ app = FastAPI(
     # Trust proxy headers for correct URL generation in redirects
     root_path="",
     proxy_headers=True,
-    forwarded_allow_ips="*"
+    forwarded_allow_ips="*",
+    # Encode every JSON response with orjson
+    default_response_class=FastJSONResponse
 )
 
+# Compress responses larger than GZIP_MINIMUM_SIZE bytes for clients that accept gzip
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Auth router (public, no authentication required)
@@ -34,7 +63,14 @@ app.include_router(lifestyle_factors.router, prefix="/api/lifestyle-factors", ta
 app.include_router(wellbeing.router, prefix="/api/wellbeing", tags=["wellbeing"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 app.include_router(export.router, prefix="/api/export", tags=["export"])
+app.include_router(imports.router, prefix="/api/import", tags=["import"])
 app.include_router(cbt.router, prefix="/api/cbt", tags=["cbt"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+app.include_router(sync.router, prefix="/api/sync", tags=["sync"])
+
+@app.on_event("shutdown")
+def stop_analytics_workers():
+    shutdown_analytics_pool()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,170 @@
+"""
+Idempotent schema migrations for existing databases.
+
+`Base.metadata.create_all()` creates missing tables, but it never changes a
+table that already exists, so columns and indexes added to the models later
+are missing from databases created by older versions. Each step here checks the live
+schema first and is safe to run on every startup.
+"""
+from collections import defaultdict
+from datetime import datetime
+import logging
+from sqlalchemy import Index, and_, delete, func, insert, inspect, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app import models
+from app.completion_index import ensure_completion_index
+from app.database import Base
+from app.factor_stats import ensure_factor_stats
+from app.wellbeing_rollup import ensure_daily_aggregates
+
+logger = logging.getLogger(__name__)
+
+
+def _model_index(model, index_name: str) -> Index:
+    return next(index for index in model.__table__.indexes if index.name == index_name)
+
+
+def _index_exists(engine: Engine, table_name: str, index_name: str) -> bool:
+    return any(index["name"] == index_name for index in inspect(engine).get_indexes(table_name))
+
+
+def _column_exists(engine: Engine, table_name: str, column_name: str) -> bool:
+    return any(column["name"] == column_name for column in inspect(engine).get_columns(table_name))
+
+
+def add_missing_columns(engine: Engine) -> None:
+    """
+    Add the columns declared on the models that the database is missing.
+
+    Existing rows get their creation time as their last change. The
+    lifestyle factor stats are rebuilt at startup when they lack the streak
+    start (see app.factor_stats.ensure_factor_stats).
+    """
+    # (model, column, column to copy into existing rows or None)
+    steps = [
+        (models.LifestyleFactor, "updated_at", "created_at"),
+        (models.LifestyleFactorEntry, "updated_at", "created_at"),
+        (models.WellbeingMetricEntry, "updated_at", "created_at"),
+        (models.LifestyleFactorStatsRecord, "current_streak_start", None),
+    ]
+
+    for model, column_name, backfill in steps:
+        if _column_exists(engine, model.__tablename__, column_name):
+            continue
+
+        table = model.__table__
+        column = table.c[column_name]
+        column_type = column.type.compile(dialect=engine.dialect)
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            if backfill:
+                connection.execute(update(table).values({column.name: table.c[backfill]}))
+        logger.info("Added column %s.%s", table.name, column.name)
+
+
+def _remove_duplicate_lifestyle_factor_entries(connection: Connection) -> int:
+    """
+    Keep one entry of each (factor, date) and leave sync tombstones for the others.
+
+    The kept entry is a completed one if any, then the most recently updated,
+    then the most recently created.
+    """
+    table = models.LifestyleFactorEntry.__table__
+    duplicated = (
+        select(table.c.lifestyle_factor_id, table.c.date)
+        .group_by(table.c.lifestyle_factor_id, table.c.date)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    rows = connection.execute(
+        select(table.c.id, table.c.lifestyle_factor_id, table.c.date, table.c.completed, table.c.updated_at)
+        .join(duplicated, and_(
+            table.c.lifestyle_factor_id == duplicated.c.lifestyle_factor_id,
+            table.c.date == duplicated.c.date
+        ))
+    ).all()
+
+    groups = defaultdict(list)
+    for row in rows:
+        groups[(row.lifestyle_factor_id, row.date)].append(row)
+    removed_ids = []
+    for group in groups.values():
+        group.sort(key=lambda row: (bool(row.completed), row.updated_at or datetime.min, row.id))
+        removed_ids += [row.id for row in group[:-1]]
+    if not removed_ids:
+        return 0
+
+    # Chunked to stay below the bound parameter limit
+    for start in range(0, len(removed_ids), 500):
+        connection.execute(delete(table).where(table.c.id.in_(removed_ids[start:start + 500])))
+    connection.execute(insert(models.DeletedRecord.__table__), [
+        {"table_name": table.name, "record_id": record_id, "deleted_at": datetime.utcnow()}
+        for record_id in removed_ids
+    ])
+    logger.warning(
+        "Removed %d duplicate lifestyle factor entries (ids %s)",
+        len(removed_ids), ", ".join(str(record_id) for record_id in sorted(removed_ids))
+    )
+    return len(removed_ids)
+
+
+def create_missing_indexes(engine: Engine) -> None:
+    """
+    Create the indexes declared on the models that the database is missing.
+
+    Older databases may hold duplicate lifestyle factor entries for a day,
+    which would make the unique (factor, date) index fail, so those are
+    removed first (the removed ids are logged).
+    """
+    steps = [
+        (models.LifestyleFactorEntry, "uq_lifestyle_factor_entries_factor_date", _remove_duplicate_lifestyle_factor_entries),
+        (models.LifestyleFactorEntry, "ix_lifestyle_factor_entries_date", None),
+        (models.WellbeingMetricEntry, "ix_wellbeing_metric_entries_date_time", None),
+        (models.LifestyleFactor, "ix_lifestyle_factors_updated_at", None),
+        (models.LifestyleFactorEntry, "ix_lifestyle_factor_entries_updated_at", None),
+        (models.WellbeingMetricEntry, "ix_wellbeing_metric_entries_updated_at", None),
+        (models.CBTThought, "ix_cbt_thoughts_updated_at", None),
+    ]
+
+    for model, index_name, prepare in steps:
+        index = _model_index(model, index_name)
+        if _index_exists(engine, model.__tablename__, index_name):
+            continue
+
+        with engine.begin() as connection:
+            removed = prepare(connection) if prepare else 0
+            index.create(connection)
+
+        if removed:
+            logger.info("Created index %s (removed %d duplicate rows)", index_name, removed)
+        else:
+            logger.info("Created index %s", index_name)
+
+
+MIGRATIONS = [
+    add_missing_columns,
+    create_missing_indexes,
+]
+
+
+def run_migrations(engine: Engine) -> None:
+    """Apply every migration step that the database is missing."""
+    for migration in MIGRATIONS:
+        migration(engine)
+
+
+def prepare_database(engine: Engine) -> None:
+    """
+    Bring a database up to date: create missing tables, run the migrations and
+    build the wellbeing daily rollup, lifestyle factor stats and completion
+    index for databases created before they existed.
+
+    Run by the app at startup and by the CLI scripts before they touch the data.
+    """
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with Session(engine) as db:
+        ensure_daily_aggregates(db)
+        ensure_factor_stats(db)
+        ensure_completion_index(db)
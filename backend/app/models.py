@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Text, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -22,6 +22,7 @@ class LifestyleFactor(Base):
     icon = Column(String, nullable=True)  # Emoji or icon name
     category = Column(String, default="General")  # Category for grouping
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     is_active = Column(Boolean, default=True)
     
     # Relationships
@@ -36,9 +37,17 @@ class LifestyleFactorEntry(Base):
     completed = Column(Boolean, default=False)
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     lifestyle_factor = relationship("LifestyleFactor", back_populates="entries")
+    
+    __table_args__ = (
+        # One entry per lifestyle factor and day (the target of the entry upserts)
+        Index("uq_lifestyle_factor_entries_factor_date", "lifestyle_factor_id", "date", unique=True),
+        # Date-only filters (entries of a day, ranges across all factors)
+        Index("ix_lifestyle_factor_entries_date", "date"),
+    )
 
 class WellbeingMetricEntry(Base):
     __tablename__ = "wellbeing_metric_entries"
@@ -66,6 +75,103 @@ class WellbeingMetricEntry(Base):
     notes = Column(Text, nullable=True)
     tags = Column(String, nullable=True)  # Comma-separated tags
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        # Date range filters and the per-day listing ordered by time
+        Index("ix_wellbeing_metric_entries_date_time", "date", "time"),
+    )
+
+# Metric columns of WellbeingMetricEntry, in display order
+WELLBEING_METRIC_COLUMNS = (
+    "mood_score",
+    "energy_level",
+    "stress_level",
+    "anxiety_level",
+    "rumination_level",
+    "anger_level",
+    "general_health",
+    "sleep_quality",
+    "sweating_level",
+    "libido_level",
+)
+
+class WellbeingDailyAggregate(Base):
+    """
+    Materialized per-day rollup of WellbeingMetricEntry.
+    
+    Holds the sum and count of recorded (non-null) values for every metric so
+    daily averages can be read without scanning the raw entries. Kept up to
+    date by the wellbeing write handlers (see app/wellbeing_rollup.py).
+    """
+    __tablename__ = "wellbeing_daily_aggregates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date, nullable=False, unique=True, index=True)
+    entry_count = Column(Integer, default=0, nullable=False)
+    
+    mood_score_sum = Column(Float, default=0.0, nullable=False)
+    mood_score_count = Column(Integer, default=0, nullable=False)
+    energy_level_sum = Column(Float, default=0.0, nullable=False)
+    energy_level_count = Column(Integer, default=0, nullable=False)
+    stress_level_sum = Column(Float, default=0.0, nullable=False)
+    stress_level_count = Column(Integer, default=0, nullable=False)
+    anxiety_level_sum = Column(Float, default=0.0, nullable=False)
+    anxiety_level_count = Column(Integer, default=0, nullable=False)
+    rumination_level_sum = Column(Float, default=0.0, nullable=False)
+    rumination_level_count = Column(Integer, default=0, nullable=False)
+    anger_level_sum = Column(Float, default=0.0, nullable=False)
+    anger_level_count = Column(Integer, default=0, nullable=False)
+    general_health_sum = Column(Float, default=0.0, nullable=False)
+    general_health_count = Column(Integer, default=0, nullable=False)
+    sleep_quality_sum = Column(Float, default=0.0, nullable=False)
+    sleep_quality_count = Column(Integer, default=0, nullable=False)
+    sweating_level_sum = Column(Float, default=0.0, nullable=False)
+    sweating_level_count = Column(Integer, default=0, nullable=False)
+    libido_level_sum = Column(Float, default=0.0, nullable=False)
+    libido_level_count = Column(Integer, default=0, nullable=False)
+
+class LifestyleFactorStatsRecord(Base):
+    """
+    Materialized completion statistics of one lifestyle factor.
+    
+    Streaks count consecutive completed entries in date order. Kept up to date
+    by the entry write handlers (see app/factor_stats.py).
+    """
+    __tablename__ = "lifestyle_factor_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    lifestyle_factor_id = Column(Integer, ForeignKey("lifestyle_factors.id"), nullable=False, unique=True, index=True)
+    total_days = Column(Integer, default=0, nullable=False)
+    completed_days = Column(Integer, default=0, nullable=False)
+    # Run of completed entries ending at the latest entry, and the date of its first entry
+    current_streak = Column(Integer, default=0, nullable=False)
+    current_streak_start = Column(Date, nullable=True)
+    longest_streak = Column(Integer, default=0, nullable=False)
+    last_entry_date = Column(Date, nullable=True)
+    last_completed_date = Column(Date, nullable=True)
+
+class LifestyleFactorCompletionBitmap(Base):
+    """
+    One year of a lifestyle factor's entries as bitsets, one bit per day of the year.
+    
+    Bit i (most significant bit first) stands for January 1st + i days. Kept up
+    to date by the entry write handlers (see app/completion_index.py).
+    """
+    __tablename__ = "lifestyle_factor_completion_bitmaps"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    lifestyle_factor_id = Column(Integer, ForeignKey("lifestyle_factors.id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    # Days with an entry, and days with a completed entry
+    recorded = Column(LargeBinary, nullable=False)
+    completed = Column(LargeBinary, nullable=False)
+    
+    __table_args__ = (
+        Index("uq_lifestyle_factor_completion_bitmaps_factor_year", "lifestyle_factor_id", "year", unique=True),
+        # The calendar of all factors for a year
+        Index("ix_lifestyle_factor_completion_bitmaps_year", "year"),
+    )
 
 class CBTThought(Base):
     __tablename__ = "cbt_thoughts"
@@ -89,5 +195,30 @@ class CBTThought(Base):
     intensity = Column(Integer, nullable=True)  # 1-10 scale for thought intensity
     
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
 
+# Tombstone of a deleted row, so delta sync clients (app/sync.py) learn about deletes
+class DeletedRecord(Base):
+    __tablename__ = "deleted_records"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String, nullable=False)
+    record_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        # Tombstones since a sync cursor
+        Index("ix_deleted_records_deleted_at", "deleted_at"),
+    )
+
+class DataVersion(Base):
+    """
+    Change counter of one table, bumped in the same transaction as every write to it.
+    
+    Cached analytics results are keyed on these counters (see app/cache.py).
+    """
+    __tablename__ = "data_versions"
+    
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,128 @@
+"""
+Keyset pagination and NDJSON streaming for the entry list endpoints.
+
+List endpoints order their rows by a unique key such as (date, id). A page
+holds up to `limit` rows; when more follow, the response carries an opaque
+cursor in the X-Next-Cursor header (the key of the page's last row, encoded
+as base64 JSON) and passing it back as `cursor` continues after that row.
+Unlike OFFSET, every page is a single index range scan, so deep pages cost
+the same as the first one and rows written between requests don't shift the
+pages.
+
+Very large ranges can instead be streamed as NDJSON, one JSON object per
+line, read from the database in chunks.
+"""
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Type
+import base64
+import binascii
+import json
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal
+
+# Response header holding the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Page size of endpoints where paging is optional, when a cursor comes without a limit
+DEFAULT_PAGE_SIZE = 100
+
+MAX_PAGE_SIZE = 1000
+
+# Rows fetched from the database per chunk when streaming NDJSON
+NDJSON_CHUNK_ROWS = 500
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the key of a row as an opaque cursor."""
+    plain = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(plain, separators=(",", ":")).encode()).decode("ascii")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """Decode a cursor back into key values typed like `columns`; 400 when it is malformed."""
+    try:
+        plain = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(plain, list) or len(plain) != len(columns):
+            raise ValueError("wrong number of values")
+        values = []
+        for column, value in zip(columns, plain):
+            python_type = column.type.python_type
+            if python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise ValueError(f"unexpected value {value!r}")
+            values.append(value)
+        return values
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_select(
+    query: Select,
+    columns: Sequence,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> Select:
+    """Order `query` by the key `columns` and start after the row `cursor` points at."""
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        after = tuple_(*(literal(value, column.type) for column, value in zip(columns, values)))
+        query = query.where(key < after if descending else key > after)
+    return query.order_by(*(column.desc() if descending else column for column in columns))
+
+
+async def fetch_page(
+    db: AsyncSession,
+    response: Response,
+    query: Select,
+    columns: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> list:
+    """
+    Fetch one page of ORM objects selected by `query`.
+
+    Sets the next-page cursor header when more rows follow.
+    """
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    # One extra row tells whether there is a next page
+    rows = (await db.scalars(keyset_select(query, columns, cursor, descending).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows
+
+
+async def _ndjson_lines(query: Select, schema: Type[BaseModel]):
+    # The body is streamed after the request's dependencies are closed, so use a session of its own
+    async with AsyncSessionLocal() as db:
+        lines = []
+        async for row in await db.stream_scalars(query.execution_options(yield_per=NDJSON_CHUNK_ROWS)):
+            lines.append(schema.model_validate(row).model_dump_json())
+            if len(lines) == NDJSON_CHUNK_ROWS:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+
+def ndjson_response(
+    query: Select,
+    columns: Sequence,
+    schema: Type[BaseModel],
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> StreamingResponse:
+    """Stream every row selected by `query`, in key order after `cursor`, as NDJSON."""
+    query = keyset_select(query, columns, cursor, descending)
+    return StreamingResponse(_ndjson_lines(query, schema), media_type=NDJSON_MEDIA_TYPE)
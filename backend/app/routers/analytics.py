@@ -4,10 +4,17 @@ from typing import List, Dict, Optional
 from datetime import date, timedelta
 import pandas as pd
 import numpy as np
-from scipy import stats
 from app import models, schemas
 from app.database import get_db
 from app.auth import get_current_user
+from app.analytics_pool import run_analytics
+from app.correlation_engine import (
+    align_completion, build_completion_matrix, daily_axis, lag_spectrum, pearson_matrix, rolling_pearson
+)
+from app.columnar import day_strings, load_daily_metrics, load_factor_entries
+from app.cache import cached_analytics
+from app.completion_index import ENCODINGS, year_calendar
+from app.serialization import records, rounded
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
@@ -25,7 +32,81 @@ WELLBEING_METRICS = {
     "libido_level": {"display_name": "Libido Level", "higher_is_better": True, "required": False},
 }
 
+# Largest lag the lag spectrum endpoint computes
+MAX_LAG_DAYS = 90
+
+# Window lengths the rolling correlation endpoint accepts
+MIN_ROLLING_WINDOW_DAYS = 7
+MAX_ROLLING_WINDOW_DAYS = 365
+
+# Tables each cached endpoint reads; writes to them invalidate the cached results
+WELLBEING_TABLES = [models.WellbeingMetricEntry.__tablename__]
+LIFESTYLE_FACTOR_TABLES = [models.LifestyleFactor.__tablename__, models.LifestyleFactorEntry.__tablename__]
+CORRELATION_TABLES = WELLBEING_TABLES + LIFESTYLE_FACTOR_TABLES
+
+def _compute_correlations(
+    db: Session,
+    lifestyle_factors: List[models.LifestyleFactor],
+    metric_names: List[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    min_samples: int
+) -> Dict[int, List[schemas.CorrelationResult]]:
+    """
+    Correlate every lifestyle factor with every requested metric.
+    
+    Daily wellbeing averages and lifestyle factor entries are each loaded with a single
+    query and pivoted into date x metric / date x factor matrices, so the cost
+    no longer grows with factors x metrics round trips and merges.
+    Days without a lifestyle factor entry count as not completed.
+    
+    Returns a dict of lifestyle_factor_id -> correlations (in metric order),
+    keeping the lifestyle factor order of the input.
+    """
+    # Daily average of each metric from the rollup, dropping days where none was recorded
+    daily = load_daily_metrics(db, metric_names, start_date, end_date)
+    recorded = ~np.all(np.isnan(daily.values), axis=1)
+    days, metric_matrix = daily.days[recorded], daily.values[recorded]
+    if not len(days):
+        return {}
+    
+    # Completion of every lifestyle factor on the same date axis
+    entries = load_factor_entries(db, start_date, end_date)
+    factor_ids = [lifestyle_factor.id for lifestyle_factor in lifestyle_factors]
+    completion_matrix, has_entries = build_completion_matrix(
+        entries.factor_ids, entries.days, entries.completed, factor_ids, days
+    )
+    
+    r, p, n, valid = run_analytics(pearson_matrix, completion_matrix, metric_matrix)
+    
+    # Need minimum number of samples and variation in both variables
+    keep = valid & (n[:, None] >= min_samples) & has_entries[None, :]
+    
+    results = {}
+    for j, lifestyle_factor in enumerate(lifestyle_factors):
+        lifestyle_factor_correlations = []
+        for i, metric_name in enumerate(metric_names):
+            if not keep[i, j]:
+                continue
+            correlation = float(r[i, j])
+            p_value = float(p[i, j])
+            lifestyle_factor_correlations.append(schemas.CorrelationResult(
+                lifestyle_factor_name=lifestyle_factor.name,
+                lifestyle_factor_id=lifestyle_factor.id,
+                metric_name=metric_name,
+                correlation=round(correlation, 3),
+                p_value=round(p_value, 4),
+                # Consider significant if p-value < 0.05
+                significant=p_value < 0.05,
+                sample_size=int(n[i])
+            ))
+        if lifestyle_factor_correlations:
+            results[lifestyle_factor.id] = lifestyle_factor_correlations
+    
+    return results
+
 @router.get("/correlations", response_model=List[schemas.CorrelationResult])
+@cached_analytics("correlations", tables=CORRELATION_TABLES)
 def get_lifestyle_factor_mood_correlations(
     start_date: date = None,
     end_date: date = None,
@@ -43,98 +124,10 @@ def get_lifestyle_factor_mood_correlations(
     if not lifestyle_factors:
         return []
     
-    # Get mood entries
-    mood_query = db.query(models.WellbeingMetricEntry)
-    if start_date:
-        mood_query = mood_query.filter(models.WellbeingMetricEntry.date >= start_date)
-    if end_date:
-        mood_query = mood_query.filter(models.WellbeingMetricEntry.date <= end_date)
-    
-    mood_entries = mood_query.all()
-    
-    if not mood_entries:
-        return []
-    
-    # Create a DataFrame with daily average mood scores
-    mood_df = pd.DataFrame([
-        {"date": entry.date, "mood_score": entry.mood_score}
-        for entry in mood_entries
-    ])
-    
-    # Group by date and take average (in case multiple entries per day)
-    mood_df = mood_df.groupby("date").agg({"mood_score": "mean"}).reset_index()
-    
-    results = []
-    
-    for lifestyle_factor in lifestyle_factors:
-        # Get lifestyle factor entries
-        lifestyle_factor_query = db.query(models.LifestyleFactorEntry).filter(
-            models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor.id
-        )
-        if start_date:
-            lifestyle_factor_query = lifestyle_factor_query.filter(models.LifestyleFactorEntry.date >= start_date)
-        if end_date:
-            lifestyle_factor_query = lifestyle_factor_query.filter(models.LifestyleFactorEntry.date <= end_date)
-        
-        lifestyle_factor_entries = lifestyle_factor_query.all()
-        
-        if not lifestyle_factor_entries:
-            continue
-        
-        # Create DataFrame with lifestyle factor completion
-        lifestyle_factor_df = pd.DataFrame([
-            {"date": entry.date, "completed": 1 if entry.completed else 0}
-            for entry in lifestyle_factor_entries
-        ])
-        
-        # Merge mood and lifestyle factor data
-        # Use LEFT join to include all mood tracking days
-        # Days without lifestyle factor entries are treated as not completed (0)
-        merged_df = pd.merge(mood_df, lifestyle_factor_df, on="date", how="left")
-        merged_df["completed"] = merged_df["completed"].fillna(0)
-        
-        # Need minimum number of samples for meaningful correlation
-        if len(merged_df) < min_samples:
-            continue
-        
-        # Skip if no variation in either variable (needed for correlation)
-        if merged_df["completed"].nunique() < 2 or merged_df["mood_score"].nunique() < 2:
-            continue
-        
-        # Skip if all values are the same (would cause correlation error)
-        if merged_df["completed"].std() == 0 or merged_df["mood_score"].std() == 0:
-            continue
-        
-        # Calculate Pearson correlation
-        try:
-            correlation, p_value = stats.pearsonr(
-                merged_df["completed"],
-                merged_df["mood_score"]
-            )
-            
-            # Skip if correlation is NaN or infinite
-            if not pd.notna(correlation) or not pd.notna(p_value):
-                continue
-            if not np.isfinite(correlation) or not np.isfinite(p_value):
-                continue
-            if not (-1 <= correlation <= 1):
-                continue
-        except Exception:
-            # Skip this lifestyle factor if correlation calculation fails
-            continue
-        
-        # Consider significant if p-value < 0.05
-        significant = p_value < 0.05
-        
-        results.append(schemas.CorrelationResult(
-            lifestyle_factor_name=lifestyle_factor.name,
-            lifestyle_factor_id=lifestyle_factor.id,
-            metric_name="mood_score",
-            correlation=round(correlation, 3),
-            p_value=round(p_value, 4),
-            significant=significant,
-            sample_size=len(merged_df)
-        ))
+    correlations_by_factor = _compute_correlations(
+        db, lifestyle_factors, ["mood_score"], start_date, end_date, min_samples
+    )
+    results = [c for factor_correlations in correlations_by_factor.values() for c in factor_correlations]
     
     # Sort by absolute correlation value
     results.sort(key=lambda x: abs(x.correlation), reverse=True)
@@ -143,6 +136,7 @@ def get_lifestyle_factor_mood_correlations(
 
 
 @router.get("/correlations/multi-metric")
+@cached_analytics("correlations/multi-metric", tables=CORRELATION_TABLES)
 def get_multi_metric_correlations(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
@@ -168,117 +162,14 @@ def get_multi_metric_correlations(
     if not lifestyle_factors:
         return {"by_metric": [], "by_lifestyle_factor": {}}
     
-    # Get wellbeing entries
-    wellbeing_query = db.query(models.WellbeingMetricEntry)
-    if start_date:
-        wellbeing_query = wellbeing_query.filter(models.WellbeingMetricEntry.date >= start_date)
-    if end_date:
-        wellbeing_query = wellbeing_query.filter(models.WellbeingMetricEntry.date <= end_date)
-    
-    wellbeing_entries = wellbeing_query.all()
-    
-    if not wellbeing_entries:
-        return {"by_metric": [], "by_lifestyle_factor": {}}
-    
     # Filter metrics if specified
     metrics_to_analyze = {metric: WELLBEING_METRICS[metric]} if metric and metric in WELLBEING_METRICS else WELLBEING_METRICS
     
-    # Create DataFrames for each metric
-    metric_dataframes = {}
-    for metric_name in metrics_to_analyze.keys():
-        data = []
-        for entry in wellbeing_entries:
-            value = getattr(entry, metric_name, None)
-            if value is not None:
-                data.append({"date": entry.date, metric_name: value})
-        
-        if data:
-            df = pd.DataFrame(data)
-            # Group by date and take average (in case multiple entries per day)
-            df = df.groupby("date").agg({metric_name: "mean"}).reset_index()
-            metric_dataframes[metric_name] = df
-    
-    # Calculate correlations for each lifestyle factor and metric
-    all_correlations = []
-    by_lifestyle_factor = {}
-    
-    for lifestyle_factor in lifestyle_factors:
-        # Get lifestyle factor entries
-        lifestyle_factor_query = db.query(models.LifestyleFactorEntry).filter(
-            models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor.id
-        )
-        if start_date:
-            lifestyle_factor_query = lifestyle_factor_query.filter(models.LifestyleFactorEntry.date >= start_date)
-        if end_date:
-            lifestyle_factor_query = lifestyle_factor_query.filter(models.LifestyleFactorEntry.date <= end_date)
-        
-        lifestyle_factor_entries = lifestyle_factor_query.all()
-        
-        if not lifestyle_factor_entries:
-            continue
-        
-        # Create DataFrame with lifestyle factor completion
-        lifestyle_factor_df = pd.DataFrame([
-            {"date": entry.date, "completed": 1 if entry.completed else 0}
-            for entry in lifestyle_factor_entries
-        ])
-        
-        lifestyle_factor_correlations = []
-        
-        # Calculate correlation for each metric
-        for metric_name, metric_df in metric_dataframes.items():
-            # Merge wellbeing and lifestyle factor data
-            merged_df = pd.merge(metric_df, lifestyle_factor_df, on="date", how="left")
-            merged_df["completed"] = merged_df["completed"].fillna(0)
-            
-            # Need minimum number of samples for meaningful correlation
-            if len(merged_df) < min_samples:
-                continue
-            
-            # Skip if no variation in either variable
-            if merged_df["completed"].nunique() < 2 or merged_df[metric_name].nunique() < 2:
-                continue
-            
-            # Skip if all values are the same
-            if merged_df["completed"].std() == 0 or merged_df[metric_name].std() == 0:
-                continue
-            
-            # Calculate Pearson correlation
-            try:
-                correlation, p_value = stats.pearsonr(
-                    merged_df["completed"],
-                    merged_df[metric_name]
-                )
-                
-                # Skip if correlation is NaN or infinite
-                if not pd.notna(correlation) or not pd.notna(p_value):
-                    continue
-                if not np.isfinite(correlation) or not np.isfinite(p_value):
-                    continue
-                if not (-1 <= correlation <= 1):
-                    continue
-            except Exception:
-                # Skip if correlation calculation fails
-                continue
-            
-            # Consider significant if p-value < 0.05
-            significant = p_value < 0.05
-            
-            corr_result = schemas.CorrelationResult(
-                lifestyle_factor_name=lifestyle_factor.name,
-                lifestyle_factor_id=lifestyle_factor.id,
-                metric_name=metric_name,
-                correlation=round(correlation, 3),
-                p_value=round(p_value, 4),
-                significant=significant,
-                sample_size=len(merged_df)
-            )
-            
-            all_correlations.append(corr_result)
-            lifestyle_factor_correlations.append(corr_result)
-        
-        if lifestyle_factor_correlations:
-            by_lifestyle_factor[lifestyle_factor.id] = lifestyle_factor_correlations
+    # Calculate correlations for every lifestyle factor and metric in one pass
+    by_lifestyle_factor = _compute_correlations(
+        db, lifestyle_factors, list(metrics_to_analyze.keys()), start_date, end_date, min_samples
+    )
+    all_correlations = [c for factor_correlations in by_lifestyle_factor.values() for c in factor_correlations]
     
     # Organize by metric
     by_metric = []
@@ -296,7 +187,171 @@ def get_multi_metric_correlations(
     
     return {"by_metric": by_metric, "by_lifestyle_factor": by_lifestyle_factor}
 
+@router.get("/correlations/lag-spectrum")
+@cached_analytics("correlations/lag-spectrum", tables=CORRELATION_TABLES)
+def get_lag_spectrum(
+    metric: str = "mood_score",
+    lifestyle_factor_id: Optional[int] = None,
+    max_lag: int = 7,
+    include_negative: bool = True,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    min_samples: int = 7,
+    db: Session = Depends(get_db)
+):
+    """
+    Correlate lifestyle factors with a metric at every lag from 0 to max_lag days.
+    
+    At lag L a factor completed on day t is compared with the metric on day t + L.
+    Negative lags (the metric before the factor) act as a sanity control: a
+    factor that "predicts" the past is likely confounded.
+    
+    Args:
+        metric: Wellbeing metric to analyze
+        lifestyle_factor_id: Analyze only this lifestyle factor (default: all)
+        max_lag: Largest lag in days (at most MAX_LAG_DAYS)
+        include_negative: Also compute lags -max_lag..-1
+        start_date: Start date for analysis
+        end_date: End date for analysis
+        min_samples: Minimum number of samples required for correlation
+    """
+    if metric not in WELLBEING_METRICS:
+        raise HTTPException(status_code=400, detail=f"Invalid metric: {metric}")
+    if not 0 <= max_lag <= MAX_LAG_DAYS:
+        raise HTTPException(status_code=400, detail=f"max_lag must be between 0 and {MAX_LAG_DAYS}")
+    
+    factors_query = db.query(models.LifestyleFactor)
+    if lifestyle_factor_id is not None:
+        factors_query = factors_query.filter(models.LifestyleFactor.id == lifestyle_factor_id)
+    lifestyle_factors = factors_query.all()
+    if lifestyle_factor_id is not None and not lifestyle_factors:
+        raise HTTPException(status_code=404, detail="Lifestyle factor not found")
+    
+    lags = list(range(-max_lag if include_negative else 0, max_lag + 1))
+    
+    daily = load_daily_metrics(db, [metric], start_date, end_date)
+    recorded = ~np.isnan(daily.values[:, 0])
+    # Shifted pairs may reach entries up to max_lag days outside the range
+    entries = load_factor_entries(
+        db,
+        start_date - timedelta(days=max_lag) if start_date else None,
+        end_date + timedelta(days=max_lag) if end_date and include_negative else end_date,
+        lifestyle_factor_id
+    )
+    factor_ids = [lifestyle_factor.id for lifestyle_factor in lifestyle_factors]
+    r, p, n, valid = run_analytics(
+        lag_spectrum, daily.days[recorded], daily.values[recorded, 0],
+        entries.factor_ids, entries.days, entries.completed, factor_ids, lags
+    )
+    
+    keep = valid & (n[:, None] >= min_samples)
+    r_values = rounded(np.where(keep, r, np.nan), 3)
+    p_values = rounded(np.where(keep, p, np.nan), 4)
+    significant = keep & (p < 0.05)
+    
+    return {
+        "metric_name": metric,
+        "metric_display_name": WELLBEING_METRICS[metric]["display_name"],
+        "lags": lags,
+        "lifestyle_factors": [
+            {
+                "lifestyle_factor_id": lifestyle_factor.id,
+                "lifestyle_factor_name": lifestyle_factor.name,
+                "spectrum": records({
+                    "lag": np.asarray(lags),
+                    "correlation": r_values[:, j],
+                    "p_value": p_values[:, j],
+                    "significant": significant[:, j],
+                    "sample_size": n,
+                })
+            }
+            for j, lifestyle_factor in enumerate(lifestyle_factors)
+        ]
+    }
+
+@router.get("/correlations/rolling")
+@cached_analytics("correlations/rolling", tables=CORRELATION_TABLES)
+def get_rolling_correlations(
+    window: int = 30,
+    metric: Optional[str] = None,
+    lifestyle_factor_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    min_samples: int = 7,
+    db: Session = Depends(get_db)
+):
+    """
+    Correlation between lifestyle factors and metrics over a window sliding one day at a time.
+    
+    Shows whether a lifestyle factor's effect changes over time. The series is
+    returned column-wise: `dates` holds the last day of each window and every
+    series has one correlation per date (null where undefined or the window
+    has fewer than min_samples recorded days).
+    
+    Args:
+        window: Window length in days (e.g. 30, 60 or 90)
+        metric: Only this metric (default: all metrics)
+        lifestyle_factor_id: Only this lifestyle factor (default: all)
+        start_date: Start date for analysis
+        end_date: End date for analysis
+        min_samples: Minimum recorded days in a window
+    """
+    if not MIN_ROLLING_WINDOW_DAYS <= window <= MAX_ROLLING_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"window must be between {MIN_ROLLING_WINDOW_DAYS} and {MAX_ROLLING_WINDOW_DAYS}"
+        )
+    if metric is not None and metric not in WELLBEING_METRICS:
+        raise HTTPException(status_code=400, detail=f"Invalid metric: {metric}")
+    
+    factors_query = db.query(models.LifestyleFactor)
+    if lifestyle_factor_id is not None:
+        factors_query = factors_query.filter(models.LifestyleFactor.id == lifestyle_factor_id)
+    lifestyle_factors = factors_query.all()
+    if lifestyle_factor_id is not None and not lifestyle_factors:
+        raise HTTPException(status_code=404, detail="Lifestyle factor not found")
+    
+    metric_names = [metric] if metric else list(WELLBEING_METRICS.keys())
+    daily = load_daily_metrics(db, metric_names, start_date, end_date)
+    if not len(daily.days) or not lifestyle_factors:
+        return {"window": window, "dates": [], "series": []}
+    
+    # Contiguous daily axis, so each window step is exactly one day
+    axis = daily_axis(int(daily.days[0]), int(daily.days[-1]))
+    metric_matrix = np.full((len(axis), len(metric_names)), np.nan)
+    metric_matrix[daily.days - axis[0]] = daily.values
+    
+    entries = load_factor_entries(db, start_date, end_date, lifestyle_factor_id)
+    factor_ids = [lifestyle_factor.id for lifestyle_factor in lifestyle_factors]
+    completion_matrix, has_entries = build_completion_matrix(
+        entries.factor_ids, entries.days, entries.completed, factor_ids, axis
+    )
+    
+    r, n = run_analytics(rolling_pearson, completion_matrix, metric_matrix, window)
+    r[n < min_samples] = np.nan
+    
+    series = []
+    for i, metric_name in enumerate(metric_names):
+        for j, lifestyle_factor in enumerate(lifestyle_factors):
+            correlations = r[:, i, j]
+            if not has_entries[j] or np.all(np.isnan(correlations)):
+                continue
+            series.append({
+                "lifestyle_factor_id": lifestyle_factor.id,
+                "lifestyle_factor_name": lifestyle_factor.name,
+                "metric_name": metric_name,
+                "correlations": rounded(correlations, 3).tolist(),
+                "sample_sizes": n[:, i].tolist(),
+            })
+    
+    return {
+        "window": window,
+        "dates": day_strings(axis[window - 1:]).tolist(),
+        "series": series
+    }
+
 @router.get("/correlations/{lifestyle_factor_id}")
+@cached_analytics("correlations/detail", tables=CORRELATION_TABLES)
 def get_lifestyle_factor_correlation_details(
     lifestyle_factor_id: int,
     start_date: date = None,
@@ -325,45 +380,15 @@ def get_lifestyle_factor_correlation_details(
     if metric not in WELLBEING_METRICS:
         raise HTTPException(status_code=400, detail=f"Invalid metric: {metric}")
     
-    # Get wellbeing entries
-    wellbeing_query = db.query(models.WellbeingMetricEntry)
-    if start_date:
-        wellbeing_query = wellbeing_query.filter(models.WellbeingMetricEntry.date >= start_date)
-    if end_date:
-        wellbeing_query = wellbeing_query.filter(models.WellbeingMetricEntry.date <= end_date)
-    
-    wellbeing_entries = wellbeing_query.all()
+    # Days on which the metric was recorded, from the rollup
+    daily = load_daily_metrics(db, [metric], start_date, end_date)
+    recorded = ~np.isnan(daily.values[:, 0])
+    metric_days, metric_values = daily.days[recorded], daily.values[recorded, 0]
     
     # Get lifestyle factor entries
-    lifestyle_factor_query = db.query(models.LifestyleFactorEntry).filter(
-        models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor_id
-    )
-    if start_date:
-        lifestyle_factor_query = lifestyle_factor_query.filter(models.LifestyleFactorEntry.date >= start_date)
-    if end_date:
-        lifestyle_factor_query = lifestyle_factor_query.filter(models.LifestyleFactorEntry.date <= end_date)
-    
-    lifestyle_factor_entries = lifestyle_factor_query.all()
-    
-    if not wellbeing_entries or not lifestyle_factor_entries:
-        return {
-            "lifestyle_factor_name": lifestyle_factor.name,
-            "metric_name": metric,
-            "metric_display_name": WELLBEING_METRICS[metric]["display_name"],
-            "same_day": None,
-            "next_day": None,
-            "two_days": None,
-            "data_points": []
-        }
-    
-    # Create DataFrames
-    metric_data = []
-    for entry in wellbeing_entries:
-        value = getattr(entry, metric, None)
-        if value is not None:
-            metric_data.append({"date": entry.date, metric: value})
+    entries = load_factor_entries(db, start_date, end_date, lifestyle_factor_id)
     
-    if not metric_data:
+    if not len(metric_days) or not len(entries.days):
         return {
             "lifestyle_factor_name": lifestyle_factor.name,
             "metric_name": metric,
@@ -374,76 +399,29 @@ def get_lifestyle_factor_correlation_details(
             "data_points": []
         }
     
-    metric_df = pd.DataFrame(metric_data)
-    metric_df = metric_df.groupby("date").agg({metric: "mean"}).reset_index()
-    
-    lifestyle_factor_df = pd.DataFrame([
-        {"date": entry.date, "completed": 1 if entry.completed else 0}
-        for entry in lifestyle_factor_entries
-    ])
+    # Same day, next day (lifestyle factor today affects metric tomorrow) and two days later
+    lag_names = {0: "same_day", 1: "next_day", 2: "two_days"}
+    r, p, n, valid = run_analytics(
+        lag_spectrum, metric_days, metric_values, entries.factor_ids, entries.days, entries.completed,
+        [lifestyle_factor_id], list(lag_names)
+    )
     
-    # Calculate correlations with different time lags
     correlations = {}
-    
-    # Same day correlation
-    merged_same = pd.merge(metric_df, lifestyle_factor_df, on="date", how="left")
-    merged_same["completed"] = merged_same["completed"].fillna(0)
-    if len(merged_same) >= 5 and merged_same["completed"].nunique() >= 2 and merged_same[metric].nunique() >= 2:
-        try:
-            corr, p_val = stats.pearsonr(merged_same["completed"], merged_same[metric])
-            if pd.notna(corr) and pd.notna(p_val) and np.isfinite(corr) and np.isfinite(p_val):
-                correlations["same_day"] = {
-                    "correlation": round(corr, 3),
-                    "p_value": round(p_val, 4),
-                    "samples": len(merged_same)
-                }
-        except:
-            pass
-    
-    # Next day correlation (lifestyle factor today affects metric tomorrow)
-    lifestyle_factor_df_lag1 = lifestyle_factor_df.copy()
-    lifestyle_factor_df_lag1["date"] = lifestyle_factor_df_lag1["date"] + timedelta(days=1)
-    merged_lag1 = pd.merge(metric_df, lifestyle_factor_df_lag1, on="date", how="left")
-    merged_lag1["completed"] = merged_lag1["completed"].fillna(0)
-    if len(merged_lag1) >= 5 and merged_lag1["completed"].nunique() >= 2 and merged_lag1[metric].nunique() >= 2:
-        try:
-            corr, p_val = stats.pearsonr(merged_lag1["completed"], merged_lag1[metric])
-            if pd.notna(corr) and pd.notna(p_val) and np.isfinite(corr) and np.isfinite(p_val):
-                correlations["next_day"] = {
-                    "correlation": round(corr, 3),
-                    "p_value": round(p_val, 4),
-                    "samples": len(merged_lag1)
-                }
-        except:
-            pass
-    
-    # Two days later correlation
-    lifestyle_factor_df_lag2 = lifestyle_factor_df.copy()
-    lifestyle_factor_df_lag2["date"] = lifestyle_factor_df_lag2["date"] + timedelta(days=2)
-    merged_lag2 = pd.merge(metric_df, lifestyle_factor_df_lag2, on="date", how="left")
-    merged_lag2["completed"] = merged_lag2["completed"].fillna(0)
-    if len(merged_lag2) >= 5 and merged_lag2["completed"].nunique() >= 2 and merged_lag2[metric].nunique() >= 2:
-        try:
-            corr, p_val = stats.pearsonr(merged_lag2["completed"], merged_lag2[metric])
-            if pd.notna(corr) and pd.notna(p_val) and np.isfinite(corr) and np.isfinite(p_val):
-                correlations["two_days"] = {
-                    "correlation": round(corr, 3),
-                    "p_value": round(p_val, 4),
-                    "samples": len(merged_lag2)
-                }
-        except:
-            pass
-    
-    # Get data points for visualization
-    merged_all = pd.merge(metric_df, lifestyle_factor_df, on="date", how="inner")
-    data_points = [
-        {
-            "date": str(row["date"]),
-            "completed": bool(row["completed"]),
-            "value": row[metric]
-        }
-        for _, row in merged_all.iterrows()
-    ]
+    for k, name in enumerate(lag_names.values()):
+        if valid[k, 0] and n[k] >= 5:
+            correlations[name] = {
+                "correlation": round(float(r[k, 0]), 3),
+                "p_value": round(float(p[k, 0]), 4),
+                "samples": int(n[k])
+            }
+    
+    # Get data points for visualization (days with both a metric value and an entry)
+    completed, found = align_completion(metric_days, entries.days, entries.completed)
+    data_points = records({
+        "date": day_strings(metric_days[found]),
+        "completed": completed[found].astype(bool),
+        "value": metric_values[found],
+    })
     
     return {
         "lifestyle_factor_name": lifestyle_factor.name,
@@ -454,6 +432,7 @@ def get_lifestyle_factor_correlation_details(
     }
 
 @router.get("/trends/mood")
+@cached_analytics("trends/mood", tables=WELLBEING_TABLES)
 def get_mood_trends(
     start_date: date = None,
     end_date: date = None,
@@ -463,53 +442,30 @@ def get_mood_trends(
     Legacy endpoint: Get mood trends over time with daily averages.
     For backward compatibility. Use /trends/wellbeing for all metrics.
     """
-    query = db.query(models.WellbeingMetricEntry)
-    
-    if start_date:
-        query = query.filter(models.WellbeingMetricEntry.date >= start_date)
-    if end_date:
-        query = query.filter(models.WellbeingMetricEntry.date <= end_date)
-    
-    entries = query.all()
+    trend_metrics = ["mood_score", "energy_level", "stress_level"]
+    daily = load_daily_metrics(db, trend_metrics, start_date, end_date)
     
-    if not entries:
+    if not len(daily.days):
         return {"data": []}
     
-    # Create DataFrame and aggregate by date
-    df = pd.DataFrame([
-        {
-            "date": entry.date,
-            "mood_score": entry.mood_score,
-            "energy_level": entry.energy_level,
-            "stress_level": entry.stress_level
-        }
-        for entry in entries
-    ])
-    
-    daily_avg = df.groupby("date").agg({
-        "mood_score": "mean",
-        "energy_level": "mean",
-        "stress_level": "mean"
-    }).reset_index()
-    
+    # Daily averages come pre-aggregated from the rollup; round and mask them column-wise
+    mood, energy, stress = daily.values.T
     # Calculate 7-day moving average
-    daily_avg["mood_ma7"] = daily_avg["mood_score"].rolling(window=7, min_periods=1).mean()
-    
-    data = [
-        {
-            "date": str(row["date"]),
-            "mood_score": round(row["mood_score"], 2),
-            "mood_ma7": round(row["mood_ma7"], 2),
-            "energy_level": round(row["energy_level"], 2) if pd.notna(row["energy_level"]) else None,
-            "stress_level": round(row["stress_level"], 2) if pd.notna(row["stress_level"]) else None
-        }
-        for _, row in daily_avg.iterrows()
-    ]
+    mood_ma7 = pd.Series(mood).rolling(window=7, min_periods=1).mean().to_numpy()
+    
+    data = records({
+        "date": day_strings(daily.days),
+        "mood_score": rounded(mood, 2),
+        "mood_ma7": rounded(mood_ma7, 2),
+        "energy_level": rounded(energy, 2),
+        "stress_level": rounded(stress, 2),
+    })
     
     return {"data": data}
 
 
 @router.get("/trends/wellbeing")
+@cached_analytics("trends/wellbeing", tables=WELLBEING_TABLES)
 def get_wellbeing_trends(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
@@ -519,51 +475,27 @@ def get_wellbeing_trends(
     Get wellbeing trends over time with daily averages for all metrics.
     Includes 7-day moving averages for smoothed visualization.
     """
-    query = db.query(models.WellbeingMetricEntry)
-    
-    if start_date:
-        query = query.filter(models.WellbeingMetricEntry.date >= start_date)
-    if end_date:
-        query = query.filter(models.WellbeingMetricEntry.date <= end_date)
+    metric_names = list(WELLBEING_METRICS.keys())
+    daily = load_daily_metrics(db, metric_names, start_date, end_date)
     
-    entries = query.all()
-    
-    if not entries:
+    if not len(daily.days):
         return {"data": []}
     
-    # Create DataFrame with all metrics
-    data_records = []
-    for entry in entries:
-        record = {"date": entry.date}
-        for metric_name in WELLBEING_METRICS.keys():
-            value = getattr(entry, metric_name, None)
-            record[metric_name] = value
-        data_records.append(record)
-    
-    df = pd.DataFrame(data_records)
-    
-    # Group by date and calculate mean
-    agg_dict = {metric: "mean" for metric in WELLBEING_METRICS.keys()}
-    daily_avg = df.groupby("date").agg(agg_dict).reset_index()
-    
-    # Calculate 7-day moving averages for each metric
-    for metric in WELLBEING_METRICS.keys():
-        daily_avg[f"{metric}_ma7"] = daily_avg[metric].rolling(window=7, min_periods=1).mean()
-    
-    # Convert to output format
-    data = []
-    for _, row in daily_avg.iterrows():
-        record = {"date": str(row["date"])}
-        for metric in WELLBEING_METRICS.keys():
-            value = row[metric]
-            ma_value = row[f"{metric}_ma7"]
-            record[metric] = round(value, 2) if pd.notna(value) else None
-            record[f"{metric}_ma7"] = round(ma_value, 2) if pd.notna(ma_value) else None
-        data.append(record)
+    # Daily averages of all metrics come pre-aggregated from the rollup
+    # Calculate 7-day moving averages for every metric at once
+    moving_averages = pd.DataFrame(daily.values).rolling(window=7, min_periods=1).mean().to_numpy()
+    
+    # Convert to output format, rounding and masking missing values column-wise
+    columns = {"date": day_strings(daily.days)}
+    for i, metric in enumerate(metric_names):
+        columns[metric] = rounded(daily.values[:, i], 2)
+        columns[f"{metric}_ma7"] = rounded(moving_averages[:, i], 2)
+    data = records(columns)
     
     return {"data": data}
 
 @router.get("/heatmap/{lifestyle_factor_id}")
+@cached_analytics("heatmap", tables=LIFESTYLE_FACTOR_TABLES)
 def get_lifestyle_factor_heatmap(
     lifestyle_factor_id: int,
     year: int = None,
@@ -581,20 +513,13 @@ def get_lifestyle_factor_heatmap(
     start = date(year, 1, 1)
     end = date(year, 12, 31)
     
-    entries = db.query(models.LifestyleFactorEntry).filter(
-        models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor_id,
-        models.LifestyleFactorEntry.date >= start,
-        models.LifestyleFactorEntry.date <= end
-    ).all()
+    entries = load_factor_entries(db, start, end, lifestyle_factor_id)
     
-    data = [
-        {
-            "date": str(entry.date),
-            "completed": entry.completed,
-            "value": 1 if entry.completed else 0
-        }
-        for entry in entries
-    ]
+    data = records({
+        "date": day_strings(entries.days),
+        "completed": entries.completed,
+        "value": entries.completed.astype(np.int64),
+    })
     
     return {
         "lifestyle_factor_name": lifestyle_factor.name,
@@ -602,3 +527,41 @@ def get_lifestyle_factor_heatmap(
         "data": data
     }
 
+@router.get("/heatmap/{lifestyle_factor_id}/compact")
+@cached_analytics("heatmap/compact", tables=LIFESTYLE_FACTOR_TABLES)
+def get_lifestyle_factor_compact_heatmap(
+    lifestyle_factor_id: int,
+    year: int = None,
+    encoding: str = "base64",
+    db: Session = Depends(get_db)
+):
+    """
+    Get a lifestyle factor's completion for a year as bitsets from the completion index.
+    
+    Same data as /heatmap/{lifestyle_factor_id} in a few dozen bytes: see
+    app/completion_index.py for the bit order and the encodings.
+    """
+    if encoding not in ENCODINGS:
+        raise HTTPException(status_code=400, detail=f"Invalid encoding: {encoding}")
+    lifestyle_factor = db.query(models.LifestyleFactor).filter(models.LifestyleFactor.id == lifestyle_factor_id).first()
+    if not lifestyle_factor:
+        raise HTTPException(status_code=404, detail="Lifestyle factor not found")
+    
+    if not year:
+        year = date.today().year
+    
+    bitmaps = db.query(models.LifestyleFactorCompletionBitmap).filter(
+        models.LifestyleFactorCompletionBitmap.lifestyle_factor_id == lifestyle_factor_id,
+        models.LifestyleFactorCompletionBitmap.year == year
+    ).all()
+    calendar = year_calendar(bitmaps, [lifestyle_factor], year, encoding)
+    
+    return {
+        "lifestyle_factor_name": lifestyle_factor.name,
+        "year": year,
+        "start_date": calendar["start_date"],
+        "days": calendar["days"],
+        "encoding": encoding,
+        "recorded": calendar["lifestyle_factors"][0]["recorded"],
+        "completed": calendar["lifestyle_factors"][0]["completed"]
+    }
@@ -1,65 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import date, datetime
 from app import models, schemas
-from app.database import get_db
+from app.database import get_async_db
 from app.auth import get_current_user
+from app.cache import bump_data_version
+from app.pagination import fetch_page, ndjson_response
+from app.sync import record_deletions
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
 @router.post("/", response_model=schemas.CBTThought)
-def create_cbt_thought(thought: schemas.CBTThoughtCreate, db: Session = Depends(get_db)):
+async def create_cbt_thought(thought: schemas.CBTThoughtCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new CBT thought entry"""
     db_thought = models.CBTThought(
         **thought.model_dump(),
         time=datetime.utcnow()
     )
     db.add(db_thought)
-    db.commit()
-    db.refresh(db_thought)
+    await db.run_sync(bump_data_version, models.CBTThought.__tablename__)
+    await db.commit()
+    await db.refresh(db_thought)
     return db_thought
 
 @router.get("/", response_model=List[schemas.CBTThought])
-def get_cbt_thoughts(
+async def get_cbt_thoughts(
+    response: Response,
     start_date: date = None,
     end_date: date = None,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get CBT thought entries with optional date filtering"""
-    query = db.query(models.CBTThought)
+    """
+    Get CBT thought entries with optional date filtering, newest first
+
+    Pages by (date, time, id): when more thoughts follow, the X-Next-Cursor
+    header holds the cursor of the next page. stream=true returns every
+    matching thought after the cursor as NDJSON instead, ignoring limit.
+    """
+    query = select(models.CBTThought)
     
     if start_date:
-        query = query.filter(models.CBTThought.date >= start_date)
+        query = query.where(models.CBTThought.date >= start_date)
     if end_date:
-        query = query.filter(models.CBTThought.date <= end_date)
+        query = query.where(models.CBTThought.date <= end_date)
     
-    return query.order_by(models.CBTThought.date.desc(), models.CBTThought.time.desc()).limit(limit).all()
+    key = [models.CBTThought.date, models.CBTThought.time, models.CBTThought.id]
+    if stream:
+        return ndjson_response(query, key, schemas.CBTThought, cursor, descending=True)
+    return await fetch_page(db, response, query, key, cursor, limit, descending=True)
 
 @router.get("/{thought_id}", response_model=schemas.CBTThought)
-def get_cbt_thought(thought_id: int, db: Session = Depends(get_db)):
+async def get_cbt_thought(thought_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific CBT thought entry"""
-    thought = db.query(models.CBTThought).filter(models.CBTThought.id == thought_id).first()
+    thought = await db.get(models.CBTThought, thought_id)
     if not thought:
         raise HTTPException(status_code=404, detail="CBT thought not found")
     return thought
 
 @router.get("/date/{entry_date}", response_model=List[schemas.CBTThought])
-def get_cbt_thoughts_by_date(entry_date: date, db: Session = Depends(get_db)):
+async def get_cbt_thoughts_by_date(entry_date: date, db: AsyncSession = Depends(get_async_db)):
     """Get all CBT thought entries for a specific date"""
-    return db.query(models.CBTThought).filter(
+    return (await db.scalars(select(models.CBTThought).where(
         models.CBTThought.date == entry_date
-    ).order_by(models.CBTThought.time.desc()).all()
+    ).order_by(models.CBTThought.time.desc()))).all()
 
 @router.put("/{thought_id}", response_model=schemas.CBTThought)
-def update_cbt_thought(
+async def update_cbt_thought(
     thought_id: int,
     thought_update: schemas.CBTThoughtUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a CBT thought entry"""
-    db_thought = db.query(models.CBTThought).filter(models.CBTThought.id == thought_id).first()
+    db_thought = await db.get(models.CBTThought, thought_id)
     if not db_thought:
         raise HTTPException(status_code=404, detail="CBT thought not found")
     
@@ -68,18 +85,21 @@ def update_cbt_thought(
         setattr(db_thought, key, value)
     
     db_thought.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_thought)
+    await db.run_sync(bump_data_version, models.CBTThought.__tablename__)
+    await db.commit()
+    await db.refresh(db_thought)
     return db_thought
 
 @router.delete("/{thought_id}")
-def delete_cbt_thought(thought_id: int, db: Session = Depends(get_db)):
+async def delete_cbt_thought(thought_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a CBT thought entry"""
-    db_thought = db.query(models.CBTThought).filter(models.CBTThought.id == thought_id).first()
+    db_thought = await db.get(models.CBTThought, thought_id)
     if not db_thought:
         raise HTTPException(status_code=404, detail="CBT thought not found")
     
-    db.delete(db_thought)
-    db.commit()
+    record_deletions(db, models.CBTThought.__tablename__, [thought_id])
+    await db.delete(db_thought)
+    await db.run_sync(bump_data_version, models.CBTThought.__tablename__)
+    await db.commit()
     return {"message": "CBT thought deleted successfully"}
 
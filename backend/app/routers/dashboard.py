@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from datetime import date
+from app import models, schemas
+from app.database import get_db
+from app.auth import get_current_user
+from app.cache import cached_analytics, dashboard_cache
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+# Tables the snapshot is built from; writes to them invalidate the cached snapshot
+DASHBOARD_TABLES = [
+    models.LifestyleFactor.__tablename__,
+    models.LifestyleFactorEntry.__tablename__,
+    models.WellbeingMetricEntry.__tablename__,
+]
+
+@router.get("/")
+@cached_analytics("dashboard", tables=DASHBOARD_TABLES, cache=dashboard_cache)
+def get_dashboard(
+    entry_date: date = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get everything the Dashboard page shows for a day in one response.
+
+    Replaces the separate factor list, categories, entries of the day and
+    wellbeing entries of the day requests: three queries in one session,
+    cached with an ETag until any of the data changes.
+
+    Args:
+        entry_date: Day to show (default: today)
+    """
+    if not entry_date:
+        entry_date = date.today()
+
+    # Every factor; archived ones only contribute categories
+    factors = db.query(models.LifestyleFactor).order_by(models.LifestyleFactor.created_at).all()
+
+    entries = db.query(models.LifestyleFactorEntry).filter(
+        models.LifestyleFactorEntry.date == entry_date
+    ).all()
+
+    wellbeing_entries = db.query(models.WellbeingMetricEntry).filter(
+        models.WellbeingMetricEntry.date == entry_date
+    ).order_by(models.WellbeingMetricEntry.time).all()
+
+    return {
+        "date": entry_date,
+        "lifestyle_factors": [schemas.LifestyleFactor.model_validate(factor) for factor in factors if factor.is_active],
+        "categories": sorted({factor.category for factor in factors if factor.category}),
+        "entries": [schemas.LifestyleFactorEntry.model_validate(entry) for entry in entries],
+        "wellbeing_entries": [schemas.WellbeingMetricEntry.model_validate(entry) for entry in wellbeing_entries],
+    }
@@ -1,86 +1,239 @@
-from fastapi import APIRouter, Depends, Response
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import LifestyleFactor, LifestyleFactorEntry, WellbeingMetricEntry
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal, QueryCounter
+from app.models import WELLBEING_METRIC_COLUMNS, LifestyleFactor, LifestyleFactorEntry, WellbeingMetricEntry, CBTThought
 from app.auth import get_current_user
 from datetime import datetime
 import csv
 import io
+import logging
+import zipfile
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
+logger = logging.getLogger(__name__)
 
-@router.get("/lifestyle-factors/export")
-async def export_lifestyle_factors(db: Session = Depends(get_db)):
-    """Export all lifestyle factors to CSV."""
-    lifestyle_factors = db.query(LifestyleFactor).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['id', 'name', 'description', 'color', 'icon', 'is_active', 'created_at'])
-    
-    # Write data
-    for lifestyle_factor in lifestyle_factors:
-        writer.writerow([
+# Rows fetched from the database and sent to the client per chunk when streaming exports
+EXPORT_CHUNK_ROWS = 500
+
+LIFESTYLE_FACTOR_HEADER = ['id', 'name', 'description', 'color', 'icon', 'category', 'is_active', 'created_at']
+LIFESTYLE_FACTOR_ENTRY_HEADER = ['id', 'lifestyle_factor_id', 'lifestyle_factor_name', 'date', 'completed', 'notes', 'created_at']
+WELLBEING_METRIC_ENTRY_HEADER = [
+    'id', 'date', 'time', *WELLBEING_METRIC_COLUMNS, 'notes', 'tags', 'created_at'
+]
+CBT_THOUGHT_HEADER = [
+    'id', 'date', 'time', 'negative_thought', 'distortions', 'alternative_thought',
+    'notes', 'intensity', 'created_at', 'updated_at'
+]
+
+
+async def _stream_csv(header, rows):
+    """Encode rows as CSV and yield them in chunks as they are produced."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # Send the header right away so the download starts immediately
+    writer.writerow(header)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    count = 0
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def _session_stream(description: str, produce):
+    """
+    Run a streaming producer with its own database session.
+
+    The response body is streamed after the request's dependencies are closed,
+    so streaming exports cannot use the session from get_async_db.
+    """
+    async with AsyncSessionLocal() as db:
+        query_counter = QueryCounter(db)
+        try:
+            async for chunk in produce(db):
+                yield chunk
+        finally:
+            logger.info("Exported %s with %d queries", description, query_counter.stop())
+
+
+async def _lifestyle_factor_rows(db: AsyncSession):
+    """Yield lifestyle factor CSV rows."""
+    query = select(LifestyleFactor).execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    async for lifestyle_factor in await db.stream_scalars(query):
+        yield [
             lifestyle_factor.id,
             lifestyle_factor.name,
             lifestyle_factor.description or '',
             lifestyle_factor.color,
             lifestyle_factor.icon or '',
+            lifestyle_factor.category or '',
             lifestyle_factor.is_active,
             lifestyle_factor.created_at.isoformat()
-        ])
-    
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=wellness_log_lifestyle_factors.csv"}
-    )
+        ]
 
 
-@router.get("/lifestyle-factors/entries/export")
-async def export_lifestyle_factor_entries(
-    start_date: str = None,
-    end_date: str = None,
-    db: Session = Depends(get_db)
-):
-    """Export lifestyle factor entries to CSV."""
-    query = db.query(LifestyleFactorEntry)
-    
+def _lifestyle_factor_entries_with_names(start_date: str = None, end_date: str = None):
+    """Select (entry, lifestyle factor name) pairs with a single join instead of a lookup per entry."""
+    query = select(LifestyleFactorEntry, LifestyleFactor.name).outerjoin(
+        LifestyleFactor, LifestyleFactor.id == LifestyleFactorEntry.lifestyle_factor_id
+    )
+
     if start_date:
-        query = query.filter(LifestyleFactorEntry.date >= start_date)
+        query = query.where(LifestyleFactorEntry.date >= start_date)
     if end_date:
-        query = query.filter(LifestyleFactorEntry.date <= end_date)
-    
-    entries = query.all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['id', 'lifestyle_factor_id', 'lifestyle_factor_name', 'date', 'completed', 'notes', 'created_at'])
-    
-    # Write data
-    for entry in entries:
-        lifestyle_factor = db.query(LifestyleFactor).filter(LifestyleFactor.id == entry.lifestyle_factor_id).first()
-        writer.writerow([
+        query = query.where(LifestyleFactorEntry.date <= end_date)
+
+    return query
+
+
+async def _lifestyle_factor_entry_rows(db: AsyncSession, start_date: str = None, end_date: str = None):
+    """Yield lifestyle factor entry CSV rows, reading the table in chunks."""
+    query = _lifestyle_factor_entries_with_names(start_date, end_date).execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    async for entry, lifestyle_factor_name in await db.stream(query):
+        yield [
             entry.id,
             entry.lifestyle_factor_id,
-            lifestyle_factor.name if lifestyle_factor else '',
+            lifestyle_factor_name or '',
             entry.date.isoformat(),
             entry.completed,
             entry.notes or '',
             entry.created_at.isoformat()
-        ])
-    
-    output.seek(0)
+        ]
+
+
+async def _wellbeing_metric_entry_rows(db: AsyncSession, start_date: str = None, end_date: str = None):
+    """Yield wellbeing metric entry CSV rows with every metric column, reading the table in chunks."""
+    query = select(WellbeingMetricEntry)
+
+    if start_date:
+        query = query.where(WellbeingMetricEntry.date >= start_date)
+    if end_date:
+        query = query.where(WellbeingMetricEntry.date <= end_date)
+
+    async for entry in await db.stream_scalars(query.execution_options(yield_per=EXPORT_CHUNK_ROWS)):
+        yield [
+            entry.id,
+            entry.date.isoformat(),
+            entry.time.isoformat() if entry.time else '',
+            *('' if getattr(entry, metric_name) is None else getattr(entry, metric_name)
+              for metric_name in WELLBEING_METRIC_COLUMNS),
+            entry.notes or '',
+            entry.tags or '',
+            entry.created_at.isoformat()
+        ]
+
+
+async def _cbt_thought_rows(db: AsyncSession):
+    """Yield CBT thought CSV rows, reading the table in chunks."""
+    query = select(CBTThought).execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    async for thought in await db.stream_scalars(query):
+        yield [
+            thought.id,
+            thought.date.isoformat(),
+            thought.time.isoformat() if thought.time else '',
+            thought.negative_thought,
+            thought.distortions or '',
+            thought.alternative_thought or '',
+            thought.notes or '',
+            thought.intensity if thought.intensity is not None else '',
+            thought.created_at.isoformat() if thought.created_at else '',
+            thought.updated_at.isoformat() if thought.updated_at else ''
+        ]
+
+
+class _ZipOutput:
+    """
+    Write-only, unseekable file object collecting the bytes zipfile produces.
+
+    Because it cannot seek, zipfile writes each member with a trailing data
+    descriptor instead of patching the local header afterwards, which lets the
+    archive be sent to the client while it is being written.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        """Return and forget everything written since the last drain."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _stream_zip(members):
+    """
+    Yield a ZIP archive of CSV files, compressing each table as its rows are read.
+
+    Compression runs in the threadpool so it does not block the event loop.
+
+    Args:
+        members: (filename, header, rows) tuples, one per CSV file in the archive
+    """
+    output = _ZipOutput()
+    created = datetime.now().timetuple()[:6]
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for filename, header, rows in members:
+            member_info = zipfile.ZipInfo(filename, date_time=created)
+            member_info.compress_type = zipfile.ZIP_DEFLATED
+            with zip_file.open(member_info, 'w') as member:
+                async for csv_chunk in _stream_csv(header, rows):
+                    await run_in_threadpool(member.write, csv_chunk.encode('utf-8'))
+                    data = output.drain()
+                    if data:
+                        yield data
+
+    # Remaining compressed data, data descriptors and the central directory
+    yield output.drain()
+
+
+@router.get("/lifestyle-factors/export")
+async def export_lifestyle_factors():
+    """Export all lifestyle factors to CSV."""
+    return StreamingResponse(
+        _session_stream(
+            "lifestyle factors",
+            lambda db: _stream_csv(LIFESTYLE_FACTOR_HEADER, _lifestyle_factor_rows(db))
+        ),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=wellness_log_lifestyle_factors.csv"}
+    )
+
+
+@router.get("/lifestyle-factors/entries/export")
+async def export_lifestyle_factor_entries(
+    start_date: str = None,
+    end_date: str = None
+):
+    """Export lifestyle factor entries to CSV, streamed as rows are read."""
     filename = f"lifestyle_factor_entries_export_{datetime.now().strftime('%Y%m%d')}.csv"
     return StreamingResponse(
-        iter([output.getvalue()]),
+        _session_stream(
+            "lifestyle factor entries",
+            lambda db: _stream_csv(
+                LIFESTYLE_FACTOR_ENTRY_HEADER, _lifestyle_factor_entry_rows(db, start_date, end_date)
+            )
+        ),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -89,106 +242,41 @@ async def export_lifestyle_factor_entries(
 @router.get("/wellbeing/export")
 async def export_wellbeing_metric_entries(
     start_date: str = None,
-    end_date: str = None,
-    db: Session = Depends(get_db)
+    end_date: str = None
 ):
-    """Export mood entries to CSV."""
-    query = db.query(WellbeingMetricEntry)
-    
-    if start_date:
-        query = query.filter(WellbeingMetricEntry.date >= start_date)
-    if end_date:
-        query = query.filter(WellbeingMetricEntry.date <= end_date)
-    
-    entries = query.all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow([
-        'id', 'date', 'time', 'mood_score', 'energy_level', 
-        'stress_level', 'notes', 'tags', 'created_at'
-    ])
-    
-    # Write data
-    for entry in entries:
-        writer.writerow([
-            entry.id,
-            entry.date.isoformat(),
-            entry.time.isoformat() if entry.time else '',
-            entry.mood_score,
-            entry.energy_level or '',
-            entry.stress_level or '',
-            entry.notes or '',
-            entry.tags or '',
-            entry.created_at.isoformat()
-        ])
-    
-    output.seek(0)
+    """Export mood entries to CSV, streamed as rows are read."""
     filename = f"wellbeing_metrics_export_{datetime.now().strftime('%Y%m%d')}.csv"
     return StreamingResponse(
-        iter([output.getvalue()]),
+        _session_stream(
+            "wellbeing metric entries",
+            lambda db: _stream_csv(
+                WELLBEING_METRIC_ENTRY_HEADER, _wellbeing_metric_entry_rows(db, start_date, end_date)
+            )
+        ),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
 @router.get("/export/all")
-async def export_all_data(db: Session = Depends(get_db)):
-    """Export all data (lifestyle factors, entries, mood) to a single CSV with multiple sheets concept."""
-    # For simplicity, we'll create a ZIP file with multiple CSVs
-    import zipfile
-    from io import BytesIO
-    
-    zip_buffer = BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Export lifestyle factors
-        lifestyle_factors = db.query(LifestyleFactor).all()
-        lifestyle_factors_csv = io.StringIO()
-        writer = csv.writer(lifestyle_factors_csv)
-        writer.writerow(['id', 'name', 'description', 'color', 'icon', 'is_active', 'created_at'])
-        for lifestyle_factor in lifestyle_factors:
-            writer.writerow([
-                lifestyle_factor.id, lifestyle_factor.name, lifestyle_factor.description or '', lifestyle_factor.color,
-                lifestyle_factor.icon or '', lifestyle_factor.is_active, lifestyle_factor.created_at.isoformat()
-            ])
-        zip_file.writestr('lifestyle_factors.csv', lifestyle_factors_csv.getvalue())
-        
-        # Export lifestyle factor entries
-        entries = db.query(LifestyleFactorEntry).all()
-        entries_csv = io.StringIO()
-        writer = csv.writer(entries_csv)
-        writer.writerow(['id', 'lifestyle_factor_id', 'lifestyle_factor_name', 'date', 'completed', 'notes', 'created_at'])
-        for entry in entries:
-            lifestyle_factor = db.query(LifestyleFactor).filter(LifestyleFactor.id == entry.lifestyle_factor_id).first()
-            writer.writerow([
-                entry.id, entry.lifestyle_factor_id, lifestyle_factor.name if lifestyle_factor else '',
-                entry.date.isoformat(), entry.completed, entry.notes or '',
-                entry.created_at.isoformat()
-            ])
-        zip_file.writestr('lifestyle_factor_entries.csv', entries_csv.getvalue())
-        
-        # Export mood entries
-        wellbeing_metric_entries = db.query(WellbeingMetricEntry).all()
-        mood_csv = io.StringIO()
-        writer = csv.writer(mood_csv)
-        writer.writerow(['id', 'date', 'time', 'mood_score', 'energy_level', 'stress_level', 'notes', 'tags', 'created_at'])
-        for entry in wellbeing_metric_entries:
-            writer.writerow([
-                entry.id, entry.date.isoformat(), entry.time.isoformat() if entry.time else '',
-                entry.mood_score, entry.energy_level or '', entry.stress_level or '',
-                entry.notes or '', entry.tags or '', entry.created_at.isoformat()
-            ])
-        zip_file.writestr('wellbeing_metric_entries.csv', mood_csv.getvalue())
-    
-    zip_buffer.seek(0)
+async def export_all_data():
+    """
+    Export all data (lifestyle factors, entries, mood, CBT thoughts) as a ZIP of CSV files.
+
+    The archive is streamed: each table is compressed as its rows are read and the
+    compressed chunks are sent right away, so memory use does not grow with the data.
+    """
     filename = f"wellness_log_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-    
     return StreamingResponse(
-        iter([zip_buffer.getvalue()]),
+        _session_stream(
+            "full backup",
+            lambda db: _stream_zip([
+                ('lifestyle_factors.csv', LIFESTYLE_FACTOR_HEADER, _lifestyle_factor_rows(db)),
+                ('lifestyle_factor_entries.csv', LIFESTYLE_FACTOR_ENTRY_HEADER, _lifestyle_factor_entry_rows(db)),
+                ('wellbeing_metric_entries.csv', WELLBEING_METRIC_ENTRY_HEADER, _wellbeing_metric_entry_rows(db)),
+                ('cbt_thoughts.csv', CBT_THOUGHT_HEADER, _cbt_thought_rows(db)),
+            ])
+        ),
         media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
-
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from typing import List
+import zipfile
+from app import schemas
+from app.database import get_db
+from app.auth import get_current_user
+from app.importer import (
+    read_csv,
+    import_lifestyle_factors,
+    import_lifestyle_factor_entries,
+    import_wellbeing_metric_entries,
+    import_cbt_thoughts,
+    import_backup,
+    import_legacy,
+)
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+@router.post("/lifestyle-factors", response_model=schemas.ImportResult)
+def import_lifestyle_factors_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Import lifestyle factors from a CSV produced by /export/lifestyle-factors/export"""
+    return import_lifestyle_factors(db, read_csv(file.file))
+
+
+@router.post("/lifestyle-factors/entries", response_model=schemas.ImportResult)
+def import_lifestyle_factor_entries_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Import lifestyle factor entries from a CSV produced by /export/lifestyle-factors/entries/export"""
+    return import_lifestyle_factor_entries(db, read_csv(file.file))
+
+
+@router.post("/wellbeing", response_model=schemas.ImportResult)
+def import_wellbeing_metric_entries_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Import wellbeing metric entries from a CSV produced by /export/wellbeing/export"""
+    return import_wellbeing_metric_entries(db, read_csv(file.file))
+
+
+@router.post("/cbt", response_model=schemas.ImportResult)
+def import_cbt_thoughts_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Import CBT thoughts from cbt_thoughts.csv of a backup"""
+    return import_cbt_thoughts(db, read_csv(file.file))
+
+
+@router.post("/all", response_model=List[schemas.ImportResult])
+def import_backup_zip(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Restore a ZIP backup produced by /export/export/all"""
+    try:
+        results = import_backup(db, file.file)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="File is not a ZIP backup")
+    return results
+
+
+@router.post("/legacy", response_model=List[schemas.ImportResult])
+def import_legacy_csv(
+    habits: UploadFile = File(...),
+    checkmarks: UploadFile = File(...),
+    include_archived: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Import habits and their completion history from legacy Habits.csv and Checkmarks.csv"""
+    return import_legacy(db, read_csv(habits.file), read_csv(checkmarks.file), include_archived)
@@ -1,42 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from app import models, schemas
-from app.database import get_db
+from app.database import get_async_db
 from app.auth import get_current_user
+from app.cache import bump_data_version
+from app.factor_stats import apply_entries, current_streaks, to_schema
+from app.completion_index import ENCODINGS, set_entries, year_calendar
+from app.pagination import DEFAULT_PAGE_SIZE, fetch_page, keyset_select, ndjson_response
+from app.sync import record_deletions
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
+# Most entries one batch request may write
+MAX_BATCH_ENTRIES = 1000
+
+# Entries per INSERT of a batch; each binds a few parameters, which keeps a
+# statement below SQLite's bound parameter limit (999 on older versions)
+BATCH_STATEMENT_ROWS = 100
+
 @router.post("/", response_model=schemas.LifestyleFactor)
-def create_lifestyle_factor(lifestyle_factor: schemas.LifestyleFactorCreate, db: Session = Depends(get_db)):
+async def create_lifestyle_factor(lifestyle_factor: schemas.LifestyleFactorCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new lifestyle factor to track"""
     db_lifestyle_factor = models.LifestyleFactor(**lifestyle_factor.model_dump())
     db.add(db_lifestyle_factor)
-    db.commit()
-    db.refresh(db_lifestyle_factor)
+    await db.run_sync(bump_data_version, models.LifestyleFactor.__tablename__)
+    await db.commit()
+    await db.refresh(db_lifestyle_factor)
     return db_lifestyle_factor
 
 @router.get("/", response_model=List[schemas.LifestyleFactor])
-def get_lifestyle_factors(include_inactive: bool = False, db: Session = Depends(get_db)):
+async def get_lifestyle_factors(include_inactive: bool = False, db: AsyncSession = Depends(get_async_db)):
     """Get all lifestyle factors"""
-    query = db.query(models.LifestyleFactor)
+    query = select(models.LifestyleFactor)
     if not include_inactive:
-        query = query.filter(models.LifestyleFactor.is_active == True)
-    return query.order_by(models.LifestyleFactor.created_at).all()
+        query = query.where(models.LifestyleFactor.is_active == True)
+    return (await db.scalars(query.order_by(models.LifestyleFactor.created_at))).all()
+
+@router.get("/stats", response_model=List[schemas.LifestyleFactorStats])
+async def get_all_lifestyle_factor_stats(include_inactive: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Get statistics for all lifestyle factors in one query"""
+    query = select(models.LifestyleFactor, models.LifestyleFactorStatsRecord).outerjoin(
+        models.LifestyleFactorStatsRecord,
+        models.LifestyleFactorStatsRecord.lifestyle_factor_id == models.LifestyleFactor.id
+    )
+    if not include_inactive:
+        query = query.where(models.LifestyleFactor.is_active == True)
+    
+    rows = (await db.execute(query.order_by(models.LifestyleFactor.created_at))).all()
+    streaks = await db.run_sync(current_streaks, [record for _, record in rows])
+    return [
+        to_schema(lifestyle_factor, record, streaks.get(lifestyle_factor.id, 0))
+        for lifestyle_factor, record in rows
+    ]
 
 @router.get("/{lifestyle_factor_id}", response_model=schemas.LifestyleFactor)
-def get_lifestyle_factor(lifestyle_factor_id: int, db: Session = Depends(get_db)):
+async def get_lifestyle_factor(lifestyle_factor_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific lifestyle factor"""
-    lifestyle_factor = db.query(models.LifestyleFactor).filter(models.LifestyleFactor.id == lifestyle_factor_id).first()
+    lifestyle_factor = await db.get(models.LifestyleFactor, lifestyle_factor_id)
     if not lifestyle_factor:
         raise HTTPException(status_code=404, detail="Lifestyle factor not found")
     return lifestyle_factor
 
 @router.put("/{lifestyle_factor_id}", response_model=schemas.LifestyleFactor)
-def update_lifestyle_factor(lifestyle_factor_id: int, lifestyle_factor_update: schemas.LifestyleFactorUpdate, db: Session = Depends(get_db)):
+async def update_lifestyle_factor(lifestyle_factor_id: int, lifestyle_factor_update: schemas.LifestyleFactorUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update a lifestyle factor"""
-    db_lifestyle_factor = db.query(models.LifestyleFactor).filter(models.LifestyleFactor.id == lifestyle_factor_id).first()
+    db_lifestyle_factor = await db.get(models.LifestyleFactor, lifestyle_factor_id)
     if not db_lifestyle_factor:
         raise HTTPException(status_code=404, detail="Lifestyle factor not found")
     
@@ -44,162 +76,222 @@ def update_lifestyle_factor(lifestyle_factor_id: int, lifestyle_factor_update: s
     for key, value in update_data.items():
         setattr(db_lifestyle_factor, key, value)
     
-    db.commit()
-    db.refresh(db_lifestyle_factor)
+    await db.run_sync(bump_data_version, models.LifestyleFactor.__tablename__)
+    await db.commit()
+    await db.refresh(db_lifestyle_factor)
     return db_lifestyle_factor
 
 @router.delete("/{lifestyle_factor_id}")
-def delete_lifestyle_factor(lifestyle_factor_id: int, db: Session = Depends(get_db)):
+async def delete_lifestyle_factor(lifestyle_factor_id: int, db: AsyncSession = Depends(get_async_db)):
     """Permanently delete a lifestyle factor and all its entries"""
-    db_lifestyle_factor = db.query(models.LifestyleFactor).filter(models.LifestyleFactor.id == lifestyle_factor_id).first()
+    db_lifestyle_factor = await db.get(models.LifestyleFactor, lifestyle_factor_id)
     if not db_lifestyle_factor:
         raise HTTPException(status_code=404, detail="Lifestyle factor not found")
     
-    # Delete all associated entries first
-    db.query(models.LifestyleFactorEntry).filter(models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor_id).delete()
+    # Leave tombstones for the factor and its entries so synced clients drop them
+    entry_ids = (await db.scalars(select(models.LifestyleFactorEntry.id).where(
+        models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor_id
+    ))).all()
+    record_deletions(db, models.LifestyleFactorEntry.__tablename__, entry_ids)
+    record_deletions(db, models.LifestyleFactor.__tablename__, [lifestyle_factor_id])
+    
+    # Delete all associated entries, their stats and completion bitmaps first
+    await db.execute(delete(models.LifestyleFactorEntry).where(models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor_id))
+    await db.execute(delete(models.LifestyleFactorStatsRecord).where(models.LifestyleFactorStatsRecord.lifestyle_factor_id == lifestyle_factor_id))
+    await db.execute(delete(models.LifestyleFactorCompletionBitmap).where(models.LifestyleFactorCompletionBitmap.lifestyle_factor_id == lifestyle_factor_id))
     
     # Delete the lifestyle factor itself
-    db.delete(db_lifestyle_factor)
-    db.commit()
+    await db.delete(db_lifestyle_factor)
+    await db.run_sync(bump_data_version, models.LifestyleFactor.__tablename__, models.LifestyleFactorEntry.__tablename__)
+    await db.commit()
     return {"message": "Lifestyle factor deleted successfully"}
 
 @router.post("/{lifestyle_factor_id}/archive", response_model=schemas.LifestyleFactor)
-def archive_lifestyle_factor(lifestyle_factor_id: int, db: Session = Depends(get_db)):
+async def archive_lifestyle_factor(lifestyle_factor_id: int, db: AsyncSession = Depends(get_async_db)):
     """Archive a lifestyle factor (set is_active to False)"""
-    db_lifestyle_factor = db.query(models.LifestyleFactor).filter(models.LifestyleFactor.id == lifestyle_factor_id).first()
+    db_lifestyle_factor = await db.get(models.LifestyleFactor, lifestyle_factor_id)
     if not db_lifestyle_factor:
         raise HTTPException(status_code=404, detail="Lifestyle factor not found")
     
     db_lifestyle_factor.is_active = False
-    db.commit()
-    db.refresh(db_lifestyle_factor)
+    await db.run_sync(bump_data_version, models.LifestyleFactor.__tablename__)
+    await db.commit()
+    await db.refresh(db_lifestyle_factor)
     return db_lifestyle_factor
 
 @router.post("/{lifestyle_factor_id}/unarchive", response_model=schemas.LifestyleFactor)
-def unarchive_lifestyle_factor(lifestyle_factor_id: int, db: Session = Depends(get_db)):
+async def unarchive_lifestyle_factor(lifestyle_factor_id: int, db: AsyncSession = Depends(get_async_db)):
     """Unarchive a lifestyle factor (set is_active to True)"""
-    db_lifestyle_factor = db.query(models.LifestyleFactor).filter(models.LifestyleFactor.id == lifestyle_factor_id).first()
+    db_lifestyle_factor = await db.get(models.LifestyleFactor, lifestyle_factor_id)
     if not db_lifestyle_factor:
         raise HTTPException(status_code=404, detail="Lifestyle factor not found")
     
     db_lifestyle_factor.is_active = True
-    db.commit()
-    db.refresh(db_lifestyle_factor)
+    await db.run_sync(bump_data_version, models.LifestyleFactor.__tablename__)
+    await db.commit()
+    await db.refresh(db_lifestyle_factor)
     return db_lifestyle_factor
 
 @router.get("/categories/list")
-def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: AsyncSession = Depends(get_async_db)):
     """Get all unique lifestyle factor categories"""
-    categories = db.query(models.LifestyleFactor.category).distinct().all()
+    categories = (await db.execute(select(models.LifestyleFactor.category).distinct())).all()
     return {"categories": [cat[0] for cat in categories if cat[0]]}
 
 
 @router.post("/entries", response_model=schemas.LifestyleFactorEntry)
-def create_lifestyle_factor_entry(entry: schemas.LifestyleFactorEntryCreate, db: Session = Depends(get_db)):
+async def create_lifestyle_factor_entry(entry: schemas.LifestyleFactorEntryCreate, db: AsyncSession = Depends(get_async_db)):
     """Create or update a lifestyle factor entry for a specific date"""
     # Check if entry already exists for this lifestyle factor and date
-    existing_entry = db.query(models.LifestyleFactorEntry).filter(
+    existing_entry = await db.scalar(select(models.LifestyleFactorEntry).where(
         models.LifestyleFactorEntry.lifestyle_factor_id == entry.lifestyle_factor_id,
         models.LifestyleFactorEntry.date == entry.date
-    ).first()
+    ))
     
     if existing_entry:
         existing_entry.completed = entry.completed
         existing_entry.notes = entry.notes
-        db.commit()
-        db.refresh(existing_entry)
-        return existing_entry
-    
-    db_entry = models.LifestyleFactorEntry(**entry.model_dump())
-    db.add(db_entry)
-    db.commit()
-    db.refresh(db_entry)
+        db_entry = existing_entry
+    else:
+        db_entry = models.LifestyleFactorEntry(**entry.model_dump())
+        db.add(db_entry)
+
+    changes = [(entry.lifestyle_factor_id, entry.date, entry.completed)]
+    await db.run_sync(apply_entries, changes)
+    await db.run_sync(set_entries, changes)
+    await db.run_sync(bump_data_version, models.LifestyleFactorEntry.__tablename__)
+    await db.commit()
+    await db.refresh(db_entry)
     return db_entry
 
+@router.post("/entries/batch", response_model=List[schemas.LifestyleFactorEntry])
+async def upsert_lifestyle_factor_entries(entries: List[schemas.LifestyleFactorEntryCreate], db: AsyncSession = Depends(get_async_db)):
+    """
+    Create or update several lifestyle factor entries in one transaction.
+    
+    Used by the dashboard check-ins and offline sync: the items are written
+    with INSERT ... ON CONFLICT (lifestyle_factor_id, date) DO UPDATE, in
+    chunks of BATCH_STATEMENT_ROWS, and one commit. If an item appears twice,
+    the last one wins. At most MAX_BATCH_ENTRIES items are accepted (413).
+    """
+    if len(entries) > MAX_BATCH_ENTRIES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ENTRIES} entries per batch")
+    
+    # Keep the last item per (lifestyle factor, date), in request order
+    items = {}
+    for entry in entries:
+        items[(entry.lifestyle_factor_id, entry.date)] = entry.model_dump()
+    if not items:
+        return []
+    
+    insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    values = list(items.values())
+    rows = []
+    for start in range(0, len(values), BATCH_STATEMENT_ROWS):
+        statement = insert(models.LifestyleFactorEntry).values(values[start:start + BATCH_STATEMENT_ROWS])
+        statement = statement.on_conflict_do_update(
+            index_elements=[models.LifestyleFactorEntry.lifestyle_factor_id, models.LifestyleFactorEntry.date],
+            set_={
+                "completed": statement.excluded.completed,
+                "notes": statement.excluded.notes,
+                # ON CONFLICT updates don't apply the column's onupdate
+                "updated_at": datetime.utcnow(),
+            }
+        )
+        rows += (await db.scalars(
+            statement.returning(models.LifestyleFactorEntry),
+            execution_options={"populate_existing": True}
+        )).all()
+    changes = [(item["lifestyle_factor_id"], item["date"], item["completed"]) for item in items.values()]
+    await db.run_sync(apply_entries, changes)
+    await db.run_sync(set_entries, changes)
+    await db.run_sync(bump_data_version, models.LifestyleFactorEntry.__tablename__)
+    await db.commit()
+    
+    rows_by_key = {(row.lifestyle_factor_id, row.date): row for row in rows}
+    return [rows_by_key[key] for key in items]
+
 @router.get("/entries/range", response_model=List[schemas.LifestyleFactorEntry])
-def get_lifestyle_factor_entries_range(
+async def get_lifestyle_factor_entries_range(
+    response: Response,
     start_date: date,
     end_date: date,
     lifestyle_factor_id: int = None,
-    db: Session = Depends(get_db)
+    limit: int = None,
+    cursor: str = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get lifestyle factor entries for a date range"""
-    query = db.query(models.LifestyleFactorEntry).filter(
+    """
+    Get lifestyle factor entries for a date range, oldest first
+
+    Without a limit every entry of the range is returned. With one, entries
+    are paged by (date, id) and the X-Next-Cursor header holds the cursor of
+    the next page while more follow. stream=true returns every entry after
+    the cursor as NDJSON instead.
+    """
+    query = select(models.LifestyleFactorEntry).where(
         models.LifestyleFactorEntry.date >= start_date,
         models.LifestyleFactorEntry.date <= end_date
     )
     
     if lifestyle_factor_id:
-        query = query.filter(models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor_id)
+        query = query.where(models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor_id)
     
-    return query.order_by(models.LifestyleFactorEntry.date).all()
+    key = [models.LifestyleFactorEntry.date, models.LifestyleFactorEntry.id]
+    if stream:
+        return ndjson_response(query, key, schemas.LifestyleFactorEntry, cursor)
+    if limit is None and cursor is None:
+        return (await db.scalars(keyset_select(query, key))).all()
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    return await fetch_page(db, response, query, key, cursor, limit)
+
+@router.get("/entries/calendar")
+async def get_lifestyle_factor_calendar(
+    year: int = None,
+    encoding: str = "base64",
+    include_inactive: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the completion calendar of all lifestyle factors for a year.
+    
+    Each factor's days come as two bitsets (days with an entry, days completed)
+    from the completion index, encoded as base64 or run lengths.
+    """
+    if encoding not in ENCODINGS:
+        raise HTTPException(status_code=400, detail=f"Invalid encoding: {encoding}")
+    if not year:
+        year = date.today().year
+    
+    factors_query = select(models.LifestyleFactor)
+    if not include_inactive:
+        factors_query = factors_query.where(models.LifestyleFactor.is_active == True)
+    lifestyle_factors = (await db.scalars(factors_query.order_by(models.LifestyleFactor.created_at))).all()
+    bitmaps = (await db.scalars(select(models.LifestyleFactorCompletionBitmap).where(
+        models.LifestyleFactorCompletionBitmap.year == year
+    ))).all()
+    
+    return year_calendar(bitmaps, lifestyle_factors, year, encoding)
 
 @router.get("/entries/date/{entry_date}", response_model=List[schemas.LifestyleFactorEntry])
-def get_lifestyle_factor_entries_by_date(entry_date: date, db: Session = Depends(get_db)):
+async def get_lifestyle_factor_entries_by_date(entry_date: date, db: AsyncSession = Depends(get_async_db)):
     """Get all lifestyle factor entries for a specific date"""
-    return db.query(models.LifestyleFactorEntry).filter(
+    return (await db.scalars(select(models.LifestyleFactorEntry).where(
         models.LifestyleFactorEntry.date == entry_date
-    ).all()
+    ))).all()
 
 @router.get("/{lifestyle_factor_id}/stats", response_model=schemas.LifestyleFactorStats)
-def get_lifestyle_factor_stats(lifestyle_factor_id: int, db: Session = Depends(get_db)):
+async def get_lifestyle_factor_stats(lifestyle_factor_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get statistics for a specific lifestyle factor"""
-    lifestyle_factor = db.query(models.LifestyleFactor).filter(models.LifestyleFactor.id == lifestyle_factor_id).first()
+    lifestyle_factor = await db.get(models.LifestyleFactor, lifestyle_factor_id)
     if not lifestyle_factor:
         raise HTTPException(status_code=404, detail="Lifestyle factor not found")
     
-    entries = db.query(models.LifestyleFactorEntry).filter(
-        models.LifestyleFactorEntry.lifestyle_factor_id == lifestyle_factor_id
-    ).order_by(models.LifestyleFactorEntry.date).all()
-    
-    if not entries:
-        return schemas.LifestyleFactorStats(
-            lifestyle_factor_id=lifestyle_factor_id,
-            lifestyle_factor_name=lifestyle_factor.name,
-            total_days=0,
-            completed_days=0,
-            completion_rate=0.0,
-            current_streak=0,
-            longest_streak=0
-        )
-    
-    completed_entries = [e for e in entries if e.completed]
-    total_days = len(entries)
-    completed_days = len(completed_entries)
-    completion_rate = (completed_days / total_days * 100) if total_days > 0 else 0
-    
-    # Calculate streaks
-    current_streak = 0
-    longest_streak = 0
-    temp_streak = 0
-    
-    # Sort by date
-    sorted_entries = sorted(entries, key=lambda x: x.date)
-    
-    for i, entry in enumerate(sorted_entries):
-        if entry.completed:
-            temp_streak += 1
-            longest_streak = max(longest_streak, temp_streak)
-        else:
-            temp_streak = 0
-    
-    # Calculate current streak (from today backwards)
-    today = date.today()
-    for entry in reversed(sorted_entries):
-        if entry.date > today:
-            continue
-        if entry.completed and (today - entry.date).days <= len(sorted_entries):
-            current_streak += 1
-        else:
-            break
-    
-    return schemas.LifestyleFactorStats(
-        lifestyle_factor_id=lifestyle_factor_id,
-        lifestyle_factor_name=lifestyle_factor.name,
-        total_days=total_days,
-        completed_days=completed_days,
-        completion_rate=round(completion_rate, 2),
-        current_streak=current_streak,
-        longest_streak=longest_streak
-    )
-
+    # Totals and streaks are kept up to date by the entry writes
+    record = await db.scalar(select(models.LifestyleFactorStatsRecord).where(
+        models.LifestyleFactorStatsRecord.lifestyle_factor_id == lifestyle_factor_id
+    ))
+    streaks = await db.run_sync(current_streaks, [record])
+    return to_schema(lifestyle_factor, record, streaks.get(lifestyle_factor_id, 0))
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.auth import get_current_user
+from app.sync import changes_since, decode_since
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+@router.get("/")
+def get_changes(
+    since: str = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get the rows changed and deleted since a sync cursor.
+
+    Returns the lifestyle factors, lifestyle factor entries, wellbeing metric
+    entries and CBT thoughts created or updated since the cursor, the ids
+    deleted since then per table, and the cursor for the next sync. Without
+    a cursor, or with one older than the tombstone retention, everything is
+    returned with "full": true. See app/sync.py.
+
+    Args:
+        since: Cursor returned by the previous sync
+    """
+    return changes_since(db, decode_since(since))
@@ -1,104 +1,151 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import date, datetime
 from app import models, schemas
-from app.database import get_db
+from app.database import get_async_db
 from app.auth import get_current_user
+from app.cache import bump_data_version
+from app.pagination import fetch_page, ndjson_response
+from app.sync import record_deletions
+from app.wellbeing_rollup import SUMMARY_GROUPINGS, apply_entry, summary_select
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
 @router.post("/", response_model=schemas.WellbeingMetricEntry)
-def create_wellbeing_metric_entry(entry: schemas.WellbeingMetricEntryCreate, db: Session = Depends(get_db)):
+async def create_wellbeing_metric_entry(entry: schemas.WellbeingMetricEntryCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new mood entry"""
     db_entry = models.WellbeingMetricEntry(
         **entry.model_dump(),
         time=datetime.utcnow()
     )
     db.add(db_entry)
-    db.commit()
-    db.refresh(db_entry)
+    await db.run_sync(apply_entry, db_entry)
+    await db.run_sync(bump_data_version, models.WellbeingMetricEntry.__tablename__)
+    await db.commit()
+    await db.refresh(db_entry)
     return db_entry
 
 @router.get("/", response_model=List[schemas.WellbeingMetricEntry])
-def get_wellbeing_metric_entries(
+async def get_wellbeing_metric_entries(
+    response: Response,
     start_date: date = None,
     end_date: date = None,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get mood entries with optional date filtering"""
-    query = db.query(models.WellbeingMetricEntry)
+    """
+    Get mood entries with optional date filtering, newest first
+
+    Pages by (date, id): when more entries follow, the X-Next-Cursor header
+    holds the cursor of the next page. stream=true returns every matching
+    entry after the cursor as NDJSON instead, ignoring limit.
+    """
+    query = select(models.WellbeingMetricEntry)
     
     if start_date:
-        query = query.filter(models.WellbeingMetricEntry.date >= start_date)
+        query = query.where(models.WellbeingMetricEntry.date >= start_date)
     if end_date:
-        query = query.filter(models.WellbeingMetricEntry.date <= end_date)
+        query = query.where(models.WellbeingMetricEntry.date <= end_date)
     
-    return query.order_by(models.WellbeingMetricEntry.date.desc()).limit(limit).all()
+    key = [models.WellbeingMetricEntry.date, models.WellbeingMetricEntry.id]
+    if stream:
+        return ndjson_response(query, key, schemas.WellbeingMetricEntry, cursor, descending=True)
+    return await fetch_page(db, response, query, key, cursor, limit, descending=True)
 
 @router.get("/{entry_id}", response_model=schemas.WellbeingMetricEntry)
-def get_wellbeing_metric_entry(entry_id: int, db: Session = Depends(get_db)):
+async def get_wellbeing_metric_entry(entry_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific mood entry"""
-    entry = db.query(models.WellbeingMetricEntry).filter(models.WellbeingMetricEntry.id == entry_id).first()
+    entry = await db.get(models.WellbeingMetricEntry, entry_id)
     if not entry:
         raise HTTPException(status_code=404, detail="Mood entry not found")
     return entry
 
 @router.get("/date/{entry_date}", response_model=List[schemas.WellbeingMetricEntry])
-def get_wellbeing_metric_entries_by_date(entry_date: date, db: Session = Depends(get_db)):
+async def get_wellbeing_metric_entries_by_date(entry_date: date, db: AsyncSession = Depends(get_async_db)):
     """Get all mood entries for a specific date"""
-    return db.query(models.WellbeingMetricEntry).filter(
+    return (await db.scalars(select(models.WellbeingMetricEntry).where(
         models.WellbeingMetricEntry.date == entry_date
-    ).order_by(models.WellbeingMetricEntry.time).all()
+    ).order_by(models.WellbeingMetricEntry.time))).all()
 
 @router.put("/{entry_id}", response_model=schemas.WellbeingMetricEntry)
-def update_wellbeing_metric_entry(
+async def update_wellbeing_metric_entry(
     entry_id: int,
     entry_update: schemas.WellbeingMetricEntryUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a mood entry"""
-    db_entry = db.query(models.WellbeingMetricEntry).filter(models.WellbeingMetricEntry.id == entry_id).first()
+    db_entry = await db.get(models.WellbeingMetricEntry, entry_id)
     if not db_entry:
         raise HTTPException(status_code=404, detail="Mood entry not found")
     
+    # Move the entry's contribution in the daily rollup from the old to the new values
+    await db.run_sync(apply_entry, db_entry, -1)
     update_data = entry_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_entry, key, value)
+    await db.run_sync(apply_entry, db_entry)
     
-    db.commit()
-    db.refresh(db_entry)
+    await db.run_sync(bump_data_version, models.WellbeingMetricEntry.__tablename__)
+    await db.commit()
+    await db.refresh(db_entry)
     return db_entry
 
 @router.delete("/{entry_id}")
-def delete_wellbeing_metric_entry(entry_id: int, db: Session = Depends(get_db)):
+async def delete_wellbeing_metric_entry(entry_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a mood entry"""
-    db_entry = db.query(models.WellbeingMetricEntry).filter(models.WellbeingMetricEntry.id == entry_id).first()
+    db_entry = await db.get(models.WellbeingMetricEntry, entry_id)
     if not db_entry:
         raise HTTPException(status_code=404, detail="Mood entry not found")
     
-    db.delete(db_entry)
-    db.commit()
+    await db.run_sync(apply_entry, db_entry, -1)
+    record_deletions(db, models.WellbeingMetricEntry.__tablename__, [entry_id])
+    await db.delete(db_entry)
+    await db.run_sync(bump_data_version, models.WellbeingMetricEntry.__tablename__)
+    await db.commit()
     return {"message": "Mood entry deleted successfully"}
 
+def _round(value):
+    """Round an average to two decimals; metrics never recorded stay None"""
+    return round(value, 2) if value is not None else None
+
 @router.get("/stats/summary", response_model=schemas.WellbeingMetricStats)
-def get_mood_stats(
+async def get_mood_stats(
     start_date: date = None,
     end_date: date = None,
-    db: Session = Depends(get_db)
+    group_by: str = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get mood statistics for a date range"""
-    query = db.query(models.WellbeingMetricEntry)
-    
-    if start_date:
-        query = query.filter(models.WellbeingMetricEntry.date >= start_date)
-    if end_date:
-        query = query.filter(models.WellbeingMetricEntry.date <= end_date)
-    
-    entries = query.all()
-    
-    if not entries:
+    """
+    Get mood statistics for a date range
+
+    Averages, counts and the date range are aggregated in SQL from the daily
+    rollup. With group_by=week (weeks starting on Monday) or group_by=month
+    the response also lists the same statistics per period.
+    """
+    if group_by is not None and group_by not in SUMMARY_GROUPINGS:
+        raise HTTPException(status_code=400, detail=f"Invalid group_by: {group_by}")
+    
+    summary = (await db.execute(summary_select(start_date, end_date))).one()
+    
+    periods = None
+    if group_by:
+        periods = [
+            schemas.WellbeingMetricPeriodStats(
+                period_start=row.period_start,
+                total_entries=row.total_entries,
+                averages={
+                    metric_name: _round(getattr(row, metric_name))
+                    for metric_name in models.WELLBEING_METRIC_COLUMNS
+                }
+            )
+            for row in await db.execute(summary_select(start_date, end_date, group_by))
+        ]
+    
+    if not summary.total_entries:
         return schemas.WellbeingMetricStats(
             average_mood=0.0,
             average_energy=None,
@@ -111,56 +158,25 @@ def get_mood_stats(
             average_sweating=None,
             average_libido=None,
             total_entries=0,
-            date_range={"start": None, "end": None}
+            date_range={"start": None, "end": None},
+            periods=periods
         )
     
-    total_entries = len(entries)
-    avg_mood = sum(e.mood_score for e in entries) / total_entries
-    
-    energy_entries = [e.energy_level for e in entries if e.energy_level is not None]
-    avg_energy = sum(energy_entries) / len(energy_entries) if energy_entries else None
-    
-    stress_entries = [e.stress_level for e in entries if e.stress_level is not None]
-    avg_stress = sum(stress_entries) / len(stress_entries) if stress_entries else None
-    
-    anxiety_entries = [e.anxiety_level for e in entries if e.anxiety_level is not None]
-    avg_anxiety = sum(anxiety_entries) / len(anxiety_entries) if anxiety_entries else None
-    
-    rumination_entries = [e.rumination_level for e in entries if e.rumination_level is not None]
-    avg_rumination = sum(rumination_entries) / len(rumination_entries) if rumination_entries else None
-    
-    anger_entries = [e.anger_level for e in entries if e.anger_level is not None]
-    avg_anger = sum(anger_entries) / len(anger_entries) if anger_entries else None
-    
-    general_health_entries = [e.general_health for e in entries if e.general_health is not None]
-    avg_general_health = sum(general_health_entries) / len(general_health_entries) if general_health_entries else None
-    
-    sleep_quality_entries = [e.sleep_quality for e in entries if e.sleep_quality is not None]
-    avg_sleep_quality = sum(sleep_quality_entries) / len(sleep_quality_entries) if sleep_quality_entries else None
-    
-    sweating_entries = [e.sweating_level for e in entries if e.sweating_level is not None]
-    avg_sweating = sum(sweating_entries) / len(sweating_entries) if sweating_entries else None
-    
-    libido_entries = [e.libido_level for e in entries if e.libido_level is not None]
-    avg_libido = sum(libido_entries) / len(libido_entries) if libido_entries else None
-    
-    dates = [e.date for e in entries]
-    
     return schemas.WellbeingMetricStats(
-        average_mood=round(avg_mood, 2),
-        average_energy=round(avg_energy, 2) if avg_energy else None,
-        average_stress=round(avg_stress, 2) if avg_stress else None,
-        average_anxiety=round(avg_anxiety, 2) if avg_anxiety else None,
-        average_rumination=round(avg_rumination, 2) if avg_rumination else None,
-        average_anger=round(avg_anger, 2) if avg_anger else None,
-        average_general_health=round(avg_general_health, 2) if avg_general_health else None,
-        average_sleep_quality=round(avg_sleep_quality, 2) if avg_sleep_quality else None,
-        average_sweating=round(avg_sweating, 2) if avg_sweating else None,
-        average_libido=round(avg_libido, 2) if avg_libido else None,
-        total_entries=total_entries,
+        average_mood=_round(summary.mood_score) or 0.0,
+        average_energy=_round(summary.energy_level),
+        average_stress=_round(summary.stress_level),
+        average_anxiety=_round(summary.anxiety_level),
+        average_rumination=_round(summary.rumination_level),
+        average_anger=_round(summary.anger_level),
+        average_general_health=_round(summary.general_health),
+        average_sleep_quality=_round(summary.sleep_quality),
+        average_sweating=_round(summary.sweating_level),
+        average_libido=_round(summary.libido_level),
+        total_entries=summary.total_entries,
         date_range={
-            "start": str(min(dates)),
-            "end": str(max(dates))
-        }
+            "start": str(summary.start),
+            "end": str(summary.end)
+        },
+        periods=periods
     )
-
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 # Lifestyle Factor Schemas
 class LifestyleFactorBase(BaseModel):
@@ -24,6 +24,7 @@ class LifestyleFactorUpdate(BaseModel):
 class LifestyleFactor(LifestyleFactorBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
     is_active: bool
     
     class Config:
@@ -46,6 +47,7 @@ class LifestyleFactorEntryUpdate(BaseModel):
 class LifestyleFactorEntry(LifestyleFactorEntryBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -90,6 +92,7 @@ class WellbeingMetricEntry(WellbeingMetricEntryBase):
     id: int
     time: datetime
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -123,6 +126,12 @@ class LifestyleFactorStats(BaseModel):
     completion_rate: float
     current_streak: int
     longest_streak: int
+    last_completed_date: Optional[date] = None
+
+class WellbeingMetricPeriodStats(BaseModel):
+    period_start: date
+    total_entries: int
+    averages: Dict[str, Optional[float]]
 
 class WellbeingMetricStats(BaseModel):
     average_mood: float
@@ -137,6 +146,7 @@ class WellbeingMetricStats(BaseModel):
     average_libido: Optional[float]
     total_entries: int
     date_range: dict
+    periods: Optional[List[WellbeingMetricPeriodStats]] = None
 
 # Authentication Schemas
 class Token(BaseModel):
@@ -191,3 +201,10 @@ class CBTThought(CBTThoughtBase):
     class Config:
         from_attributes = True
 
+# Import Schemas
+class ImportResult(BaseModel):
+    """Outcome of importing one table"""
+    table: str
+    inserted: int
+    updated: int
+    skipped: int
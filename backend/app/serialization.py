@@ -0,0 +1,46 @@
+"""
+Fast JSON serialization for API responses.
+
+FastJSONResponse is the application's default response class: FastAPI
+validates and serializes response models with pydantic-core, and the result
+is encoded with orjson instead of json.dumps.
+
+Trend and correlation responses can hold one record per day for several
+years. Building them with DataFrame.iterrows() boxes every value and rounds
+and NaN-checks them one at a time; here rounding and NaN masking happen
+column-wise on NumPy arrays, records are zipped together from plain Python
+lists and the result is encoded with orjson instead of jsonable_encoder +
+json.dumps.
+"""
+from typing import Any, Dict, List
+import numpy as np
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as JSON; types orjson doesn't know (Pydantic models) go through jsonable_encoder."""
+    return orjson.dumps(content, default=jsonable_encoder, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rounded(values: np.ndarray, decimals: int) -> np.ndarray:
+    """Round a float array, with None where it is NaN (ready for `records`)."""
+    result = np.round(values, decimals).astype(object)
+    result[np.isnan(values)] = None
+    return result
+
+
+def records(columns: Dict[str, np.ndarray]) -> List[dict]:
+    """Turn equally long columns into a list of {name: value} records."""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(np.asarray(column).tolist() for column in columns.values()))]
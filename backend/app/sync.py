@@ -0,0 +1,95 @@
+"""
+Delta sync for offline clients.
+
+Instead of refetching every list, a client that keeps a local copy of the
+data can hold a cursor and ask /api/sync for the rows changed since then.
+Synced tables carry an updated_at column that is maintained on every write.
+Deletes leave a DeletedRecord tombstone, because a deleted row can't be found
+by its timestamp. Deleting a lifestyle factor leaves tombstones for its
+entries too.
+
+A cursor is the time a sync started, minus SYNC_OVERLAP_SECONDS. A write
+gets its timestamp before its transaction commits, so without the overlap a
+write committed while a sync ran could be missed. Rows inside the overlap
+are sent twice; clients apply changes by id, so that is harmless.
+
+Tombstones are kept for SYNC_RETENTION_DAYS. A cursor older than that (or
+no cursor) gets a full snapshot, flagged with "full", and the client
+replaces its data instead of merging.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.pagination import decode_cursor, encode_cursor
+
+SYNC_OVERLAP_SECONDS = 5
+
+SYNC_RETENTION_DAYS = 90
+
+# Synced tables: response key (the table name) -> (model, response schema)
+SYNCED_MODELS = {
+    model.__tablename__: (model, schema)
+    for model, schema in (
+        (models.LifestyleFactor, schemas.LifestyleFactor),
+        (models.LifestyleFactorEntry, schemas.LifestyleFactorEntry),
+        (models.WellbeingMetricEntry, schemas.WellbeingMetricEntry),
+        (models.CBTThought, schemas.CBTThought),
+    )
+}
+
+
+def record_deletions(db, table_name: str, record_ids: Iterable[int]) -> None:
+    """
+    Add tombstones for deleted rows of a synced table.
+
+    Works with sync and async sessions. Call before committing the delete.
+    """
+    db.add_all([models.DeletedRecord(table_name=table_name, record_id=record_id) for record_id in record_ids])
+
+
+def prune_deleted_records(db: Session) -> int:
+    """Drop tombstones older than the retention period. Returns the number dropped."""
+    cutoff = datetime.utcnow() - timedelta(days=SYNC_RETENTION_DAYS)
+    removed = db.execute(delete(models.DeletedRecord).where(models.DeletedRecord.deleted_at < cutoff)).rowcount
+    db.commit()
+    return removed
+
+
+def decode_since(since: Optional[str]) -> Optional[datetime]:
+    """Decode a sync cursor; 400 when it is malformed."""
+    if not since:
+        return None
+    return decode_cursor(since, [models.DeletedRecord.deleted_at])[0]
+
+
+def changes_since(db: Session, since: Optional[datetime]) -> dict:
+    """
+    Collect the rows changed and deleted since a cursor time (everything when None or expired).
+    """
+    started_at = datetime.utcnow()
+    full = since is None or since < started_at - timedelta(days=SYNC_RETENTION_DAYS)
+
+    changes = {
+        "cursor": encode_cursor([started_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)]),
+        "full": full,
+    }
+    for table_name, (model, schema) in SYNCED_MODELS.items():
+        query = select(model).order_by(model.id)
+        if not full:
+            query = query.where(model.updated_at >= since)
+        changes[table_name] = [schema.model_validate(row) for row in db.scalars(query)]
+
+    deleted = {table_name: [] for table_name in SYNCED_MODELS}
+    if not full:
+        tombstones = db.execute(
+            select(models.DeletedRecord.table_name, models.DeletedRecord.record_id)
+            .where(models.DeletedRecord.deleted_at >= since)
+            .order_by(models.DeletedRecord.id)
+        )
+        for table_name, record_id in tombstones:
+            if table_name in deleted:
+                deleted[table_name].append(record_id)
+    changes["deleted"] = deleted
+    return changes
@@ -0,0 +1,168 @@
+"""
+Incrementally maintained daily rollup of wellbeing metric entries.
+
+Every analytics endpoint needs the per-day average of each metric. Instead of
+loading every WellbeingMetricEntry and running a pandas groupby on each
+request, the per-day sums and counts are stored in WellbeingDailyAggregate and
+adjusted by the create/update/delete handlers in the same transaction as the
+entry itself. Readers then only touch one row per day.
+"""
+from datetime import date
+from typing import Iterable, Optional, Sequence
+from sqlalchemy import Date, Select, case, cast, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.database import IS_SQLITE
+from app.models import WELLBEING_METRIC_COLUMNS, WellbeingDailyAggregate, WellbeingMetricEntry
+
+SUMMARY_GROUPINGS = ("week", "month")
+
+
+def apply_entry(db: Session, entry: WellbeingMetricEntry, sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) an entry's values from its day's rollup.
+
+    Must be called before the session is committed so the rollup and the entry
+    are written in the same transaction. Call with sign=-1 before changing or
+    deleting an entry and with sign=1 after creating or changing it.
+
+    Each call is a single atomic statement that adds to the stored sums and
+    counts, so concurrent writes to the same day can't overwrite each other.
+    """
+    table = WellbeingDailyAggregate.__table__
+    deltas = {"entry_count": sign}
+    for metric_name in WELLBEING_METRIC_COLUMNS:
+        value = getattr(entry, metric_name)
+        if value is not None:
+            deltas[f"{metric_name}_sum"] = sign * value
+            deltas[f"{metric_name}_count"] = sign
+
+    if sign > 0:
+        # A new day starts from zero for the metrics the entry doesn't record
+        row = {f"{metric_name}_{part}": 0 for metric_name in WELLBEING_METRIC_COLUMNS for part in ("sum", "count")}
+        insert_statement = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        statement = insert_statement(table).values({**row, **deltas, "date": entry.date})
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.date],
+            set_={name: table.c[name] + statement.excluded[name] for name in deltas}
+        ))
+    else:
+        db.execute(
+            update(table)
+            .where(table.c.date == entry.date)
+            .values({name: table.c[name] + delta for name, delta in deltas.items()})
+        )
+        # Drop days that no longer have any entry
+        db.execute(delete(table).where(table.c.date == entry.date, table.c.entry_count <= 0))
+
+
+def rebuild_daily_aggregates(db: Session, dates: Optional[Iterable[date]] = None) -> int:
+    """
+    Recompute the rollup of the given days (all when None) from the raw entries with a single INSERT ... SELECT.
+
+    Returns the number of rebuilt days that have entries. The caller commits.
+    """
+    columns = ["date", "entry_count"]
+    aggregates = [WellbeingMetricEntry.date, func.count(WellbeingMetricEntry.id)]
+    for metric_name in WELLBEING_METRIC_COLUMNS:
+        column = getattr(WellbeingMetricEntry, metric_name)
+        columns += [f"{metric_name}_sum", f"{metric_name}_count"]
+        aggregates += [func.coalesce(func.sum(column), 0), func.count(column)]
+
+    delete_query = delete(WellbeingDailyAggregate)
+    entries_query = select(*aggregates).group_by(WellbeingMetricEntry.date)
+    count_query = db.query(WellbeingDailyAggregate)
+    if dates is not None:
+        dates = list(dates)
+        delete_query = delete_query.where(WellbeingDailyAggregate.date.in_(dates))
+        entries_query = entries_query.where(WellbeingMetricEntry.date.in_(dates))
+        count_query = count_query.filter(WellbeingDailyAggregate.date.in_(dates))
+
+    db.execute(delete_query)
+    db.execute(insert(WellbeingDailyAggregate).from_select(columns, entries_query))
+    return count_query.count()
+
+
+def ensure_daily_aggregates(db: Session) -> None:
+    """Build the rollup for databases created before it existed."""
+    if db.query(WellbeingDailyAggregate.id).first() is not None:
+        return
+    if db.query(WellbeingMetricEntry.id).first() is None:
+        return
+    rebuild_daily_aggregates(db)
+    db.commit()
+
+
+def daily_means_select(
+    metric_names: Sequence[str],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Select:
+    """
+    Select (date, mean_1, ..., mean_m) rows, one per day, ordered by date.
+
+    A mean is None on days where that metric was never recorded.
+    """
+    columns = [WellbeingDailyAggregate.date]
+    for metric_name in metric_names:
+        metric_sum = getattr(WellbeingDailyAggregate, f"{metric_name}_sum")
+        metric_count = getattr(WellbeingDailyAggregate, f"{metric_name}_count")
+        columns.append(
+            case((metric_count > 0, metric_sum / metric_count), else_=None).label(metric_name)
+        )
+
+    query = select(*columns)
+    if start_date:
+        query = query.where(WellbeingDailyAggregate.date >= start_date)
+    if end_date:
+        query = query.where(WellbeingDailyAggregate.date <= end_date)
+
+    return query.order_by(WellbeingDailyAggregate.date)
+
+
+def _period_start(group_by: str):
+    """SQL expression for the first day of the week (Monday) or month of a rollup row."""
+    column = WellbeingDailyAggregate.date
+    if IS_SQLITE:
+        if group_by == "week":
+            # 'weekday 0' moves forward to Sunday (or stays on it); six days back is Monday
+            return func.date(column, "weekday 0", "-6 days", type_=Date)
+        return func.date(column, "start of month", type_=Date)
+    return cast(func.date_trunc(group_by, column), Date)
+
+
+def summary_select(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    group_by: Optional[str] = None,
+) -> Select:
+    """
+    Select entry count, first and last date and the mean of every metric from the rollup.
+
+    Without group_by this is a single row for the whole range (with a None
+    entry count when it is empty); with group_by "week" or "month" the row
+    starts with the period's first day and there is one row per period,
+    ordered by it. Means are None where a metric was never recorded.
+    """
+    columns = [
+        func.sum(WellbeingDailyAggregate.entry_count).label("total_entries"),
+        func.min(WellbeingDailyAggregate.date).label("start"),
+        func.max(WellbeingDailyAggregate.date).label("end"),
+    ]
+    for metric_name in WELLBEING_METRIC_COLUMNS:
+        metric_sum = getattr(WellbeingDailyAggregate, f"{metric_name}_sum")
+        metric_count = getattr(WellbeingDailyAggregate, f"{metric_name}_count")
+        columns.append(
+            (func.sum(metric_sum) / func.nullif(func.sum(metric_count), 0)).label(metric_name)
+        )
+
+    if group_by:
+        period = _period_start(group_by).label("period_start")
+        query = select(period, *columns).group_by(period).order_by(period)
+    else:
+        query = select(*columns)
+    if start_date:
+        query = query.where(WellbeingDailyAggregate.date >= start_date)
+    if end_date:
+        query = query.where(WellbeingDailyAggregate.date <= end_date)
+    return query
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the authentication dependency.
+
+Creates a throwaway database with one user and measures:
+  - get_current_user() with the principal cache cleared before every call
+    (JWT decode + session + user query, the cost every request used to pay)
+  - get_current_user() with a warm cache
+  - a full GET /api/auth/me request in both situations
+
+Usage (from the backend directory):
+    python benchmarks/bench_auth.py [--iterations 2000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Use a throwaway database; must be set before the app modules are imported
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_auth.db')}"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+from app.auth import create_access_token, get_current_user, get_password_hash, principal_cache
+from app.database import SessionLocal
+from app.main import app
+from app.models import User
+
+
+def measure(call, iterations: int, cold: bool) -> float:
+    """Median time of `call` in microseconds."""
+    timings = []
+    for _ in range(iterations):
+        if cold:
+            principal_cache.clear()
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1_000_000
+
+
+async def measure_async(call, iterations: int, cold: bool) -> float:
+    """Median time of awaiting `call()` in microseconds."""
+    timings = []
+    for _ in range(iterations):
+        if cold:
+            principal_cache.clear()
+        started = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the authentication dependency")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        db.add(User(username="bench", hashed_password=get_password_hash("bench"), is_active=True))
+        db.commit()
+
+    token = create_access_token({"sub": "bench"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def dependency():
+        return get_current_user(credentials)
+
+    def request():
+        client.get("/api/auth/me", headers=headers)
+
+    results = [
+        ("get_current_user, uncached", asyncio.run(measure_async(dependency, args.iterations, cold=True))),
+        ("get_current_user, cached", asyncio.run(measure_async(dependency, args.iterations, cold=False))),
+        ("GET /api/auth/me, uncached", measure(request, args.iterations, cold=True)),
+        ("GET /api/auth/me, cached", measure(request, args.iterations, cold=False)),
+    ]
+
+    for label, microseconds in results:
+        print(f"{label:<30} {microseconds:10.1f} µs")
+    print(f"dependency speedup: {results[0][1] / results[1][1]:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
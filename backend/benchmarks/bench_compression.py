@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Report bytes on the wire and JSON encoding time of the heaviest endpoints.
+
+Builds a throwaway SQLite database with several years of daily data (see
+bench_loader.populate), then requests each endpoint in-process through
+FastAPI's TestClient with and without `Accept-Encoding: gzip` and prints:
+
+    raw KiB     body size without compression
+    gzip KiB    body size with the GZip middleware
+    json ms     median time to encode the body with json.dumps (the previous default)
+    orjson ms   median time to encode it with app.serialization.dumps
+
+Requires httpx (pip install httpx).
+
+Usage (from the backend directory):
+    python benchmarks/bench_compression.py [--years 5] [--factors 20] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def endpoints(start, years: int):
+    end_date = start.replace(year=start.year + years).isoformat()
+    start_date = start.isoformat()
+    return [
+        ("/api/analytics/trends/wellbeing", {}),
+        ("/api/analytics/correlations/multi-metric", {}),
+        ("/api/analytics/correlations/rolling", {"window": 30}),
+        ("/api/lifestyle-factors/entries/range", {"start_date": start_date, "end_date": end_date}),
+        ("/api/wellbeing/", {"limit": 1000}),
+        ("/api/sync/", {}),
+    ]
+
+
+def median_ms(encode, content, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode(content)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response size and JSON encoding")
+    parser.add_argument("--years", type=int, default=5, help="Years of daily data")
+    parser.add_argument("--factors", type=int, default=20, help="Lifestyle factors")
+    parser.add_argument("--repeat", type=int, default=5, help="Encodings per endpoint")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The app reads its settings at import time, so import it only now
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ["DISABLE_AUTH"] = "true"
+        os.environ["ANALYTICS_WORKERS"] = "0"
+        os.environ["LOG_LEVEL"] = "WARNING"
+
+        from bench_loader import START_DATE, populate
+        from app.database import Base, engine
+        Base.metadata.create_all(bind=engine)
+        print(f"Populating {args.years} years x {args.factors} factors...")
+        populate(engine, args.years, args.factors)
+
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.serialization import dumps
+
+        print(f"{'endpoint':<42} {'raw KiB':>9} {'gzip KiB':>9} {'json ms':>9} {'orjson ms':>10}")
+        # With DISABLE_AUTH any token is accepted, but HTTPBearer still requires the header
+        with TestClient(app, headers={"Authorization": "Bearer bench"}) as client:
+            for path, params in endpoints(START_DATE, args.years):
+                plain = client.get(path, params=params, headers={"Accept-Encoding": "identity"})
+                plain.raise_for_status()
+                compressed = client.get(path, params=params, headers={"Accept-Encoding": "gzip"})
+                # httpx decompresses the body; the header holds the size that was sent
+                gzip_bytes = int(compressed.headers.get("content-length", len(compressed.content)))
+
+                content = plain.json()
+                json_ms = median_ms(
+                    lambda value: json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode(),
+                    content, args.repeat
+                )
+                orjson_ms = median_ms(dumps, content, args.repeat)
+                print(
+                    f"{path:<42} {len(plain.content) / 1024:>9.1f} {gzip_bytes / 1024:>9.1f} "
+                    f"{json_ms:>9.2f} {orjson_ms:>10.2f}"
+                )
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark the entry table indexes on a synthetic dataset.
+
+Builds a throwaway SQLite database (100k lifestyle factor entries and 100k
+wellbeing entries by default), then runs the queries the routers issue most
+often twice: once without the entry indexes and once after
+`run_migrations()` created them. For every query it prints the SQLite query
+plan and the median latency.
+
+Usage (from the backend directory):
+    python benchmarks/bench_indexes.py [--rows 100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select, text
+from app import models
+from app.database import Base
+from app.migrations import run_migrations
+
+FACTORS = 50
+START_DATE = date(2020, 1, 1)
+ENTRY_INDEXES = [
+    (models.LifestyleFactorEntry.__tablename__, "uq_lifestyle_factor_entries_factor_date"),
+    (models.LifestyleFactorEntry.__tablename__, "ix_lifestyle_factor_entries_date"),
+    (models.WellbeingMetricEntry.__tablename__, "ix_wellbeing_metric_entries_date_time"),
+]
+
+
+def populate(engine, rows: int) -> date:
+    """Fill the database and return the last date that has data."""
+    rng = random.Random(42)
+    days = rows // FACTORS
+    Entry = models.LifestyleFactorEntry
+    Wellbeing = models.WellbeingMetricEntry
+
+    with engine.begin() as connection:
+        connection.execute(insert(models.LifestyleFactor), [
+            {"id": factor_id, "name": f"Factor {factor_id}"} for factor_id in range(1, FACTORS + 1)
+        ])
+        connection.execute(insert(Entry), [
+            {
+                "lifestyle_factor_id": factor_id,
+                "date": START_DATE + timedelta(days=day),
+                "completed": rng.random() < 0.6,
+            }
+            for day in range(days)
+            for factor_id in range(1, FACTORS + 1)
+        ])
+        connection.execute(insert(Wellbeing), [
+            {
+                "date": (START_DATE + timedelta(days=i * days // rows)),
+                "time": datetime.combine(START_DATE + timedelta(days=i * days // rows), datetime.min.time())
+                + timedelta(minutes=i % 1440),
+                "mood_score": rng.randint(1, 5),
+                "energy_level": rng.randint(1, 5),
+            }
+            for i in range(rows)
+        ])
+
+    return START_DATE + timedelta(days=days - 1)
+
+
+def benchmark_queries(last_date: date):
+    """(label, statement) pairs mirroring the router queries."""
+    Entry = models.LifestyleFactorEntry
+    Wellbeing = models.WellbeingMetricEntry
+    month_start = last_date - timedelta(days=30)
+
+    return [
+        ("entries/date/{date}", select(Entry).where(Entry.date == last_date)),
+        ("entries/range (all factors, 30 days)", select(Entry).where(
+            Entry.date >= month_start, Entry.date <= last_date
+        ).order_by(Entry.date)),
+        ("entries/range (one factor, 30 days)", select(Entry).where(
+            Entry.date >= month_start, Entry.date <= last_date, Entry.lifestyle_factor_id == 7
+        ).order_by(Entry.date)),
+        ("entry upsert lookup (factor, date)", select(Entry).where(
+            Entry.lifestyle_factor_id == 7, Entry.date == last_date
+        )),
+        ("factor stats (all entries of a factor)", select(Entry).where(
+            Entry.lifestyle_factor_id == 7
+        ).order_by(Entry.date)),
+        ("wellbeing list (30 days)", select(Wellbeing).where(
+            Wellbeing.date >= month_start, Wellbeing.date <= last_date
+        ).order_by(Wellbeing.date.desc()).limit(100)),
+        ("wellbeing/date/{date}", select(Wellbeing).where(
+            Wellbeing.date == last_date
+        ).order_by(Wellbeing.time)),
+    ]
+
+
+def run(engine, last_date: date, repeat: int):
+    results = {}
+    with engine.connect() as connection:
+        for label, statement in benchmark_queries(last_date):
+            sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                connection.execute(statement).fetchall()
+                timings.append(time.perf_counter() - started)
+
+            results[label] = ("; ".join(plan), statistics.median(timings) * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the entry table indexes")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows per entry table")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+
+        # Start from the schema older databases have
+        with engine.begin() as connection:
+            for _, index_name in ENTRY_INDEXES:
+                connection.execute(text(f"DROP INDEX {index_name}"))
+
+        print(f"Populating {args.rows} lifestyle factor entries and {args.rows} wellbeing entries...")
+        last_date = populate(engine, args.rows)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+
+        before = run(engine, last_date, args.repeat)
+        run_migrations(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+        after = run(engine, last_date, args.repeat)
+        engine.dispose()
+
+    for label, (plan_before, ms_before) in before.items():
+        plan_after, ms_after = after[label]
+        print()
+        print(label)
+        print(f"  before: {ms_before:8.2f} ms  {plan_before}")
+        print(f"  after:  {ms_after:8.2f} ms  {plan_after}")
+        print(f"  speedup: {ms_before / ms_after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
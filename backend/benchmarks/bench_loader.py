@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark the columnar analytics loader against ORM objects -> dicts -> DataFrames.
+
+Builds a throwaway SQLite database with several years of daily data for every
+wellbeing metric and a number of lifestyle factors, then loads everything the
+multi-metric correlation endpoint needs in two ways:
+
+    orm       full ORM entries and one row dict + DataFrame per metric (the old path)
+    columnar  app.columnar.load_daily_metrics / load_factor_entries
+
+and prints the median load time and peak allocated memory of each.
+
+Usage (from the backend directory):
+    python benchmarks/bench_loader.py [--years 5] [--factors 20] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app import models
+from app.columnar import load_daily_metrics, load_factor_entries
+from app.database import Base
+from app.models import WELLBEING_METRIC_COLUMNS
+from app.wellbeing_rollup import daily_means_select, rebuild_daily_aggregates
+
+START_DATE = date(2015, 1, 1)
+
+
+def populate(engine, years: int, factors: int):
+    rng = random.Random(42)
+    days = years * 365
+
+    with engine.begin() as connection:
+        connection.execute(insert(models.LifestyleFactor), [
+            {"id": factor_id, "name": f"Factor {factor_id}"} for factor_id in range(1, factors + 1)
+        ])
+        connection.execute(insert(models.LifestyleFactorEntry), [
+            {
+                "lifestyle_factor_id": factor_id,
+                "date": START_DATE + timedelta(days=day),
+                "completed": rng.random() < 0.6,
+            }
+            for day in range(days)
+            for factor_id in range(1, factors + 1)
+        ])
+        connection.execute(insert(models.WellbeingMetricEntry), [
+            {
+                "date": START_DATE + timedelta(days=day),
+                "time": datetime.combine(START_DATE + timedelta(days=day), datetime.min.time()),
+                # 1-3 is within the range of every metric, so the rows also pass response validation
+                **{metric_name: rng.randint(1, 3) for metric_name in WELLBEING_METRIC_COLUMNS},
+            }
+            for day in range(days)
+        ])
+
+    with Session(engine) as db:
+        rebuild_daily_aggregates(db)
+        db.commit()
+
+
+def load_orm(db: Session):
+    """The previous path: ORM objects, a dict per row and a DataFrame per metric."""
+    entries = db.query(models.LifestyleFactorEntry).all()
+    entries_df = pd.DataFrame([
+        {"lifestyle_factor_id": entry.lifestyle_factor_id, "date": entry.date, "completed": 1 if entry.completed else 0}
+        for entry in entries
+    ])
+    metric_dfs = []
+    for metric_name in WELLBEING_METRIC_COLUMNS:
+        rows = db.execute(daily_means_select([metric_name])).all()
+        metric_dfs.append(pd.DataFrame([
+            {"date": day_date, metric_name: value} for day_date, value in rows if value is not None
+        ]))
+    return entries_df, metric_dfs
+
+
+def load_columnar(db: Session):
+    return load_factor_entries(db), load_daily_metrics(db, WELLBEING_METRIC_COLUMNS)
+
+
+def measure(engine, load, repeat: int):
+    """Median seconds and peak traced bytes of `load(db)`."""
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        with Session(engine) as db:
+            tracemalloc.start()
+            started = time.perf_counter()
+            load(db)
+            timings.append(time.perf_counter() - started)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar analytics loader")
+    parser.add_argument("--years", type=int, default=5, help="Years of daily data")
+    parser.add_argument("--factors", type=int, default=20, help="Lifestyle factors")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per loader")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        print(f"Populating {args.years} years x {args.factors} factors...")
+        populate(engine, args.years, args.factors)
+
+        orm_seconds, orm_peak = measure(engine, load_orm, args.repeat)
+        columnar_seconds, columnar_peak = measure(engine, load_columnar, args.repeat)
+        engine.dispose()
+
+    print(f"{'loader':>10} {'time ms':>10} {'peak MiB':>10}")
+    print(f"{'orm':>10} {orm_seconds * 1000:>10.1f} {orm_peak / 2**20:>10.1f}")
+    print(f"{'columnar':>10} {columnar_seconds * 1000:>10.1f} {columnar_peak / 2**20:>10.1f}")
+    print(f"speedup: {orm_seconds / columnar_seconds:.1f}x, memory: {orm_peak / columnar_peak:.1f}x less")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark serializing the wellbeing trends response.
+
+Builds synthetic daily means for every wellbeing metric (with gaps, like
+optional metrics have) over 1, 5 and 10 years and turns them into the
+/trends/wellbeing JSON body in two ways:
+
+    iterrows    DataFrame.iterrows() with per-value round() / pd.notna(),
+                encoded with jsonable_encoder + json (the previous path)
+    vectorized  column-wise rounding and NaN masking, encoded with orjson
+
+Usage (from the backend directory):
+    python benchmarks/bench_serialization.py [--years 1 5 10] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from datetime import date
+from fastapi.encoders import jsonable_encoder
+from app.columnar import day_strings
+from app.models import WELLBEING_METRIC_COLUMNS
+from app.serialization import dumps, records, rounded
+
+
+def synthetic_days(years: int):
+    rng = np.random.default_rng(42)
+    count = years * 365
+    days = np.arange(count, dtype=np.int64) + date(2015, 1, 1).toordinal()
+    values = rng.uniform(1, 5, size=(count, len(WELLBEING_METRIC_COLUMNS)))
+    # Optional metrics are missing on some days
+    values[:, 1:][rng.random((count, len(WELLBEING_METRIC_COLUMNS) - 1)) < 0.3] = np.nan
+    return days, values
+
+
+def serialize_iterrows(days, values) -> bytes:
+    daily_avg = pd.DataFrame(values, columns=WELLBEING_METRIC_COLUMNS)
+    daily_avg["date"] = day_strings(days)
+    for metric in WELLBEING_METRIC_COLUMNS:
+        daily_avg[f"{metric}_ma7"] = daily_avg[metric].rolling(window=7, min_periods=1).mean()
+
+    data = []
+    for _, row in daily_avg.iterrows():
+        record = {"date": str(row["date"])}
+        for metric in WELLBEING_METRIC_COLUMNS:
+            value = row[metric]
+            ma_value = row[f"{metric}_ma7"]
+            record[metric] = round(value, 2) if pd.notna(value) else None
+            record[f"{metric}_ma7"] = round(ma_value, 2) if pd.notna(ma_value) else None
+        data.append(record)
+    return json.dumps(jsonable_encoder({"data": data})).encode("utf-8")
+
+
+def serialize_vectorized(days, values) -> bytes:
+    moving_averages = pd.DataFrame(values).rolling(window=7, min_periods=1).mean().to_numpy()
+    columns = {"date": day_strings(days)}
+    for i, metric in enumerate(WELLBEING_METRIC_COLUMNS):
+        columns[metric] = rounded(values[:, i], 2)
+        columns[f"{metric}_ma7"] = rounded(moving_averages[:, i], 2)
+    return dumps({"data": records(columns)})
+
+
+def measure(serialize, days, values, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        serialize(days, values)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trends response serialization")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 10], help="Years of daily data")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+
+    print(f"{'years':>6} {'iterrows ms':>12} {'vectorized ms':>14} {'speedup':>8}")
+    for years in args.years:
+        days, values = synthetic_days(years)
+        before = measure(serialize_iterrows, days, values, args.repeat)
+        after = measure(serialize_vectorized, days, values, args.repeat)
+        print(f"{years:>6} {before:>12.1f} {after:>14.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
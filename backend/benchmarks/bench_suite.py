@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Benchmark every API endpoint on a synthetic database and compare runs.
+
+run
+    Generates a database at the requested scale (see synthetic_data.py), or
+    reuses one, and drives every GET endpoint of the app in-process through
+    FastAPI's TestClient, followed by the common writes (check-ins, batch
+    check-ins, logging wellbeing, editing a CBT thought). For each endpoint it
+    records latency percentiles, database queries per request, peak traced
+    memory of one request and the response size, and writes a JSON report.
+
+    Analytics and dashboard caches are cleared before every request, so the
+    latencies are those of computing the result; pass --warm to measure
+    cache hits instead. Requests carry a token of the database's user (a
+    "bench" user is created when there is none). The run fails without
+    writing a report when any endpoint answers with an error status.
+
+compare
+    Compares two reports and lists endpoints whose median latency or peak
+    memory grew by more than --threshold, or that run more queries. Exits
+    with status 1 when there is a regression.
+
+Requires httpx (pip install httpx).
+
+Usage (from the backend directory):
+    python benchmarks/bench_suite.py run [--factors 20] [--years 3] [--wellbeing-per-day 2]
+        [--cbt-thoughts 500] [--repeat 20] [--database file.db] [--output report.json]
+    python benchmarks/bench_suite.py compare base.json new.json [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Latency differences below this are noise, whatever the ratio
+MIN_REGRESSION_MS = 1.0
+
+PATH_PARAMETER = re.compile(r"{(\w+)}")
+
+
+class QueryCounter:
+    """Count the statements both app engines send to the database."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _summarize(timings, queries, peak_bytes: int, status: int, size: int) -> dict:
+    timings = sorted(seconds * 1000 for seconds in timings)
+    return {
+        "status": status,
+        "requests": len(timings),
+        "latency_ms": {
+            "p50": round(_percentile(timings, 0.50), 3),
+            "p90": round(_percentile(timings, 0.90), 3),
+            "p95": round(_percentile(timings, 0.95), 3),
+            "p99": round(_percentile(timings, 0.99), 3),
+            "mean": round(statistics.fmean(timings), 3),
+            "max": round(timings[-1], 3),
+        },
+        "queries": int(statistics.median(queries)),
+        "peak_memory_kib": round(peak_bytes / 1024, 1),
+        "response_bytes": size,
+    }
+
+
+def get_requests(app, scale: dict, ids: dict):
+    """One (name, method, url, params, body) per GET route, with path and required query parameters filled in."""
+    from fastapi.routing import APIRoute
+
+    path_values = {
+        "lifestyle_factor_id": ids["lifestyle_factor_id"],
+        "entry_id": ids["wellbeing_entry_id"],
+        "thought_id": ids["cbt_thought_id"],
+        "entry_date": scale["end_date"],
+    }
+    query_values = {
+        "start_date": scale["start_date"],
+        "end_date": scale["end_date"],
+    }
+
+    requests = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or "GET" not in route.methods:
+            continue
+        names = PATH_PARAMETER.findall(route.path)
+        if any(name not in path_values for name in names):
+            print(f"skipping {route.path}: unknown path parameter")
+            continue
+        url = PATH_PARAMETER.sub(lambda match: str(path_values[match.group(1)]), route.path)
+        params = {
+            param.name: query_values[param.name]
+            for param in route.dependant.query_params
+            if param.required and param.name in query_values
+        }
+        requests.append((f"GET {route.path}", "GET", url, params, None))
+    return requests
+
+
+def write_requests(scale: dict, ids: dict):
+    """The writes the app does most, replaying the same change so every repeat costs the same."""
+    today = scale["end_date"]
+    factor_id = ids["lifestyle_factor_id"]
+    return [
+        ("POST /api/lifestyle-factors/entries", "POST", "/api/lifestyle-factors/entries", None,
+         {"lifestyle_factor_id": factor_id, "date": today, "completed": True}),
+        ("POST /api/lifestyle-factors/entries/batch", "POST", "/api/lifestyle-factors/entries/batch", None,
+         [{"lifestyle_factor_id": lifestyle_factor_id, "date": today, "completed": True}
+          for lifestyle_factor_id in ids["active_lifestyle_factor_ids"]]),
+        ("PUT /api/cbt/{thought_id}", "PUT", f"/api/cbt/{ids['cbt_thought_id']}", None,
+         {"notes": "Benchmark edit"}),
+        # Last, since every repeat adds an entry
+        ("POST /api/wellbeing/", "POST", "/api/wellbeing/", None,
+         {"date": today, "mood_score": 3}),
+    ]
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as directory:
+        database = args.database or os.path.join(directory, "bench.db")
+        fresh = not os.path.exists(database)
+
+        # The app reads its settings at import time, so import it only now
+        os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        os.environ["DISABLE_AUTH"] = "false"
+        os.environ["ANALYTICS_WORKERS"] = "0"
+        os.environ["LOG_LEVEL"] = "WARNING"
+
+        from sqlalchemy import func, select
+        from app import models
+        from app.database import Base, SessionLocal, async_engine, engine
+        from synthetic_data import generate
+
+        if fresh:
+            Base.metadata.create_all(bind=engine)
+            print(
+                f"Generating {args.factors} factors x {args.years} years, "
+                f"{args.wellbeing_per_day} wellbeing entries/day, {args.cbt_thoughts} CBT thoughts..."
+            )
+            scale = generate(engine, args.factors, args.years, args.wellbeing_per_day, args.cbt_thoughts, args.seed)
+        else:
+            print(f"Using existing database {database}")
+
+        from fastapi.testclient import TestClient
+        from app.auth import create_access_token, get_password_hash
+        from app.cache import analytics_cache, dashboard_cache
+        from app.main import app
+
+        with SessionLocal() as db:
+            first_date, last_date = db.execute(
+                select(func.min(models.LifestyleFactorEntry.date), func.max(models.LifestyleFactorEntry.date))
+            ).one()
+            if not fresh:
+                scale = {
+                    table: db.scalar(select(func.count()).select_from(model))
+                    for table, model in (
+                        ("lifestyle_factors", models.LifestyleFactor),
+                        ("lifestyle_factor_entries", models.LifestyleFactorEntry),
+                        ("wellbeing_metric_entries", models.WellbeingMetricEntry),
+                        ("cbt_thoughts", models.CBTThought),
+                    )
+                }
+                scale["start_date"] = (first_date or date.today()).isoformat()
+                scale["end_date"] = (last_date or date.today()).isoformat()
+            ids = {
+                "lifestyle_factor_id": db.scalar(select(func.min(models.LifestyleFactor.id))),
+                "active_lifestyle_factor_ids": db.scalars(
+                    select(models.LifestyleFactor.id).where(models.LifestyleFactor.is_active)
+                ).all(),
+                "wellbeing_entry_id": db.scalar(select(func.min(models.WellbeingMetricEntry.id))),
+                "cbt_thought_id": db.scalar(select(func.min(models.CBTThought.id))),
+            }
+            # Requests authenticate like the app does, as the database's user (created when missing)
+            user = db.scalar(select(models.User).where(models.User.is_active == True))
+            if user is None:
+                user = models.User(username="bench", hashed_password=get_password_hash("bench"), is_active=True)
+                db.add(user)
+                db.commit()
+            token = create_access_token(data={"sub": user.username})
+        if ids["lifestyle_factor_id"] is None or ids["wellbeing_entry_id"] is None or ids["cbt_thought_id"] is None:
+            sys.exit("The database needs at least one lifestyle factor, wellbeing entry and CBT thought")
+
+        counter = QueryCounter([engine, async_engine.sync_engine])
+        results = {}
+        failures = []
+        # Server errors become 500 responses, reported as failures below
+        client = TestClient(app, headers={"Authorization": f"Bearer {token}"}, raise_server_exceptions=False)
+        with client:
+            requests = get_requests(app, scale, ids) + write_requests(scale, ids)
+            for name, method, url, params, body in requests:
+                def send():
+                    if not args.warm:
+                        analytics_cache.clear()
+                        dashboard_cache.clear()
+                    return client.request(method, url, params=params, json=body)
+
+                # Warm up connections and imports
+                response = send()
+                if not (200 <= response.status_code < 300 or response.status_code == 304):
+                    print(f"{name:<62} {response.status_code:>4} FAILED: {response.text[:200]}")
+                    failures.append((name, response.status_code))
+                    continue
+
+                timings, queries = [], []
+                for _ in range(args.repeat):
+                    counter.count = 0
+                    started = time.perf_counter()
+                    response = send()
+                    timings.append(time.perf_counter() - started)
+                    queries.append(counter.count)
+
+                tracemalloc.start()
+                send()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                results[name] = _summarize(timings, queries, peak, response.status_code, len(response.content))
+                latency = results[name]["latency_ms"]
+                print(
+                    f"{name:<62} {response.status_code:>4} p50 {latency['p50']:>9.2f} ms "
+                    f"p95 {latency['p95']:>9.2f} ms {results[name]['queries']:>4} queries "
+                    f"{results[name]['peak_memory_kib']:>10.1f} KiB"
+                )
+
+        engine.dispose()
+
+    if failures:
+        # A report of error responses would only measure the error handling
+        sys.exit(
+            f"{len(failures)} endpoint(s) failed, no report written: "
+            + ", ".join(f"{name} ({status})" for name, status in failures)
+        )
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "cache": "warm" if args.warm else "cold",
+            "scale": scale,
+        },
+        "endpoints": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {args.output}")
+
+
+def compare(args):
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+
+    if base["meta"]["scale"] != new["meta"]["scale"] or base["meta"]["cache"] != new["meta"]["cache"]:
+        print("warning: the reports were run at different scales or cache modes")
+
+    regressions = []
+    print(f"{'endpoint':<62} {'p50 base':>9} {'p50 new':>9} {'change':>8} {'queries':>9} {'memory':>8}")
+    for name, current in new["endpoints"].items():
+        previous = base["endpoints"].get(name)
+        if previous is None:
+            print(f"{name:<62} (new)")
+            continue
+
+        base_ms, new_ms = previous["latency_ms"]["p50"], current["latency_ms"]["p50"]
+        latency_change = new_ms / base_ms - 1 if base_ms else 0.0
+        memory_change = (
+            current["peak_memory_kib"] / previous["peak_memory_kib"] - 1 if previous["peak_memory_kib"] else 0.0
+        )
+        problems = []
+        if latency_change > args.threshold and new_ms - base_ms > MIN_REGRESSION_MS:
+            problems.append("latency")
+        if current["queries"] > previous["queries"]:
+            problems.append("queries")
+        if memory_change > args.threshold:
+            problems.append("memory")
+        if current["status"] != previous["status"]:
+            problems.append(f"status {previous['status']} -> {current['status']}")
+        if problems:
+            regressions.append((name, problems))
+
+        print(
+            f"{name:<62} {base_ms:>9.2f} {new_ms:>9.2f} {latency_change:>+8.0%} "
+            f"{previous['queries']:>4}->{current['queries']:<4} {memory_change:>+8.0%}"
+            + (f"  REGRESSION: {', '.join(problems)}" if problems else "")
+        )
+
+    for name in base["endpoints"]:
+        if name not in new["endpoints"]:
+            print(f"{name:<62} (removed)")
+
+    if regressions:
+        print(f"{len(regressions)} endpoint(s) regressed")
+        sys.exit(1)
+    print("No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every API endpoint on synthetic data")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Benchmark the endpoints and write a report")
+    # Scale options mirror synthetic_data.py
+    run_parser.add_argument("--factors", type=int, default=20, help="Lifestyle factors (N)")
+    run_parser.add_argument("--years", type=int, default=3, help="Years of daily entries (Y)")
+    run_parser.add_argument("--wellbeing-per-day", type=int, default=2, help="Wellbeing entries per day (M)")
+    run_parser.add_argument("--cbt-thoughts", type=int, default=500, help="CBT thoughts (K)")
+    run_parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    run_parser.add_argument("--repeat", type=int, default=20, help="Timed requests per endpoint")
+    run_parser.add_argument("--database", help="SQLite file to use (generated when missing, kept afterwards)")
+    run_parser.add_argument("--warm", action="store_true", help="Keep the analytics caches between requests")
+    run_parser.add_argument("--output", default=f"bench_report_{date.today():%Y%m%d}.json", help="Report file")
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("base", help="Report of the baseline run")
+    compare_parser.add_argument("new", help="Report of the run to check")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative growth (0.2 = 20%%)")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        if args.repeat < 1:
+            parser.error("--repeat must be at least 1")
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Check the maintained lifestyle factor stats against the original algorithm.
+
+Builds a throwaway SQLite database and writes random lifestyle factor
+entries through app.factor_stats.apply_entries, the way the entry handlers
+do: new days, changed days, entries before the latest one, entries after
+today and gaps of several days. After every batch it compares the stats of
+every factor, read for several values of "today", with the stats the
+/stats endpoint computed from all entries before they were materialized.
+
+Exits with an error on the first mismatch.
+
+Usage (from the backend directory):
+    python benchmarks/check_factor_stats.py [--factors 20] [--batches 300] [--seed 42]
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from app import models
+from app.database import Base
+from app.factor_stats import apply_entries, current_streaks, rebuild_factor_stats, to_schema
+
+TODAY = date(2024, 6, 15)
+
+
+def original_stats(entries, today: date) -> dict:
+    """The stats endpoint's computation from (date, completed) pairs, before the stats were materialized."""
+    if not entries:
+        return {"total_days": 0, "completed_days": 0, "current_streak": 0, "longest_streak": 0}
+
+    sorted_entries = sorted(entries)
+    longest_streak = 0
+    temp_streak = 0
+    for _, completed in sorted_entries:
+        if completed:
+            temp_streak += 1
+            longest_streak = max(longest_streak, temp_streak)
+        else:
+            temp_streak = 0
+
+    current_streak = 0
+    for entry_date, completed in reversed(sorted_entries):
+        if entry_date > today:
+            continue
+        if completed and (today - entry_date).days <= len(sorted_entries):
+            current_streak += 1
+        else:
+            break
+
+    return {
+        "total_days": len(sorted_entries),
+        "completed_days": sum(1 for _, completed in sorted_entries if completed),
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+    }
+
+
+def random_batch(rng: random.Random, factor_ids, latest):
+    """Entries to write: mostly check-ins after the latest day, sometimes edits, backfills and future days."""
+    batch = {}
+    for _ in range(rng.randint(1, 3)):
+        factor_id = rng.choice(factor_ids)
+        kind = rng.random()
+        if kind < 0.6:
+            entry_date = latest.get(factor_id, TODAY - timedelta(days=40)) + timedelta(days=rng.choice([1, 1, 1, 2, 3, 7]))
+        elif kind < 0.8:
+            entry_date = latest.get(factor_id, TODAY)
+        elif kind < 0.95:
+            entry_date = TODAY - timedelta(days=rng.randint(0, 60))
+        else:
+            entry_date = TODAY + timedelta(days=rng.randint(1, 5))
+        batch[(factor_id, entry_date)] = rng.random() < 0.75
+    return batch
+
+
+def compare(db: Session, factors, entries) -> list:
+    """Return the mismatches between the stored stats and the original algorithm."""
+    records = db.scalars(select(models.LifestyleFactorStatsRecord)).all()
+    by_factor = {record.lifestyle_factor_id: record for record in records}
+    mismatches = []
+    for today in (TODAY - timedelta(days=3), TODAY, TODAY + timedelta(days=1), TODAY + timedelta(days=4)):
+        streaks = current_streaks(db, records, today)
+        for factor in factors:
+            stats = to_schema(factor, by_factor.get(factor.id), streaks.get(factor.id, 0))
+            actual = {name: getattr(stats, name) for name in ("total_days", "completed_days", "current_streak", "longest_streak")}
+            expected = original_stats(
+                [(entry_date, completed) for (factor_id, entry_date), completed in entries.items() if factor_id == factor.id],
+                today
+            )
+            if actual != expected:
+                mismatches.append((factor.id, today, actual, expected))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check lifestyle factor stats against the original algorithm")
+    parser.add_argument("--factors", type=int, default=20, help="Lifestyle factors")
+    parser.add_argument("--batches", type=int, default=300, help="Batches of entry writes")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as db:
+        factors = [models.LifestyleFactor(name=f"Factor {index}") for index in range(args.factors)]
+        db.add_all(factors)
+        db.commit()
+        factor_ids = [factor.id for factor in factors]
+
+        entries = {}
+        latest = {}
+        for batch_number in range(1, args.batches + 1):
+            batch = random_batch(rng, factor_ids, latest)
+            existing = {
+                (entry.lifestyle_factor_id, entry.date): entry
+                for entry in db.scalars(select(models.LifestyleFactorEntry).where(
+                    models.LifestyleFactorEntry.lifestyle_factor_id.in_([factor_id for factor_id, _ in batch])
+                ))
+            }
+            for (factor_id, entry_date), completed in batch.items():
+                entry = existing.get((factor_id, entry_date))
+                if entry is None:
+                    db.add(models.LifestyleFactorEntry(lifestyle_factor_id=factor_id, date=entry_date, completed=completed))
+                else:
+                    entry.completed = completed
+                entries[(factor_id, entry_date)] = completed
+                latest[factor_id] = max(latest.get(factor_id, entry_date), entry_date)
+            apply_entries(db, [(factor_id, entry_date, completed) for (factor_id, entry_date), completed in batch.items()])
+            db.commit()
+
+            mismatches = compare(db, factors, entries)
+            if mismatches:
+                for factor_id, today, actual, expected in mismatches:
+                    print(f"batch {batch_number}, factor {factor_id}, today {today}: {actual} != {expected}")
+                sys.exit("Stats differ from the original algorithm")
+
+        # A full rebuild must agree too
+        rebuild_factor_stats(db)
+        db.commit()
+        if compare(db, factors, entries):
+            sys.exit("Rebuilt stats differ from the original algorithm")
+
+    engine.dispose()
+    print(f"{args.batches} batches over {args.factors} factors ({len(entries)} entries): stats match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Load test the API with concurrent clients.
+
+Starts uvicorn on a throwaway database seeded with a year of data, then runs
+a dashboard-like mix of requests (check-ins, entry reads, mood logging and
+an occasional analytics call) from N concurrent clients for a fixed time and
+reports throughput and latency per concurrency level.
+
+Requires httpx (pip install httpx).
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py [--clients 1 8 32 64] [--duration 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FACTORS = 10
+DAYS = 365
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_path: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}", LOG_LEVEL="WARNING")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+async def wait_for_server(client: httpx.AsyncClient):
+    for _ in range(100):
+        try:
+            await client.get("/api/auth/check-setup")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+async def seed(client: httpx.AsyncClient) -> list:
+    """Create a user, lifestyle factors and a year of check-ins and mood entries."""
+    await client.post("/api/auth/register", json={"username": "load", "password": "load"})
+    token = (await client.post("/api/auth/login", json={"username": "load", "password": "load"})).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+
+    factor_ids = []
+    for i in range(FACTORS):
+        response = await client.post("/api/lifestyle-factors/", json={"name": f"Factor {i}"})
+        factor_ids.append(response.json()["id"])
+
+    rng = random.Random(1)
+    start = date.today() - timedelta(days=DAYS)
+    for day in range(DAYS):
+        entry_date = (start + timedelta(days=day)).isoformat()
+        await client.post("/api/lifestyle-factors/entries/batch", json=[
+            {"lifestyle_factor_id": factor_id, "date": entry_date, "completed": rng.random() < 0.6}
+            for factor_id in factor_ids
+        ])
+        await client.post("/api/wellbeing/", json={"date": entry_date, "mood_score": rng.randint(1, 5)})
+    return factor_ids
+
+
+def workload(factor_ids: list):
+    """A request mix resembling the dashboard: mostly small reads and check-ins."""
+    today = date.today()
+
+    def pick(rng: random.Random):
+        roll = rng.random()
+        day = (today - timedelta(days=rng.randrange(DAYS))).isoformat()
+        if roll < 0.35:
+            return "GET", f"/api/lifestyle-factors/entries/date/{day}", None
+        if roll < 0.55:
+            return "GET", "/api/lifestyle-factors/", None
+        if roll < 0.70:
+            return "GET", f"/api/wellbeing/date/{day}", None
+        if roll < 0.85:
+            return "POST", "/api/lifestyle-factors/entries", {
+                "lifestyle_factor_id": rng.choice(factor_ids), "date": day, "completed": rng.random() < 0.5
+            }
+        if roll < 0.95:
+            return "POST", "/api/wellbeing/", {"date": day, "mood_score": rng.randint(1, 5)}
+        return "GET", "/api/analytics/correlations/multi-metric", None
+
+    return pick
+
+
+async def run_level(client: httpx.AsyncClient, pick, clients: int, duration: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed_value: int):
+        nonlocal errors
+        rng = random.Random(seed_value)
+        while time.perf_counter() < deadline:
+            method, url, body = pick(rng)
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+async def main_async(args):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        server = start_server(os.path.join(directory, "load.db"), port)
+        try:
+            limits = httpx.Limits(max_connections=max(args.clients), max_keepalive_connections=max(args.clients))
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+                await wait_for_server(client)
+                print(f"Seeding {FACTORS} factors x {DAYS} days...")
+                factor_ids = await seed(client)
+                pick = workload(factor_ids)
+
+                print(f"{'clients':>8} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+                for clients in args.clients:
+                    result = await run_level(client, pick, clients, args.duration)
+                    print(
+                        f"{result['clients']:>8} {result['requests']:>9} {result['throughput']:>8.1f} "
+                        f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['errors']:>7}"
+                    )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with concurrent clients")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32, 64], help="Concurrency levels")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per concurrency level")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
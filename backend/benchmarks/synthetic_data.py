@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic database at a configurable scale.
+
+Fills a database with N lifestyle factors, Y years of daily entries ending
+today (each factor is checked in on most days), M wellbeing entries per day
+and K CBT thoughts. It then builds the wellbeing rollup, the lifestyle factor
+stats and the completion index, the same way an import does. Rows are
+written with executemany INSERTs in chunks, so large scales don't need the
+whole dataset in memory.
+
+Used by bench_suite.py; run it directly to create a database for sizing a
+deployment.
+
+Usage (from the backend directory):
+    python benchmarks/synthetic_data.py out.db [--factors 20] [--years 3]
+        [--wellbeing-per-day 2] [--cbt-thoughts 500] [--seed 42]
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, List
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app import models
+from app.completion_index import rebuild_completion_index
+from app.database import Base
+from app.factor_stats import rebuild_factor_stats
+from app.wellbeing_rollup import rebuild_daily_aggregates
+
+# Rows per executemany INSERT
+CHUNK_ROWS = 5000
+
+CATEGORIES = ["Health", "Fitness", "Mindfulness", "Social", "General"]
+
+DISTORTIONS = ["all-or-nothing", "catastrophizing", "mind-reading", "overgeneralization", "should-statements"]
+
+# Inclusive value range of each wellbeing metric, and whether it may be left empty
+METRIC_RANGES = {
+    "mood_score": (1, 5, False),
+    "energy_level": (1, 5, True),
+    "stress_level": (0, 3, True),
+    "anxiety_level": (0, 3, True),
+    "rumination_level": (0, 3, True),
+    "anger_level": (0, 3, True),
+    "general_health": (0, 5, True),
+    "sleep_quality": (0, 3, True),
+    "sweating_level": (0, 3, True),
+    "libido_level": (0, 3, True),
+}
+
+
+def _chunks(rows: Iterable[dict]) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(engine: Engine, model, rows: Iterable[dict]) -> int:
+    count = 0
+    for chunk in _chunks(rows):
+        with engine.begin() as connection:
+            connection.execute(insert(model), chunk)
+        count += len(chunk)
+    return count
+
+
+def generate(
+    engine: Engine,
+    factors: int = 20,
+    years: int = 3,
+    wellbeing_per_day: int = 2,
+    cbt_thoughts: int = 500,
+    seed: int = 42,
+) -> dict:
+    """
+    Fill an empty database (tables already created) and return the row counts and date range.
+    """
+    rng = random.Random(seed)
+    end_date = date.today()
+    days = years * 365
+    start_date = end_date - timedelta(days=days - 1)
+    now = datetime.utcnow()
+
+    factor_ids = list(range(1, factors + 1))
+    _insert(engine, models.LifestyleFactor, (
+        {
+            "id": factor_id,
+            "name": f"Factor {factor_id}",
+            "category": CATEGORIES[factor_id % len(CATEGORIES)],
+            "is_active": factor_id % 10 != 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for factor_id in factor_ids
+    ))
+
+    # Every factor has its own completion rate and is skipped on some days
+    completion_rates = {factor_id: rng.uniform(0.3, 0.9) for factor_id in factor_ids}
+    entry_count = _insert(engine, models.LifestyleFactorEntry, (
+        {
+            "lifestyle_factor_id": factor_id,
+            "date": start_date + timedelta(days=day),
+            "completed": rng.random() < completion_rates[factor_id],
+            "created_at": now,
+            "updated_at": now,
+        }
+        for day in range(days)
+        for factor_id in factor_ids
+        if rng.random() < 0.9
+    ))
+
+    def wellbeing_rows():
+        for day in range(days):
+            entry_date = start_date + timedelta(days=day)
+            for index in range(wellbeing_per_day):
+                values = {}
+                for metric_name, (low, high, optional) in METRIC_RANGES.items():
+                    values[metric_name] = None if optional and rng.random() < 0.2 else rng.randint(low, high)
+                yield {
+                    "date": entry_date,
+                    # Spread the day's entries between 08:00 and 22:00
+                    "time": datetime.combine(entry_date, time(8 + index * 14 // max(wellbeing_per_day, 1))),
+                    **values,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+
+    wellbeing_count = _insert(engine, models.WellbeingMetricEntry, wellbeing_rows())
+
+    def cbt_rows():
+        for _ in range(cbt_thoughts):
+            entry_date = start_date + timedelta(days=rng.randrange(days))
+            yield {
+                "date": entry_date,
+                "time": datetime.combine(entry_date, time(rng.randrange(24), rng.randrange(60))),
+                "negative_thought": "Synthetic negative thought",
+                "distortions": ",".join(rng.sample(DISTORTIONS, rng.randint(1, 3))),
+                "alternative_thought": "Synthetic alternative thought",
+                "intensity": rng.randint(1, 10),
+                "created_at": now,
+                "updated_at": now,
+            }
+
+    cbt_count = _insert(engine, models.CBTThought, cbt_rows())
+
+    with Session(engine) as db:
+        rebuild_daily_aggregates(db)
+        rebuild_factor_stats(db)
+        rebuild_completion_index(db)
+        db.commit()
+
+    return {
+        "lifestyle_factors": factors,
+        "lifestyle_factor_entries": entry_count,
+        "wellbeing_metric_entries": wellbeing_count,
+        "cbt_thoughts": cbt_count,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic database")
+    parser.add_argument("database", help="SQLite file to create")
+    parser.add_argument("--factors", type=int, default=20, help="Lifestyle factors (N)")
+    parser.add_argument("--years", type=int, default=3, help="Years of daily entries (Y)")
+    parser.add_argument("--wellbeing-per-day", type=int, default=2, help="Wellbeing entries per day (M)")
+    parser.add_argument("--cbt-thoughts", type=int, default=500, help="CBT thoughts (K)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        parser.error(f"{args.database} already exists")
+
+    engine = create_engine(f"sqlite:///{args.database}")
+    Base.metadata.create_all(bind=engine)
+    counts = generate(engine, args.factors, args.years, args.wellbeing_per_day, args.cbt_thoughts, args.seed)
+    engine.dispose()
+    for name, value in counts.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
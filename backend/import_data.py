@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Script to bulk import data into the Wellness Log database.
+
+Accepts the CSV files produced by the export endpoints (or a full ZIP backup)
+and legacy Habits.csv / Checkmarks.csv exports. Rows are upserted in batched
+transactions, so re-running an import only updates what changed.
+
+Stop the backend (or at least avoid writing from the app) while importing.
+"""
+import argparse
+import sys
+import os
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal, engine
+from app.migrations import prepare_database
+from app.importer import (
+    read_csv,
+    import_lifestyle_factors,
+    import_lifestyle_factor_entries,
+    import_wellbeing_metric_entries,
+    import_cbt_thoughts,
+    import_backup,
+    import_legacy,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk import data into the Wellness Log database.")
+    parser.add_argument("--backup", help="ZIP backup produced by /api/export/export/all")
+    parser.add_argument("--lifestyle-factors", help="lifestyle_factors.csv")
+    parser.add_argument("--entries", help="lifestyle_factor_entries.csv")
+    parser.add_argument("--wellbeing", help="wellbeing_metric_entries.csv")
+    parser.add_argument("--cbt", help="cbt_thoughts.csv")
+    parser.add_argument("--habits", help="Legacy Habits.csv")
+    parser.add_argument("--checkmarks", help="Legacy Checkmarks.csv")
+    parser.add_argument(
+        "--include-archived",
+        action="store_true",
+        help="Include checkmarks for archived habits (legacy import only)"
+    )
+    args = parser.parse_args()
+    if bool(args.habits) != bool(args.checkmarks):
+        parser.error("--habits and --checkmarks must be given together")
+    if not any([args.backup, args.lifestyle_factors, args.entries, args.wellbeing, args.cbt, args.habits]):
+        parser.error("nothing to import")
+    return args
+
+
+def run_import(args):
+    """Run the requested imports in dependency order and print a summary."""
+    # Tables, migrations and derived data as the app has them at startup
+    prepare_database(engine)
+    db = SessionLocal()
+    results = []
+    
+    try:
+        print("🌿 Wellness Log - Bulk Import")
+        print("=" * 50)
+        
+        if args.backup:
+            with open(args.backup, "rb") as file:
+                results += import_backup(db, file)
+        
+        # Factors first so entries can be matched to them
+        for path, import_table in [
+            (args.lifestyle_factors, import_lifestyle_factors),
+            (args.entries, import_lifestyle_factor_entries),
+            (args.wellbeing, import_wellbeing_metric_entries),
+            (args.cbt, import_cbt_thoughts),
+        ]:
+            if path:
+                with open(path, "rb") as file:
+                    results.append(import_table(db, read_csv(file)))
+        
+        if args.habits:
+            with open(args.habits, "rb") as habits, open(args.checkmarks, "rb") as checkmarks:
+                results += import_legacy(db, read_csv(habits), read_csv(checkmarks), args.include_archived)
+        
+        for result in results:
+            print(
+                f"✅ {result.table}: {result.inserted} inserted, "
+                f"{result.updated} updated, {result.skipped} skipped"
+            )
+        print("=" * 50)
+        
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error importing data: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_import(parse_args())
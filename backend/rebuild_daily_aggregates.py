@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the wellbeing daily rollup from the raw wellbeing entries.
+Run this after importing data directly into the database or if the
+analytics ever look out of sync with the logged entries.
+"""
+import sys
+import os
+
+# Add the parent directory to the path to import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import models
+from app.cache import bump_data_version
+from app.database import SessionLocal, engine
+from app.migrations import prepare_database
+from app.wellbeing_rollup import rebuild_daily_aggregates
+
+
+def rebuild():
+    """Recompute the wellbeing_daily_aggregates table."""
+    # Tables, migrations and derived data as the app has them at startup
+    prepare_database(engine)
+    db = SessionLocal()
+    
+    try:
+        print("🌿 Wellness Log - Rebuilding wellbeing daily rollup")
+        print("=" * 50)
+        
+        days = rebuild_daily_aggregates(db)
+        # Analytics cached from the old rollup are recomputed by a running server
+        bump_data_version(db, models.WellbeingMetricEntry.__tablename__)
+        db.commit()
+        
+        print(f"✅ Rebuilt rollup for {days} day(s).")
+        
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error rebuilding rollup: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild()
@@ -1,4 +1,4 @@
-import axios from 'axios'
+import axios, { AxiosResponse } from 'axios'
 
 // Type for runtime config injected via config.js
 declare global {
@@ -108,6 +108,7 @@ export interface LifestyleFactor {
   icon?: string
   category: string
   created_at: string
+  updated_at?: string
   is_active: boolean
 }
 
@@ -118,6 +119,7 @@ export interface LifestyleFactorEntry {
   completed: boolean
   notes?: string
   created_at: string
+  updated_at?: string
 }
 
 export interface WellbeingMetricEntry {
@@ -140,6 +142,7 @@ export interface WellbeingMetricEntry {
   notes?: string
   tags?: string
   created_at: string
+  updated_at?: string
 }
 
 export interface CorrelationResult {
@@ -171,6 +174,24 @@ export interface LifestyleFactorStats {
   completion_rate: number
   current_streak: number
   longest_streak: number
+  last_completed_date?: string | null
+}
+
+// Completion bitsets: bit i (most significant bit of each byte first) is start_date + i days.
+// "rle" gives run lengths of alternating 0 and 1 bits, starting with 0 bits.
+export type CompletionEncoding = 'base64' | 'rle'
+
+export interface CompletionCalendar {
+  year: number
+  start_date: string
+  days: number
+  encoding: CompletionEncoding
+  lifestyle_factors: {
+    lifestyle_factor_id: number
+    lifestyle_factor_name: string
+    recorded: string | number[]
+    completed: string | number[]
+  }[]
 }
 
 export interface CBTThought {
@@ -198,33 +219,45 @@ export const lifestyleFactorsApi = {
   archive: (id: number) => api.post<LifestyleFactor>(`/api/lifestyle-factors/${id}/archive`),
   unarchive: (id: number) => api.post<LifestyleFactor>(`/api/lifestyle-factors/${id}/unarchive`),
   getStats: (id: number) => api.get<LifestyleFactorStats>(`/api/lifestyle-factors/${id}/stats`),
+  getAllStats: (includeInactive?: boolean) => api.get<LifestyleFactorStats[]>('/api/lifestyle-factors/stats', {
+    params: { include_inactive: includeInactive }
+  }),
   getCategories: () => api.get<{ categories: string[] }>('/api/lifestyle-factors/categories/list'),
 }
 
+// Cursor of the next page of a paged list response, if there is one
+export const nextCursor = (response: AxiosResponse): string | undefined =>
+  response.headers['x-next-cursor'] || undefined
+
 // Lifestyle Factor Entries API
 export const lifestyleFactorEntriesApi = {
   create: (data: Partial<LifestyleFactorEntry>) => api.post<LifestyleFactorEntry>('/api/lifestyle-factors/entries', data),
-  getRange: (startDate: string, endDate: string, lifestyleFactorId?: number) => 
+  batch: (data: Partial<LifestyleFactorEntry>[]) => api.post<LifestyleFactorEntry[]>('/api/lifestyle-factors/entries/batch', data),
+  getRange: (startDate: string, endDate: string, lifestyleFactorId?: number, limit?: number, cursor?: string) => 
     api.get<LifestyleFactorEntry[]>('/api/lifestyle-factors/entries/range', {
-      params: { start_date: startDate, end_date: endDate, lifestyle_factor_id: lifestyleFactorId }
+      params: { start_date: startDate, end_date: endDate, lifestyle_factor_id: lifestyleFactorId, limit, cursor }
     }),
   getByDate: (date: string) => api.get<LifestyleFactorEntry[]>(`/api/lifestyle-factors/entries/date/${date}`),
+  getCalendar: (year?: number, encoding: CompletionEncoding = 'base64', includeInactive?: boolean) =>
+    api.get<CompletionCalendar>('/api/lifestyle-factors/entries/calendar', {
+      params: { year, encoding, include_inactive: includeInactive }
+    }),
 }
 
 // Well-Being Metrics API
 export const wellbeingApi = {
   create: (data: Partial<WellbeingMetricEntry>) => api.post<WellbeingMetricEntry>('/api/wellbeing', data),
-  getAll: (startDate?: string, endDate?: string, limit?: number) => 
+  getAll: (startDate?: string, endDate?: string, limit?: number, cursor?: string) => 
     api.get<WellbeingMetricEntry[]>('/api/wellbeing', {
-      params: { start_date: startDate, end_date: endDate, limit }
+      params: { start_date: startDate, end_date: endDate, limit, cursor }
     }),
   getOne: (id: number) => api.get<WellbeingMetricEntry>(`/api/wellbeing/${id}`),
   getByDate: (date: string) => api.get<WellbeingMetricEntry[]>(`/api/wellbeing/date/${date}`),
   update: (id: number, data: Partial<WellbeingMetricEntry>) => api.put<WellbeingMetricEntry>(`/api/wellbeing/${id}`, data),
   delete: (id: number) => api.delete(`/api/wellbeing/${id}`),
-  getStats: (startDate?: string, endDate?: string) => 
+  getStats: (startDate?: string, endDate?: string, groupBy?: 'week' | 'month') => 
     api.get('/api/wellbeing/stats/summary', {
-      params: { start_date: startDate, end_date: endDate }
+      params: { start_date: startDate, end_date: endDate, group_by: groupBy }
     }),
 }
 
@@ -254,14 +287,55 @@ export const analyticsApi = {
     api.get(`/api/analytics/heatmap/${lifestyleFactorId}`, {
       params: { year }
     }),
+  getCompactLifestyleFactorHeatmap: (lifestyleFactorId: number, year?: number, encoding: CompletionEncoding = 'base64') => 
+    api.get(`/api/analytics/heatmap/${lifestyleFactorId}/compact`, {
+      params: { year, encoding }
+    }),
+}
+
+// Dashboard API (everything the Dashboard page shows for a day, in one request)
+export interface DashboardSnapshot {
+  date: string
+  lifestyle_factors: LifestyleFactor[]
+  categories: string[]
+  entries: LifestyleFactorEntry[]
+  wellbeing_entries: WellbeingMetricEntry[]
+}
+
+export const dashboardApi = {
+  get: (date?: string) => api.get<DashboardSnapshot>('/api/dashboard/', {
+    params: { entry_date: date }
+  }),
+}
+
+// Delta sync API (rows changed and deleted since a cursor; everything when `full`)
+export interface SyncChanges {
+  cursor: string
+  full: boolean
+  lifestyle_factors: LifestyleFactor[]
+  lifestyle_factor_entries: LifestyleFactorEntry[]
+  wellbeing_metric_entries: WellbeingMetricEntry[]
+  cbt_thoughts: CBTThought[]
+  deleted: {
+    lifestyle_factors: number[]
+    lifestyle_factor_entries: number[]
+    wellbeing_metric_entries: number[]
+    cbt_thoughts: number[]
+  }
+}
+
+export const syncApi = {
+  get: (since?: string | null) => api.get<SyncChanges>('/api/sync/', {
+    params: { since: since || undefined }
+  }),
 }
 
 // CBT Thoughts API
 export const cbtApi = {
   create: (data: Partial<CBTThought>) => api.post<CBTThought>('/api/cbt', data),
-  getAll: (startDate?: string, endDate?: string, limit?: number) => 
+  getAll: (startDate?: string, endDate?: string, limit?: number, cursor?: string) => 
     api.get<CBTThought[]>('/api/cbt', {
-      params: { start_date: startDate, end_date: endDate, limit }
+      params: { start_date: startDate, end_date: endDate, limit, cursor }
     }),
   getOne: (id: number) => api.get<CBTThought>(`/api/cbt/${id}`),
   getByDate: (date: string) => api.get<CBTThought[]>(`/api/cbt/date/${date}`),
@@ -1,7 +1,7 @@
 import { useEffect, useState } from 'react'
 import { Link } from 'react-router-dom'
 import { useStore } from '../store/useStore'
-import { lifestyleFactorsApi, lifestyleFactorEntriesApi, wellbeingApi, LifestyleFactor } from '../lib/api'
+import { dashboardApi, lifestyleFactorsApi, lifestyleFactorEntriesApi, LifestyleFactor } from '../lib/api'
 import { formatDate, formatDisplayDate, getMoodEmoji } from '../lib/utils'
 import LifestyleFactorCard from '../components/LifestyleFactorCard'
 import EditLifestyleFactorModal from '../components/EditLifestyleFactorModal'
@@ -18,23 +18,20 @@ export default function Dashboard() {
 
   useEffect(() => {
     loadData()
-    loadCategories()
   }, [selectedDate])
 
   const loadData = async () => {
     try {
       setLoading(true)
-      const [habitsRes, entriesRes, moodRes] = await Promise.all([
-        lifestyleFactorsApi.getAll(),
-        lifestyleFactorEntriesApi.getByDate(formatDate(selectedDate)),
-        wellbeingApi.getByDate(formatDate(selectedDate))
-      ])
+      // One request for the factors, categories, entries and mood of the day
+      const { data } = await dashboardApi.get(formatDate(selectedDate))
       
-      setLifestyleFactors(habitsRes.data)
-      setLifestyleFactorEntries(entriesRes.data)
+      setLifestyleFactors(data.lifestyle_factors)
+      setLifestyleFactorEntries(data.entries)
+      setCategories(['All', ...data.categories])
       
-      if (moodRes.data.length > 0) {
-        const avgMood = moodRes.data.reduce((sum: number, m: any) => sum + m.mood_score, 0) / moodRes.data.length
+      if (data.wellbeing_entries.length > 0) {
+        const avgMood = data.wellbeing_entries.reduce((sum: number, m: any) => sum + m.mood_score, 0) / data.wellbeing_entries.length
         setTodayMood(Math.round(avgMood))
       } else {
         setTodayMood(null)
@@ -47,16 +44,6 @@ export default function Dashboard() {
     }
   }
 
-  const loadCategories = async () => {
-    try {
-      const response = await lifestyleFactorsApi.getCategories()
-      const uniqueCategories = ['All', ...response.data.categories]
-      setCategories(uniqueCategories)
-    } catch (error) {
-      console.error('Error loading categories:', error)
-    }
-  }
-
   const handleEditLifestyleFactor = async (updatedData: Partial<LifestyleFactor>) => {
     if (!editingLifestyleFactor) return
     
@@ -38,12 +38,11 @@ export default function LifestyleFactors() {
       const filtered = showArchived ? allLifestyleFactors.filter(h => !h.is_active) : allLifestyleFactors
       setLifestyleFactors(filtered)
       
-      // Load stats for each habit
-      const statsPromises = filtered.map(h => lifestyleFactorsApi.getStats(h.id))
-      const statsResults = await Promise.all(statsPromises)
+      // Load stats for all habits in one request
+      const statsResponse = await lifestyleFactorsApi.getAllStats(showArchived)
       const statsMap: Record<number, LifestyleFactorStats> = {}
-      statsResults.forEach(res => {
-        statsMap[res.data.lifestyle_factor_id] = res.data
+      statsResponse.data.forEach(stats => {
+        statsMap[stats.lifestyle_factor_id] = stats
       })
       setLifestyleFactorStats(statsMap)
     } catch (error) {